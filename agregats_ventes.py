@@ -0,0 +1,164 @@
+"""Agrégats des ventes (revenu par jour, quantités par genre et par vendeur) tenus à jour à chaque vente."""
+import argparse
+import math
+import os
+import sys
+
+import journal
+import stockage
+
+# ========== CONFIGURATION DES CHEMINS ==========
+PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
+
+def get_json_path(filename):
+    """Retourne le chemin vers les fichiers JSON dans Fichiers_json/"""
+    return os.path.join(PROJECT_ROOT, "Fichiers_json", filename)
+
+# ========== FIN CONFIGURATION DES CHEMINS ==========
+
+
+class AgregatsVentes:
+    """Totaux des ventes, mis à jour en O(1) par vente et enregistrés dans Fichiers_json/agregats_ventes.json.
+
+    Les agrégats portent sur les nombre_ventes premières ventes de la liste des ventes : au
+    chargement, seules les ventes suivantes sont ajoutées. Le revenu et la quantité des
+    nombre_ventes premières ventes servent de point de contrôle (des nombres, qui ne dépendent pas
+    de la forme des dates ni des champs absents) : s'ils ne correspondent plus, les agrégats sont
+    recalculés. Le fichier n'est réécrit qu'à la compaction du journal, pas à chaque vente.
+    """
+    def __init__(self, fichier=None): # Constructeur de la classe
+        self.fichier = fichier or get_json_path("agregats_ventes.json")
+        self.total_revenu = 0.0 # Revenu total
+        self.nombre_ventes = 0 # Nombre de ventes comptées
+        self.total_films_vendus = 0 # Quantité totale vendue
+        self.par_jour = {} # date (YYYY-MM-DD) -> revenu du jour
+        self.par_genre = {} # genre -> quantité totale vendue
+        self.par_vendeur = {} # username -> quantité totale vendue
+
+    def ajouter(self, vente, genre=None):
+        """Ajoute une vente aux agrégats (genre None : film absent du catalogue, non compté par genre)."""
+        self.total_revenu += vente["revenu_total"]
+        self.nombre_ventes += 1
+        quantite = vente["quantite"]
+        self.total_films_vendus += quantite
+        date_str = vente["date"].split(" ")[0] # Extraire la date de "YYYY-MM-DD HH:MM:SS"
+        self.par_jour[date_str] = self.par_jour.get(date_str, 0.0) + vente["revenu_total"]
+        if genre is not None:
+            self.par_genre[genre] = self.par_genre.get(genre, 0) + quantite
+        vendeur = vente.get("vendeur", "Inconnu")
+        self.par_vendeur[vendeur] = self.par_vendeur.get(vendeur, 0) + quantite
+
+    def ajouter_ventes(self, ventes, trouver_film):
+        """Ajoute une liste de ventes ; trouver_film(titre) retourne le film du catalogue, ou None."""
+        for vente in ventes:
+            film = trouver_film(vente["film"])
+            self.ajouter(vente, film.get("genre", "Inconnu") if film is not None else None)
+
+    def en_dict(self):
+        """Contenu enregistré dans le fichier JSON (copie : les agrégats peuvent changer pendant l'écriture)."""
+        return {
+            "total_revenu": self.total_revenu,
+            "nombre_ventes": self.nombre_ventes,
+            "total_films_vendus": self.total_films_vendus,
+            "par_jour": dict(self.par_jour),
+            "par_genre": dict(self.par_genre),
+            "par_vendeur": dict(self.par_vendeur),
+        }
+
+    def sauvegarder(self, donnees=None):
+        """Enregistre les agrégats (écriture atomique) ; donnees : résultat de en_dict() pris auparavant."""
+        stockage.ecrire_json_atomique(self.fichier, self.en_dict() if donnees is None else donnees)
+
+    @classmethod
+    def reconstruire(cls, ventes, trouver_film, fichier=None):
+        """Recalcule les agrégats à partir de toutes les ventes."""
+        agregats = cls(fichier)
+        agregats.ajouter_ventes(ventes, trouver_film)
+        return agregats
+
+    @classmethod
+    def charger(cls, ventes, trouver_film, fichier=None):
+        """Charge les agrégats enregistrés et y ajoute les ventes qui n'y sont pas encore.
+
+        ventes est un VentesColonnes ou une liste au format de ventes.json. Si le fichier est absent
+        ou illisible, ou si le revenu et la quantité des ventes déjà comptées ne correspondent plus,
+        les agrégats sont recalculés. Le fichier est réécrit s'il a changé.
+        """
+        agregats = cls(fichier)
+        try:
+            donnees, _ = stockage.lire_json(agregats.fichier, dict)
+        except stockage.FichierCorrompu:
+            donnees = {}
+        n = donnees.get("nombre_ventes", 0)
+        if donnees and n <= len(ventes) and cls._point_de_controle(ventes, n, donnees):
+            for champ in agregats.en_dict():
+                if champ in donnees:
+                    setattr(agregats, champ, donnees[champ])
+            nouvelles = ventes[n:] # Ventes ajoutées depuis le dernier enregistrement
+        else: # Agrégats absents ou ne correspondant plus à la liste des ventes
+            nouvelles = ventes
+        agregats.ajouter_ventes(nouvelles, trouver_film)
+        if nouvelles or not donnees:
+            agregats.sauvegarder()
+        return agregats
+
+    @staticmethod
+    def _point_de_controle(ventes, n, donnees):
+        """Indique si le revenu et la quantité des n premières ventes sont ceux des agrégats enregistrés."""
+        totaux = getattr(ventes, "totaux", None)
+        if totaux is not None: # VentesColonnes : sommes sur les colonnes
+            revenu, quantite = totaux(0, n)
+        else:
+            revenu = sum(vente["revenu_total"] for vente in ventes[:n])
+            quantite = sum(vente["quantite"] for vente in ventes[:n])
+        return (quantite == donnees.get("total_films_vendus")
+                and math.isclose(revenu, donnees.get("total_revenu", 0.0), rel_tol=1e-9, abs_tol=1e-6))
+
+    def differences(self, autre):
+        """Liste des champs dont la valeur diffère entre self et autre (revenus comparés à 1e-6 près)."""
+        def egaux(a, b):
+            if isinstance(a, dict) and isinstance(b, dict):
+                return a.keys() == b.keys() and all(egaux(a[k], b[k]) for k in a)
+            if isinstance(a, float) or isinstance(b, float):
+                return math.isclose(a, b, rel_tol=1e-9, abs_tol=1e-6)
+            return a == b
+        mien, sien = self.en_dict(), autre.en_dict()
+        return [champ for champ in mien if not egaux(mien[champ], sien[champ])]
+
+
+## MAIN ##
+def main(argv=None):
+    """Ligne de commande : python agregats_ventes.py verifier
+
+    Recalcule les agrégats à partir de ventes.json et du catalogue (complétés par le journal),
+    signale les différences avec agregats_ventes.json puis le réécrit.
+    """
+    parser = argparse.ArgumentParser(description="Vérification des agrégats des ventes.")
+    parser.add_argument("commande", choices=["verifier"], help="verifier : recalculer et comparer les agrégats")
+    args = parser.parse_args(argv)
+
+    ventes, _ = stockage.lire_json(get_json_path("ventes.json"))
+    catalogue, _ = stockage.lire_json(get_json_path("catalogue_films.json"))
+    journal.rejouer(catalogue=catalogue, ventes=ventes)
+    films = {film["titre"]: film for film in catalogue}
+
+    try:
+        donnees, _ = stockage.lire_json(get_json_path("agregats_ventes.json"), dict)
+    except stockage.FichierCorrompu:
+        donnees = {}
+    enregistres = AgregatsVentes()
+    for champ in enregistres.en_dict():
+        if champ in donnees:
+            setattr(enregistres, champ, donnees[champ])
+
+    recalcules = AgregatsVentes.reconstruire(ventes, films.get)
+    differences = enregistres.differences(recalcules)
+    if differences:
+        print("Agrégats différents du recalcul : " + ", ".join(differences))
+    else:
+        print(f"Agrégats corrects ({recalcules.nombre_ventes} ventes).")
+    recalcules.sauvegarder()
+    return 1 if differences else 0
+
+if __name__ == "__main__": # Si le script est exécuté en tant que programme principal
+    sys.exit(main())
@@ -0,0 +1,355 @@
+"""Mesure des opérations critiques de l'application sur des données synthétiques ; résultats écrits en JSON pour comparer les exécutions.
+
+Les données sont générées par donnees_synthetiques.py dans un dossier temporaire (jamais dans
+Fichiers_json/) ; chaque groupe de mesures correspond à une partie de l'application :
+chargement, filtres (apply_filters), affichage (display_films), analyse des ventes
+(afficher_analyse_ventes), notes (rate_film et leur écriture), recommandation, mémoire occupée
+par le catalogue et les utilisateurs.
+"""
+import argparse
+import gc
+import os
+import platform
+import queue
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+import donnees_synthetiques
+import enregistrements
+import journal
+import main as application
+import stockage
+import stockage_sqlite
+from agregats_ventes import AgregatsVentes
+from grille_films import GrilleFilms
+from index_catalogue import IndexCatalogue
+from recommandation import MoteurRecommandation
+from taches import Tache
+from ventes_colonnes import FORMAT_DATE, VentesColonnes
+
+# Nombre d'exécutions de chaque mesure (la médiane est retenue)
+REPETITIONS = 5
+# Nombre de requêtes, notes ou utilisateurs cibles par exécution
+NB_OPERATIONS = 20
+GROUPES = ["chargement", "filtres", "affichage", "analyse_ventes", "notes", "recommandation", "memoire"]
+
+
+def mesurer(fonction, repetitions=REPETITIONS, operations=1):
+    """Exécute fonction() repetitions fois ; retourne les durées (en secondes) minimale, médiane et moyenne.
+
+    operations est le nombre d'opérations faites par un appel : par_operation est la médiane
+    divisée par ce nombre.
+    """
+    durees = []
+    for _ in range(repetitions):
+        debut = time.perf_counter()
+        fonction()
+        durees.append(time.perf_counter() - debut)
+    mediane = statistics.median(durees)
+    return {"repetitions": repetitions, "operations": operations, "min": min(durees), "mediane": mediane,
+            "moyenne": statistics.fmean(durees), "par_operation": mediane / operations}
+
+
+class Banc:
+    """Données synthétiques chargées et mesures des opérations de l'application sur ces données."""
+    def __init__(self, dossier, repetitions=REPETITIONS, graine=0, executable=None): # Constructeur de la classe
+        self.dossier = dossier # Dossier contenant Fichiers_json/ (répertoire de travail du programme C)
+        self.donnees = os.path.join(dossier, "Fichiers_json")
+        self.repetitions = repetitions
+        self.rng = random.Random(graine) # Requêtes, notes et cibles tirées
+        self.executable = executable # Programme de recommandation externe (None : non mesuré)
+        self.catalogue = application.importer_catalogue(self.fichier("catalogue_films.json"))
+        self.index = IndexCatalogue(self.catalogue)
+        self.utilisateurs = application.charger_utilisateurs(self.fichier("ListeUtilisateurs.json"))
+        self.ventes = VentesColonnes.depuis_json(vente for vente, _ in stockage.iterer_json(self.fichier("ventes.json")))
+
+    def fichier(self, nom):
+        """Chemin d'un fichier des données synthétiques."""
+        return os.path.join(self.donnees, nom)
+
+    def mesurer(self, fonction, operations=1, repetitions=None):
+        return mesurer(fonction, repetitions or self.repetitions, operations)
+
+    def echantillon(self, elements, nombre=NB_OPERATIONS):
+        """nombre éléments tirés (avec remise) parmi elements."""
+        return [self.rng.choice(elements) for _ in range(nombre)] if elements else []
+
+    def executer(self, groupes):
+        """Exécute les groupes de mesures demandés ; retourne {groupe: {mesure: résultat}}."""
+        resultats = {}
+        for groupe in groupes:
+            print(f"{groupe}...", flush=True)
+            resultats[groupe] = getattr(self, "mesurer_" + groupe)()
+        return resultats
+
+    ## Groupes de mesures ##
+    def mesurer_chargement(self):
+        """Lecture des fichiers au démarrage et construction des index."""
+        return {
+            "catalogue_json": self.mesurer(lambda: application.importer_catalogue(self.fichier("catalogue_films.json"))),
+            "index_catalogue": self.mesurer(lambda: IndexCatalogue(self.catalogue)),
+            "utilisateurs_json": self.mesurer(lambda: application.charger_utilisateurs(self.fichier("ListeUtilisateurs.json"))),
+            "ventes_colonnes": self.mesurer(lambda: VentesColonnes.depuis_json(
+                vente for vente, _ in stockage.iterer_json(self.fichier("ventes.json")))),
+            "agregats_ventes": self.mesurer(lambda: AgregatsVentes.reconstruire(self.ventes, self.index.trouver)),
+        }
+
+    def mesurer_filtres(self):
+        """Recherches de apply_filters (IndexCatalogue.rechercher), comparées à un parcours de tout le catalogue."""
+        mots = self.echantillon([mot.lower() for mot in donnees_synthetiques.MOTS_TITRE])
+        genres = self.echantillon(sorted({film["genre"].lower() for film in self.catalogue}))
+        annees = self.echantillon(sorted({film["annee"] for film in self.catalogue}))
+        cotes = [self.rng.uniform(5, 9) for _ in range(NB_OPERATIONS)]
+
+        def parcours():
+            for genre, annee, cote in zip(genres, annees, cotes): # Filtrage sans index, comme avant IndexCatalogue
+                [f for f in self.catalogue if f["genre"].lower() == genre and f["annee"] == annee and f["cote"] >= cote]
+
+        n = NB_OPERATIONS
+        return {
+            "texte": self.mesurer(lambda: [self.index.rechercher(texte=m) for m in mots], n),
+            "genre": self.mesurer(lambda: [self.index.rechercher(genre=g) for g in genres], n),
+            "genre_annee_cote": self.mesurer(lambda: [self.index.rechercher(genre=g, annee=a, cote_min=c)
+                                                      for g, a, c in zip(genres, annees, cotes)], n),
+            "texte_tri_cote_page": self.mesurer(lambda: [self.index.rechercher(texte=m, tri="cote", decroissant=True, limite=50)
+                                                         for m in mots], n),
+            "parcours_lineaire": self.mesurer(parcours, n),
+        }
+
+    def mesurer_affichage(self):
+        """display_films : affichage du catalogue entier et d'une page de résultats dans la grille (nécessite un affichage)."""
+        import tkinter as tk
+        try:
+            root = tk.Tk()
+        except tk.TclError as e:
+            return {"grille": {"ignore": f"pas d'affichage disponible ({e})"}}
+        try:
+            root.geometry("1000x700")
+            canvas = tk.Canvas(root)
+            canvas.pack(side="left", fill="both", expand=True)
+            scrollbar = tk.Scrollbar(root, orient="vertical", command=canvas.yview)
+            scrollbar.pack(side="right", fill="y")
+            grille = GrilleFilms(canvas, scrollbar, ("Arial", 12), lambda film: "Pas noté", lambda film, label: None)
+            root.update()
+            page, _ = self.index.rechercher(tri="cote", decroissant=True, limite=50)
+
+            def afficher(films):
+                grille.afficher(films)
+                root.update_idletasks()
+
+            def defiler():
+                for position in range(NB_OPERATIONS):
+                    canvas.yview_moveto(position / NB_OPERATIONS)
+                    root.update_idletasks()
+
+            return {
+                "catalogue_entier": self.mesurer(lambda: afficher(self.catalogue)),
+                "page_resultats": self.mesurer(lambda: afficher(page)),
+                "defilement": self.mesurer(lambda: (afficher(self.catalogue), defiler()), NB_OPERATIONS),
+            }
+        finally:
+            root.destroy()
+
+    def mesurer_analyse_ventes(self):
+        """afficher_analyse_ventes : agrégats par intervalle et graphiques (rendus par Agg, sans fenêtre)."""
+        agregats = AgregatsVentes.reconstruire(self.ventes, self.index.trouver)
+        stocks = [(film["titre"], film["stock"]) for film in self.catalogue]
+        tache = Tache(queue.SimpleQueue(), None, None, None)
+        resultats = {}
+        if "matplotlib.figure" not in sys.modules: # Premier import (différé jusqu'à la première analyse)
+            resultats["import_matplotlib"] = self.mesurer(lambda: __import__("matplotlib.figure"), repetitions=1)
+        fin = self.ventes.vente(len(self.ventes) - 1)["date"] if len(self.ventes) else datetime.now().strftime(FORMAT_DATE)
+        debut_mois = (datetime.fromisoformat(fin) - timedelta(days=30)).strftime(FORMAT_DATE)
+        resultats.update({
+            "revenu_total": self.mesurer(lambda: self.ventes.revenu_total()),
+            "revenu_par_jour": self.mesurer(lambda: self.ventes.revenu_par_jour()),
+            "quantite_par_genre": self.mesurer(lambda: self.ventes.quantite_par_genre(self.index.trouver)),
+            "ventes_dernier_mois": self.mesurer(lambda: self.ventes.ventes_entre(debut_mois, fin)),
+            "graphiques": self.mesurer(lambda: application.generer_graphiques(
+                tache, agregats.par_jour, agregats.par_genre, agregats.par_vendeur, stocks), repetitions=1), # Plusieurs secondes dès quelques milliers de films
+        })
+        return resultats
+
+    def mesurer_notes(self):
+        """rate_film : mise à jour de l'index, écriture dans le journal ou dans SQLite, compaction des fichiers JSON."""
+        titres = self.echantillon([film["titre"] for film in self.catalogue])
+        noms = self.echantillon([u["username"] for u in self.utilisateurs])
+        valeurs = [self.rng.randint(0, 20) / 2 for _ in range(NB_OPERATIONS)]
+        evenements = [{"type": "note", "username": u, "film": t, "note": n} for u, t, n in zip(noms, titres, valeurs)]
+        fichier_journal = self.fichier("journal.jsonl")
+        copie_catalogue = self.fichier("catalogue_compaction.json")
+        shutil.copyfile(self.fichier("catalogue_films.json"), copie_catalogue)
+
+        def journaliser():
+            for evenement in evenements:
+                journal.ajouter_evenement(evenement, fichier_journal)
+
+        def compacter():
+            stockage.fichier_partage(copie_catalogue, "titre").sauvegarder(
+                self.catalogue, lambda c: journal.rejouer(catalogue=c, fichier=fichier_journal))
+
+        resultats = {
+            "index_noter": self.mesurer(lambda: [self.index.noter(e["film"], e["username"], e["note"]) for e in evenements],
+                                        NB_OPERATIONS),
+            "journal_note": self.mesurer(journaliser, NB_OPERATIONS),
+            "journal_lot": self.mesurer(lambda: journal.ajouter_evenements(evenements, fichier_journal), NB_OPERATIONS),
+            "compaction_catalogue": self.mesurer(compacter, repetitions=min(self.repetitions, 3)),
+        }
+        journal.vider(fichier_journal) # Le journal n'est pas relu par la migration SQLite
+
+        base = self.fichier("catalogue.db")
+        conn = stockage_sqlite.connecter(base)
+        try:
+            resultats["sqlite_migration"] = self.mesurer(lambda: stockage_sqlite.migrer_depuis_json(conn, self.donnees), repetitions=1)
+            resultats["sqlite_note"] = self.mesurer(lambda: [stockage_sqlite.appliquer_evenement(conn, e) for e in evenements],
+                                                    NB_OPERATIONS)
+        finally:
+            conn.close()
+        return resultats
+
+    def mesurer_recommandation(self):
+        """Moteur Python en mémoire et, s'il peut être lancé, programme externe (recommandation.exe)."""
+        cibles = self.echantillon([u["username"] for u in self.utilisateurs if u["notes"]])
+        moteur = MoteurRecommandation(self.utilisateurs)
+        positions = [moteur.index_nom[c] for c in cibles]
+        resultats = {
+            "moteur_construction": self.mesurer(lambda: MoteurRecommandation(self.utilisateurs)),
+            "plus_proche_voisin": self.mesurer(lambda: [moteur.recommander(c) for c in cibles], len(cibles) or 1),
+            "knn": self.mesurer(lambda: [moteur.recommander_knn(c, k=10, n=10) for c in cibles], len(cibles) or 1),
+            "table": self.mesurer(lambda: moteur.calculer_table(10, positions), len(cibles) or 1), # Matrice des notes avec NumPy
+        }
+        resultats["executable"] = self.mesurer_executable(cibles[:max(1, len(cibles) // 4)])
+        return resultats
+
+    def mesurer_executable(self, cibles):
+        """Un lancement du programme externe par cible, dans le dossier des données synthétiques."""
+        if not self.executable or not os.path.exists(self.executable):
+            return {"ignore": f"programme introuvable ({self.executable})"}
+
+        def lancer():
+            for cible in cibles:
+                stockage.ecrire_json_atomique(self.fichier("target_user.json"), {"target": cible}, indent=None)
+                processus = subprocess.run([self.executable], cwd=self.dossier, capture_output=True, text=True)
+                if processus.returncode != 0:
+                    raise RuntimeError(processus.stderr.strip() or f"code de retour {processus.returncode}")
+
+        try:
+            lancer() # Vérifier que le programme peut être lancé sur cette machine
+        except (OSError, RuntimeError) as e:
+            return {"ignore": f"échec du lancement de {self.executable} : {e}"}
+        return self.mesurer(lancer, len(cibles), repetitions=min(self.repetitions, 3))
+
+
+    def mesurer_memoire(self):
+        """Mémoire occupée par catalogue_films.json et ListeUtilisateurs.json chargés : dictionnaires JSON, puis enregistrements compacts."""
+        def occupee(charger):
+            gc.collect()
+            tracemalloc.start()
+            try:
+                donnees = charger() # Gardées jusqu'à la mesure
+                gc.collect()
+                octets = tracemalloc.get_traced_memory()[0]
+            finally:
+                tracemalloc.stop()
+            del donnees
+            return {"octets": octets, "par_film": octets / max(len(self.catalogue), 1)}
+
+        lire = lambda nom: stockage.lire_json(self.fichier(nom))[0]
+        return {
+            "dictionnaires": occupee(lambda: (lire("catalogue_films.json"), lire("ListeUtilisateurs.json"))),
+            "enregistrements": occupee(lambda: enregistrements.charger(lire("catalogue_films.json"), lire("ListeUtilisateurs.json"))),
+        }
+
+
+## Résultats ##
+def environnement():
+    """Machine et versions utilisées pour les mesures."""
+    try:
+        import numpy
+        version_numpy = numpy.__version__
+    except ImportError:
+        version_numpy = None
+    return {"python": platform.python_version(), "systeme": platform.platform(), "processeur": platform.processor(),
+            "coeurs": os.cpu_count(), "numpy": version_numpy}
+
+
+def comparer(ancien, nouveau):
+    """Lignes comparant la durée par opération de chaque mesure présente dans les deux résultats."""
+    lignes = []
+    for groupe, mesures in nouveau["resultats"].items():
+        for nom, mesure in mesures.items():
+            precedente = ancien.get("resultats", {}).get(groupe, {}).get(nom)
+            if not isinstance(precedente, dict) or "par_operation" not in precedente or "par_operation" not in mesure:
+                continue
+            avant, apres = precedente["par_operation"], mesure["par_operation"]
+            rapport = f"x{apres / avant:.2f}" if avant else "-"
+            lignes.append(f"{groupe + '.' + nom:<45} {avant * 1000:12.3f} ms -> {apres * 1000:12.3f} ms  {rapport}")
+    return lignes
+
+
+## MAIN ##
+def main(argv=None):
+    """Ligne de commande : python benchmark.py [--films N] [--utilisateurs N] [--notes N] [--ventes N] [--groupe G] [--comparer FICHIER]"""
+    parser = argparse.ArgumentParser(description="Mesure des opérations de l'application sur des données synthétiques.")
+    parser.add_argument("--films", type=int, default=1000, help="nombre de films (défaut 1000)")
+    parser.add_argument("--utilisateurs", type=int, default=1000, help="nombre d'utilisateurs (défaut 1000)")
+    parser.add_argument("--notes", type=int, default=20000, help="nombre de notes (défaut 20000)")
+    parser.add_argument("--ventes", type=int, default=10000, help="nombre de ventes (défaut 10000)")
+    parser.add_argument("--graine", type=int, default=0, help="graine des données et des requêtes (défaut 0)")
+    parser.add_argument("--repetitions", type=int, default=REPETITIONS, help=f"exécutions de chaque mesure (défaut {REPETITIONS})")
+    parser.add_argument("--groupe", action="append", choices=GROUPES, help="groupe de mesures à exécuter (plusieurs fois possible ; défaut : tous)")
+    parser.add_argument("--exe", default=application.get_project_path("recommandation.exe"),
+                        help="programme de recommandation externe à comparer au moteur Python (défaut recommandation.exe)")
+    parser.add_argument("--dossier", help="dossier où générer et garder les données (défaut : dossier temporaire supprimé à la fin)")
+    parser.add_argument("--sortie", help="fichier JSON des résultats (défaut benchmark-AAAAMMJJ-HHMMSS.json)")
+    parser.add_argument("--comparer", metavar="FICHIER", help="résultats d'une exécution précédente à comparer")
+    args = parser.parse_args(argv)
+
+    dossier = args.dossier or tempfile.mkdtemp(prefix="benchmark-")
+    debut = datetime.now()
+    try:
+        print("Génération des données...", flush=True)
+        tailles = donnees_synthetiques.generer_dossier(os.path.join(dossier, "Fichiers_json"), args.films, args.utilisateurs,
+                                                       args.notes, args.ventes, graine=args.graine)
+        banc = Banc(dossier, args.repetitions, args.graine, os.path.abspath(args.exe) if args.exe else None)
+        resultats = banc.executer(args.groupe or GROUPES)
+    finally:
+        if not args.dossier:
+            shutil.rmtree(dossier, ignore_errors=True)
+
+    rapport = {
+        "date": debut.strftime("%Y-%m-%d %H:%M:%S"),
+        "environnement": environnement(),
+        "parametres": {"films": args.films, "utilisateurs": args.utilisateurs, "notes": args.notes, "ventes": args.ventes,
+                       "graine": args.graine, "repetitions": args.repetitions, "operations": NB_OPERATIONS},
+        "donnees": tailles,
+        "resultats": resultats,
+    }
+    sortie = args.sortie or f"benchmark-{debut.strftime('%Y%m%d-%H%M%S')}.json"
+    stockage.ecrire_json_atomique(sortie, rapport)
+    for groupe, mesures in resultats.items():
+        for nom, mesure in mesures.items():
+            if "ignore" in mesure:
+                print(f"{groupe + '.' + nom:<45} ignoré : {mesure['ignore']}")
+            elif "par_operation" in mesure:
+                print(f"{groupe + '.' + nom:<45} {mesure['par_operation'] * 1000:12.3f} ms")
+            elif "octets" in mesure:
+                print(f"{groupe + '.' + nom:<45} {mesure['octets'] / 1024:12.0f} Ko")
+    print(f"Résultats écrits dans {sortie}")
+
+    if args.comparer:
+        ancien, _ = stockage.lire_json(args.comparer, dict)
+        print(f"Comparaison avec {args.comparer} ({ancien.get('date')}, {ancien.get('parametres')}) :")
+        print("\n".join(comparer(ancien, rapport)) or "aucune mesure commune")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,81 @@
+"""Client de l'API HTTP/JSON de service.py, utilisé par l'application Tk quand SERVICE_URL est défini."""
+import json
+from urllib.error import HTTPError, URLError
+from urllib.parse import quote, urlencode
+
+# Temps d'attente maximal (en secondes) d'une réponse du service
+DELAI_REPONSE = 30
+
+
+class ErreurService(Exception):
+    """Le service est injoignable ou a refusé la requête (message d'erreur du service)."""
+
+
+class Introuvable(ErreurService):
+    """Film ou utilisateur inexistant (réponse 404)."""
+
+
+class ClientService:
+    """Accès aux opérations du service (recherche, notes, ventes, statistiques, recommandations)."""
+    def __init__(self, url): # Constructeur de la classe
+        self.url = url.rstrip("/")
+
+    def requete(self, methode, chemin, parametres=None, corps=None):
+        """Envoie une requête et retourne la réponse JSON décodée."""
+        from urllib.request import Request, urlopen # Importé à la première requête (http.client ralentit le démarrage de main.py)
+        adresse = self.url + chemin
+        parametres = {cle: valeur for cle, valeur in (parametres or {}).items() if valeur is not None}
+        if parametres:
+            adresse += "?" + urlencode(parametres, quote_via=quote)
+        donnees = json.dumps(corps, ensure_ascii=False).encode("utf-8") if corps is not None else None
+        requete = Request(adresse, data=donnees, method=methode, headers={"Content-Type": "application/json"})
+        try:
+            with urlopen(requete, timeout=DELAI_REPONSE) as reponse:
+                return json.load(reponse)
+        except HTTPError as e:
+            try:
+                message = json.load(e).get("erreur", str(e))
+            except (ValueError, AttributeError):
+                message = str(e)
+            raise (Introuvable if e.code == 404 else ErreurService)(message) from e
+        except (URLError, OSError, ValueError) as e:
+            raise ErreurService(f"Service injoignable ({self.url}) : {e}") from e
+
+    def rechercher(self, **criteres):
+        """Retourne (films, total) ; critères de IndexCatalogue.rechercher (texte, genre, annee, cote_min, tri...)."""
+        if "decroissant" in criteres:
+            criteres["decroissant"] = "1" if criteres["decroissant"] else "0"
+        resultat = self.requete("GET", "/films", criteres)
+        return resultat["films"], resultat["total"]
+
+    def utilisateur(self, username):
+        """Utilisateur et ses notes, ou None s'il n'existe pas."""
+        try:
+            return self.requete("GET", "/utilisateur", {"username": username})
+        except Introuvable:
+            return None
+
+    def creer_utilisateur(self, username):
+        """Crée un utilisateur sans note et le retourne."""
+        return self.requete("POST", "/utilisateurs", corps={"username": username})
+
+    def noter(self, username, titre, note):
+        """Enregistre une note et retourne le film (cote recalculée)."""
+        return self.requete("POST", "/notes", corps={"username": username, "film": titre, "note": note})
+
+    def vendre(self, titre, quantite, vendeur):
+        """Enregistre une vente ; retourne (vente, stock restant)."""
+        resultat = self.requete("POST", "/ventes", corps={"film": titre, "quantite": quantite, "vendeur": vendeur})
+        return resultat["vente"], resultat["stock"]
+
+    def ventes(self, debut=None, fin=None):
+        """Ventes datées de debut (inclus) à fin (exclu)."""
+        return self.requete("GET", "/ventes", {"debut": debut, "fin": fin})["ventes"]
+
+    def statistiques(self):
+        """Statistiques du catalogue et agrégats des ventes."""
+        return self.requete("GET", "/statistiques")
+
+    def recommander(self, username, knn=0):
+        """Recommandations pour username (même format que recommendations.json)."""
+        return self.requete("GET", "/recommandations", {"username": username, "knn": knn or None})
@@ -0,0 +1,197 @@
+"""Données synthétiques aux formats de Fichiers_json/ (catalogue, utilisateurs et leurs notes, ventes), pour benchmark.py.
+
+La popularité des films et l'activité des utilisateurs et des vendeurs suivent une loi de Zipf :
+quelques films concentrent la plupart des notes et des ventes, comme dans un vrai catalogue. Les
+données sont déterminées par la graine ; catalogue et ventes sont écrits au fil de la génération.
+"""
+import argparse
+import itertools
+import json
+import os
+import random
+from datetime import datetime
+
+GENRES = ["Action", "Aventure", "Animation", "Comédie", "Crime", "Documentaire", "Drame", "Fantastique",
+          "Horreur", "Musical", "Policier", "Romance", "Sci-Fi", "Thriller", "Western"]
+MOTS_TITRE = ["Retour", "Ombre", "Nuit", "Dragon", "Cité", "Mémoire", "Étoile", "Voyage", "Secret", "Empire",
+              "Rivière", "Silence", "Tempête", "Jardin", "Horizon", "Miroir", "Légende", "Frontière", "Promesse", "Lumière",
+              "Dernier", "Premier", "Perdu", "Rouge", "Noir", "Sauvage", "Infini", "Caché", "Froid", "Doré"]
+PRENOMS = ["Alice", "Bob", "Charlie", "David", "Eve", "Frank", "Grace", "Hank", "Inès", "Jules",
+           "Karim", "Léa", "Manon", "Nora", "Oscar", "Paul", "Quentin", "Rose", "Samuel", "Uma"]
+PRIX = [5.0, 7.5, 10.0, 12.5, 15.0, 20.0]
+QUANTITES, POIDS_QUANTITES = [1, 2, 3, 4, 5], [60, 20, 10, 6, 4] # Quantité vendue : le plus souvent un exemplaire
+
+EXPOSANT_ZIPF = 1.0 # Le k-ième film (ou utilisateur) le plus populaire a un poids proportionnel à 1 / k^EXPOSANT_ZIPF
+DEBUT_VENTES = datetime(2020, 1, 1) # Date de la première vente
+DUREE_VENTES = 5 * 365 * 86400 # Période couverte par l'historique des ventes (en secondes)
+TAILLE_BLOC = 10000 # Nombre de tirages par appel à random.choices
+
+
+def poids_zipf(n, exposant=EXPOSANT_ZIPF):
+    """Poids cumulés d'une loi de Zipf sur n éléments (argument cum_weights de random.choices)."""
+    return list(itertools.accumulate(1.0 / (k + 1) ** exposant for k in range(n)))
+
+
+def tirages(rng, n, cumules, k):
+    """Génère k positions entre 0 et n - 1 tirées selon les poids cumulés (par blocs de TAILLE_BLOC)."""
+    population = range(n)
+    while k > 0:
+        bloc = min(k, TAILLE_BLOC)
+        yield from rng.choices(population, cum_weights=cumules, k=bloc)
+        k -= bloc
+
+
+def _melange(i):
+    """Entier pseudo-aléatoire déterminé par i (caractéristiques d'un film sans générateur par film)."""
+    return (i * 2654435761) % 4294967296
+
+
+def titre_film(i):
+    """Titre unique du film numéro i (des mots du vocabulaire reviennent d'un titre à l'autre, comme pour une vraie recherche)."""
+    h = _melange(i)
+    premier = h % len(MOTS_TITRE)
+    second = (premier + 1 + (h >> 8) % (len(MOTS_TITRE) - 1)) % len(MOTS_TITRE) # Jamais le même mot deux fois
+    return f"{MOTS_TITRE[premier]} {MOTS_TITRE[second].lower()} {i}"
+
+
+def qualite_film(i):
+    """Note moyenne visée pour le film numéro i (entre 4 et 9)."""
+    return 4 + (_melange(i) >> 12) % 1000 / 200
+
+
+def nom_utilisateur(u):
+    """Nom unique de l'utilisateur numéro u."""
+    return PRENOMS[u % len(PRENOMS)] + (str(u // len(PRENOMS)) if u >= len(PRENOMS) else "")
+
+
+def generer_notes(nb_films, nb_utilisateurs, nb_notes, graine=0):
+    """Tire environ nb_notes notes ; retourne une liste (par utilisateur) de dictionnaires numéro de film -> note.
+
+    Le nombre de notes de chaque utilisateur, puis les films qu'il note (distincts), sont tirés
+    selon une loi de Zipf. Un utilisateur ne note pas plus de la moitié du catalogue : avec un
+    catalogue très petit, il y a donc moins de nb_notes notes. Les notes sont des demi-points entre
+    0 et 10, autour de la qualité du film.
+    """
+    rng = random.Random(graine)
+    notes = [{} for _ in range(nb_utilisateurs)]
+    if not nb_films or not nb_utilisateurs:
+        return notes
+    nombres = [0] * nb_utilisateurs # Nombre de notes de chaque utilisateur
+    for u in tirages(rng, nb_utilisateurs, poids_zipf(nb_utilisateurs), nb_notes):
+        nombres[u] += 1
+    cumules = poids_zipf(nb_films)
+    maximum = max(nb_films // 2, 1)
+    for u, nombre in enumerate(nombres):
+        notes_utilisateur = notes[u]
+        nombre = min(nombre, maximum)
+        while len(notes_utilisateur) < nombre: # Tirer à nouveau les films déjà notés
+            for f in rng.choices(range(nb_films), cum_weights=cumules, k=nombre - len(notes_utilisateur)):
+                if f not in notes_utilisateur:
+                    note = round((qualite_film(f) + rng.gauss(0, 1.5)) * 2) / 2
+                    notes_utilisateur[f] = min(max(note, 0.0), 10.0)
+    return notes
+
+
+def iterer_catalogue(nb_films, notes):
+    """Génère les films du catalogue ; notes est le résultat de generer_notes."""
+    par_film = {} # numéro de film -> {username: note}
+    for u, notes_utilisateur in enumerate(notes):
+        username = nom_utilisateur(u)
+        for f, note in notes_utilisateur.items():
+            par_film.setdefault(f, {})[username] = note
+    for i in range(nb_films):
+        notes_film = par_film.pop(i, {})
+        h = _melange(i)
+        yield {
+            "titre": titre_film(i),
+            "genre": GENRES[(h >> 4) % len(GENRES)],
+            "annee": 1950 + (h >> 16) % 75,
+            "cote": round(sum(notes_film.values()) / len(notes_film), 2) if notes_film else 0,
+            "notes": notes_film,
+            "stock": (h >> 20) % 50,
+            "prix_unitaire": PRIX[(h >> 24) % len(PRIX)],
+        }
+
+
+def liste_utilisateurs(notes):
+    """Utilisateurs au format de ListeUtilisateurs.json ; notes est le résultat de generer_notes."""
+    return [{"user_id": u + 1, "username": nom_utilisateur(u),
+             "notes": {titre_film(f): note for f, note in notes_utilisateur.items()}}
+            for u, notes_utilisateur in enumerate(notes)]
+
+
+def iterer_ventes(nb_ventes, nb_films, nb_vendeurs, graine=0):
+    """Génère nb_ventes ventes par ordre chronologique, réparties sur DUREE_VENTES à partir de DEBUT_VENTES.
+
+    Films et vendeurs (les nb_vendeurs premiers utilisateurs) sont tirés selon une loi de Zipf.
+    """
+    if not nb_ventes or not nb_films or not nb_vendeurs:
+        return
+    rng = random.Random(graine + 1)
+    films = tirages(rng, nb_films, poids_zipf(nb_films), nb_ventes)
+    vendeurs = tirages(rng, nb_vendeurs, poids_zipf(nb_vendeurs), nb_ventes)
+    debut = DEBUT_VENTES.timestamp()
+    ecart_moyen = DUREE_VENTES / nb_ventes
+    instant = debut
+    for f, v in zip(films, vendeurs):
+        instant += rng.expovariate(1 / ecart_moyen)
+        quantite = rng.choices(QUANTITES, POIDS_QUANTITES)[0]
+        prix = PRIX[(_melange(f) >> 24) % len(PRIX)]
+        yield {
+            "date": datetime.fromtimestamp(instant).strftime("%Y-%m-%d %H:%M:%S"),
+            "film": titre_film(f),
+            "vendeur": nom_utilisateur(v),
+            "quantite": quantite,
+            "prix_unitaire": prix,
+            "revenu_total": quantite * prix,
+        }
+
+
+def ecrire_tableau_json(fichier, elements):
+    """Écrit un tableau JSON élément par élément (sans le garder en mémoire) ; retourne le nombre d'éléments."""
+    nombre = 0
+    with open(fichier, "w", encoding="utf-8") as f:
+        f.write("[")
+        for element in elements:
+            f.write(",\n" if nombre else "\n")
+            f.write(json.dumps(element, ensure_ascii=False))
+            nombre += 1
+        f.write("\n]\n")
+    return nombre
+
+
+def generer_dossier(dossier, nb_films, nb_utilisateurs, nb_notes, nb_ventes, nb_vendeurs=50, graine=0):
+    """Écrit catalogue_films.json, ListeUtilisateurs.json et ventes.json dans dossier ; retourne le nombre d'éléments de chaque fichier."""
+    os.makedirs(dossier, exist_ok=True)
+    notes = generer_notes(nb_films, nb_utilisateurs, nb_notes, graine)
+    tailles = {
+        "films": ecrire_tableau_json(os.path.join(dossier, "catalogue_films.json"), iterer_catalogue(nb_films, notes)),
+        "utilisateurs": ecrire_tableau_json(os.path.join(dossier, "ListeUtilisateurs.json"), liste_utilisateurs(notes)),
+        "notes": sum(len(n) for n in notes),
+    }
+    del notes
+    tailles["ventes"] = ecrire_tableau_json(os.path.join(dossier, "ventes.json"),
+                                            iterer_ventes(nb_ventes, nb_films, min(nb_vendeurs, nb_utilisateurs), graine))
+    return tailles
+
+
+## MAIN ##
+def main(argv=None):
+    """Ligne de commande : python donnees_synthetiques.py DOSSIER [--films N] [--utilisateurs N] [--notes N] [--ventes N]"""
+    parser = argparse.ArgumentParser(description="Génération de données synthétiques aux formats de Fichiers_json/.")
+    parser.add_argument("dossier", help="dossier où écrire les fichiers JSON (jamais Fichiers_json/ lui-même)")
+    parser.add_argument("--films", type=int, default=1000, help="nombre de films (défaut 1000)")
+    parser.add_argument("--utilisateurs", type=int, default=1000, help="nombre d'utilisateurs (défaut 1000)")
+    parser.add_argument("--notes", type=int, default=20000, help="nombre de notes tirées (défaut 20000)")
+    parser.add_argument("--ventes", type=int, default=10000, help="nombre de ventes (défaut 10000)")
+    parser.add_argument("--vendeurs", type=int, default=50, help="nombre de vendeurs parmi les utilisateurs (défaut 50)")
+    parser.add_argument("--graine", type=int, default=0, help="graine du générateur (mêmes données pour la même graine)")
+    args = parser.parse_args(argv)
+
+    tailles = generer_dossier(args.dossier, args.films, args.utilisateurs, args.notes, args.ventes, args.vendeurs, args.graine)
+    print(", ".join(f"{nombre} {nom}" for nom, nombre in tailles.items()) + f" écrits dans {args.dossier}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,536 @@
+"""Enregistrements compacts (__slots__) des films, utilisateurs et ventes, et magasin des notes partagé.
+
+Chaque note est rangée une seule fois dans NotesPartagees, sous des identifiants entiers de film et
+d'utilisateur : film["notes"] et utilisateur["notes"] en sont deux vues, au lieu de deux copies
+(catalogue_films.json et ListeUtilisateurs.json). Titres, genres et noms d'utilisateur sont internés.
+Les enregistrements s'utilisent comme les dictionnaires lus dans les fichiers JSON (film["titre"],
+film.get("stock", 0), "notes" in film) ; json_liste() les reconvertit au format des fichiers.
+
+Les deux fichiers gardent chacun leur copie des notes (format historique des fichiers JSON) :
+python enregistrements.py verifier signale leurs écarts, python enregistrements.py reparer les
+réécrit à partir d'une seule source.
+"""
+import argparse
+import os
+import sys
+from array import array
+from bisect import bisect_left
+from collections.abc import MutableMapping
+
+import journal
+import stockage
+
+# ========== CONFIGURATION DES CHEMINS ==========
+PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
+
+def get_json_path(filename):
+    """Retourne le chemin vers les fichiers JSON dans Fichiers_json/"""
+    return os.path.join(PROJECT_ROOT, "Fichiers_json", filename)
+
+# ========== FIN CONFIGURATION DES CHEMINS ==========
+
+# Écart maximal entre la cote d'un film et la moyenne de ses notes
+TOLERANCE_COTE = 1e-6
+# Nombre d'exemples affichés par type d'écart
+NB_EXEMPLES = 5
+
+_VIDE = () # Tableau des notes d'un film ou d'un utilisateur pas encore noté (remplacé par un array à la première note)
+_VALEURS = {} # (type, valeur) -> exemplaire unique des années et des prix
+
+
+def interner(chaine):
+    """Retourne l'exemplaire unique de la chaîne (les autres valeurs sont retournées telles quelles)."""
+    return sys.intern(chaine) if type(chaine) is str else chaine
+
+
+def partager(valeur):
+    """Retourne l'exemplaire unique d'une chaîne (internée) ou d'un nombre qui se répète d'un enregistrement à l'autre (année, prix)."""
+    if type(valeur) is str:
+        return sys.intern(valeur)
+    if type(valeur) not in (int, float):
+        return valeur
+    return _VALEURS.setdefault((type(valeur), valeur), valeur) # Le type dans la clé : 5 et 5.0 restent distincts
+
+
+## Notes ##
+class NotesPartagees:
+    """Notes de tous les utilisateurs sur tous les films, chacune rangée une seule fois.
+
+    Pour chaque film, evaluateurs[id_film] contient les identifiants des utilisateurs qui l'ont
+    noté, par ordre croissant (recherche par dichotomie), et valeurs[id_film] les notes
+    correspondantes. par_utilisateur[id_utilisateur] liste les films notés par l'utilisateur, dans
+    l'ordre des notes. Une note occupe ainsi 16 octets (trois tableaux array), contre deux entrées
+    de dictionnaire et deux flottants quand elle est copiée dans le catalogue et les utilisateurs ;
+    les tableaux ne sont créés qu'à la première note du film ou de l'utilisateur. La somme des notes
+    de chaque film est tenue à jour : sa moyenne (la cote) s'obtient en O(1).
+    Un film ou un utilisateur peut avoir des notes sans figurer dans le catalogue ou la liste des
+    utilisateurs : elles sont conservées telles quelles.
+    """
+    def __init__(self): # Constructeur de la classe
+        self.titres = [] # titres[id] = titre du film
+        self.id_titre = {} # titre -> identifiant entier
+        self.noms = [] # noms[id] = nom de l'utilisateur
+        self.id_nom = {} # username -> identifiant entier
+        self.evaluateurs = [] # evaluateurs[id_film] = array des id_utilisateur, triés
+        self.valeurs = [] # valeurs[id_film][i] = note de l'utilisateur evaluateurs[id_film][i]
+        self.par_utilisateur = [] # par_utilisateur[id_utilisateur] = array des id_film notés
+        self.sommes = array("d") # sommes[id_film] = somme des notes du film
+        self.nombre = 0 # Nombre de notes
+
+    def __len__(self):
+        return self.nombre
+
+    def id_film(self, titre):
+        """Retourne l'identifiant entier d'un titre (en l'ajoutant s'il est nouveau)."""
+        id_film = self.id_titre.get(titre)
+        if id_film is None: # Nouveau titre
+            id_film = len(self.titres)
+            self.id_titre[interner(titre)] = id_film
+            self.titres.append(interner(titre))
+            self.evaluateurs.append(_VIDE)
+            self.valeurs.append(_VIDE)
+            self.sommes.append(0.0)
+        return id_film
+
+    def id_utilisateur(self, username):
+        """Retourne l'identifiant entier d'un nom d'utilisateur (en l'ajoutant s'il est nouveau)."""
+        id_utilisateur = self.id_nom.get(username)
+        if id_utilisateur is None: # Nouvel utilisateur
+            id_utilisateur = len(self.noms)
+            self.id_nom[interner(username)] = id_utilisateur
+            self.noms.append(interner(username))
+            self.par_utilisateur.append(_VIDE)
+        return id_utilisateur
+
+    def position(self, id_film, id_utilisateur):
+        """Position de la note de l'utilisateur dans les tableaux du film, ou -1 s'il ne l'a pas noté."""
+        evaluateurs = self.evaluateurs[id_film]
+        i = bisect_left(evaluateurs, id_utilisateur)
+        return i if i < len(evaluateurs) and evaluateurs[i] == id_utilisateur else -1
+
+    def noter(self, titre, username, note):
+        """Enregistre (ou remplace) la note de username sur le film ; retourne True si le film n'était pas encore noté par lui."""
+        id_film = self.id_film(titre)
+        id_utilisateur = self.id_utilisateur(username)
+        i = self.position(id_film, id_utilisateur)
+        if i >= 0: # Note remplacée
+            self.sommes[id_film] += float(note) - self.valeurs[id_film][i]
+            self.valeurs[id_film][i] = float(note)
+            return False
+        if self.evaluateurs[id_film] is _VIDE: # Première note du film
+            self.evaluateurs[id_film], self.valeurs[id_film] = array("i"), array("d")
+        if self.par_utilisateur[id_utilisateur] is _VIDE: # Première note de l'utilisateur
+            self.par_utilisateur[id_utilisateur] = array("i")
+        i = bisect_left(self.evaluateurs[id_film], id_utilisateur)
+        self.evaluateurs[id_film].insert(i, id_utilisateur)
+        self.valeurs[id_film].insert(i, float(note))
+        self.sommes[id_film] += float(note)
+        self.par_utilisateur[id_utilisateur].append(id_film)
+        self.nombre += 1
+        return True
+
+    def note(self, titre, username, defaut=None):
+        """Note de username sur le film, ou defaut."""
+        id_film = self.id_titre.get(titre)
+        id_utilisateur = self.id_nom.get(username)
+        if id_film is None or id_utilisateur is None:
+            return defaut
+        i = self.position(id_film, id_utilisateur)
+        return self.valeurs[id_film][i] if i >= 0 else defaut
+
+    def supprimer(self, titre, username):
+        """Supprime la note de username sur le film (KeyError si elle n'existe pas)."""
+        id_film = self.id_titre.get(titre)
+        id_utilisateur = self.id_nom.get(username)
+        i = self.position(id_film, id_utilisateur) if id_film is not None and id_utilisateur is not None else -1
+        if i < 0:
+            raise KeyError((titre, username))
+        self.sommes[id_film] = self.sommes[id_film] - self.valeurs[id_film][i] if len(self.valeurs[id_film]) > 1 else 0.0
+        del self.evaluateurs[id_film][i]
+        del self.valeurs[id_film][i]
+        self.par_utilisateur[id_utilisateur].remove(id_film)
+        self.nombre -= 1
+
+    def moyenne(self, titre, defaut=None):
+        """Moyenne des notes du film (sa cote), ou defaut s'il n'a pas de note, en O(1)."""
+        id_film = self.id_titre.get(titre)
+        if id_film is None or not self.evaluateurs[id_film]:
+            return defaut
+        return self.sommes[id_film] / len(self.evaluateurs[id_film])
+
+    def notes_film(self, titre):
+        """Vue {username: note} des notes du film."""
+        return NotesFilm(self, self.id_film(titre))
+
+    def notes_utilisateur(self, username):
+        """Vue {titre: note} des notes de l'utilisateur."""
+        return NotesUtilisateur(self, self.id_utilisateur(username))
+
+    def utilisateurs(self):
+        """Utilisateurs {"username", "notes"} par ordre d'identifiant, notes en vues (entrée de MoteurRecommandation)."""
+        return [{"username": nom, "notes": NotesUtilisateur(self, id_utilisateur)} for id_utilisateur, nom in enumerate(self.noms)]
+
+    def copie(self):
+        """Copie indépendante des notes (tableaux recopiés), lisible dans un thread pendant que l'original est modifié."""
+        copie = NotesPartagees()
+        copie.titres, copie.id_titre = list(self.titres), dict(self.id_titre)
+        copie.noms, copie.id_nom = list(self.noms), dict(self.id_nom)
+        copie.evaluateurs = [t if t is _VIDE else t[:] for t in self.evaluateurs]
+        copie.valeurs = [t if t is _VIDE else t[:] for t in self.valeurs]
+        copie.par_utilisateur = [t if t is _VIDE else t[:] for t in self.par_utilisateur]
+        copie.sommes = self.sommes[:]
+        copie.nombre = self.nombre
+        return copie
+
+
+class NotesFilm(MutableMapping):
+    """Notes d'un film {username: note}, lues et modifiées dans NotesPartagees."""
+    __slots__ = ("partagees", "id")
+
+    def __init__(self, partagees, id_film): # Constructeur de la classe
+        self.partagees = partagees
+        self.id = id_film
+
+    def __getitem__(self, username):
+        note = self.partagees.note(self.partagees.titres[self.id], username)
+        if note is None:
+            raise KeyError(username)
+        return note
+
+    def __setitem__(self, username, note):
+        self.partagees.noter(self.partagees.titres[self.id], username, note)
+
+    def __delitem__(self, username):
+        self.partagees.supprimer(self.partagees.titres[self.id], username)
+
+    def __iter__(self):
+        noms = self.partagees.noms
+        return (noms[id_utilisateur] for id_utilisateur in list(self.partagees.evaluateurs[self.id]))
+
+    def __len__(self):
+        return len(self.partagees.evaluateurs[self.id])
+
+    def values(self):
+        return list(self.partagees.valeurs[self.id]) # Sans recherche par utilisateur
+
+    def moyenne(self, defaut=None):
+        """Moyenne des notes du film, tenue à jour à chaque note (voir journal.appliquer_note_film)."""
+        return self.partagees.moyenne(self.partagees.titres[self.id], defaut)
+
+    def __repr__(self):
+        return repr(dict(self))
+
+
+class NotesUtilisateur(MutableMapping):
+    """Notes d'un utilisateur {titre: note}, lues et modifiées dans NotesPartagees."""
+    __slots__ = ("partagees", "id")
+
+    def __init__(self, partagees, id_utilisateur): # Constructeur de la classe
+        self.partagees = partagees
+        self.id = id_utilisateur
+
+    def __getitem__(self, titre):
+        note = self.partagees.note(titre, self.partagees.noms[self.id])
+        if note is None:
+            raise KeyError(titre)
+        return note
+
+    def __setitem__(self, titre, note):
+        self.partagees.noter(titre, self.partagees.noms[self.id], note)
+
+    def __delitem__(self, titre):
+        self.partagees.supprimer(titre, self.partagees.noms[self.id])
+
+    def __iter__(self):
+        titres = self.partagees.titres
+        return (titres[id_film] for id_film in list(self.partagees.par_utilisateur[self.id]))
+
+    def __len__(self):
+        return len(self.partagees.par_utilisateur[self.id])
+
+    def __repr__(self):
+        return repr(dict(self))
+
+
+## Enregistrements ##
+class _Enregistrement:
+    """Base des enregistrements : accès par champ comme aux dictionnaires des fichiers JSON.
+
+    Un champ valant None est absent (film.get("stock", 0) retourne 0) ; les champs inconnus du
+    fichier JSON sont gardés dans autres pour être réécrits tels quels.
+    """
+    __slots__ = ("autres",)
+    CHAMPS = () # Champs rangés dans les slots, dans l'ordre des fichiers JSON
+    PARTAGES = () # Champs dont les valeurs sont partagées entre enregistrements (voir partager)
+
+    def __getitem__(self, cle):
+        if cle in self.CHAMPS:
+            valeur = getattr(self, cle)
+            if valeur is not None:
+                return valeur
+        elif self.autres is not None and cle in self.autres:
+            return self.autres[cle]
+        raise KeyError(cle)
+
+    def __setitem__(self, cle, valeur):
+        if cle in self.CHAMPS:
+            setattr(self, cle, partager(valeur) if cle in self.PARTAGES else valeur)
+        else:
+            if self.autres is None:
+                self.autres = {}
+            self.autres[cle] = valeur
+
+    def __contains__(self, cle):
+        try:
+            self[cle]
+        except KeyError:
+            return False
+        return True
+
+    def get(self, cle, defaut=None):
+        try:
+            return self[cle]
+        except KeyError:
+            return defaut
+
+    def keys(self):
+        """Champs présents, dans l'ordre des fichiers JSON."""
+        cles = [cle for cle in self.CHAMPS if getattr(self, cle) is not None]
+        return cles + list(self.autres or ())
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return len(self.keys())
+
+    def items(self):
+        return [(cle, self[cle]) for cle in self.keys()]
+
+    def vers_json(self):
+        """Dictionnaire au format du fichier JSON."""
+        return {cle: dict(valeur) if isinstance(valeur, MutableMapping) else valeur for cle, valeur in self.items()}
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.vers_json()!r})"
+
+    @classmethod
+    def _autres(cls, element):
+        """Champs de element inconnus de la classe (None s'il n'y en a pas)."""
+        return {cle: valeur for cle, valeur in element.items() if cle not in cls.CHAMPS} or None
+
+
+class Film(_Enregistrement):
+    """Film du catalogue ; ses notes sont une vue de NotesPartagees."""
+    __slots__ = ("titre", "genre", "annee", "cote", "notes", "stock", "prix_unitaire")
+    CHAMPS = ("titre", "genre", "annee", "cote", "notes", "stock", "prix_unitaire")
+    PARTAGES = ("titre", "genre", "annee", "prix_unitaire")
+
+    def __init__(self, titre, genre, annee, cote, notes, stock=None, prix_unitaire=None, autres=None): # Constructeur de la classe
+        self.titre = interner(titre)
+        self.genre = interner(genre)
+        self.annee = partager(annee)
+        self.cote = cote
+        self.notes = notes # NotesFilm
+        self.stock = stock
+        self.prix_unitaire = partager(prix_unitaire)
+        self.autres = autres
+
+    def __setitem__(self, cle, valeur):
+        if cle == "notes": # Remplacer les notes du film dans NotesPartagees
+            for username in list(self.notes):
+                if username not in valeur:
+                    del self.notes[username]
+            self.notes.update(valeur)
+        else:
+            _Enregistrement.__setitem__(self, cle, valeur)
+
+    @classmethod
+    def depuis_json(cls, element, notes, ecraser=True):
+        """Film d'un élément de catalogue_films.json ; ses notes sont ajoutées à notes (NotesPartagees).
+
+        Avec ecraser=False, une note déjà présente dans notes est gardée.
+        """
+        titre = element["titre"]
+        for username, note in (element.get("notes") or {}).items():
+            if ecraser or notes.note(titre, username) is None:
+                notes.noter(titre, username, note)
+        return cls(titre, element.get("genre"), element.get("annee"), element.get("cote"), notes.notes_film(titre),
+                   element.get("stock"), element.get("prix_unitaire"), cls._autres(element))
+
+
+class Utilisateur(_Enregistrement):
+    """Utilisateur de ListeUtilisateurs.json ; ses notes sont une vue de NotesPartagees."""
+    __slots__ = ("user_id", "username", "notes")
+    CHAMPS = ("user_id", "username", "notes")
+    PARTAGES = ("username",)
+
+    def __init__(self, user_id, username, notes, autres=None): # Constructeur de la classe
+        self.user_id = user_id
+        self.username = interner(username)
+        self.notes = notes # NotesUtilisateur
+        self.autres = autres
+
+    def __setitem__(self, cle, valeur):
+        if cle == "notes": # Remplacer les notes de l'utilisateur dans NotesPartagees
+            for titre in list(self.notes):
+                if titre not in valeur:
+                    del self.notes[titre]
+            self.notes.update(valeur)
+        else:
+            _Enregistrement.__setitem__(self, cle, valeur)
+
+    @classmethod
+    def depuis_json(cls, element, notes):
+        """Utilisateur d'un élément de ListeUtilisateurs.json ; ses notes sont ajoutées à notes (NotesPartagees)."""
+        username = element["username"]
+        for titre, note in (element.get("notes") or {}).items():
+            notes.noter(titre, username, note)
+        return cls(element.get("user_id"), username, notes.notes_utilisateur(username), cls._autres(element))
+
+
+class Vente(_Enregistrement):
+    """Vente de ventes.json."""
+    __slots__ = ("date", "film", "vendeur", "quantite", "prix_unitaire", "revenu_total")
+    CHAMPS = ("date", "film", "vendeur", "quantite", "prix_unitaire", "revenu_total")
+    PARTAGES = ("film", "vendeur", "quantite", "prix_unitaire", "revenu_total")
+
+    def __init__(self, date, film, vendeur, quantite, prix_unitaire, revenu_total, autres=None): # Constructeur de la classe
+        self.date = date
+        self.film = interner(film)
+        self.vendeur = interner(vendeur)
+        self.quantite = partager(quantite)
+        self.prix_unitaire = partager(prix_unitaire)
+        self.revenu_total = partager(revenu_total)
+        self.autres = autres
+
+    @classmethod
+    def depuis_json(cls, element):
+        """Vente d'un élément de ventes.json."""
+        return cls(element.get("date"), element.get("film"), element.get("vendeur"), element.get("quantite"),
+                   element.get("prix_unitaire"), element.get("revenu_total"), cls._autres(element))
+
+
+## Conversions ##
+def charger(catalogue, utilisateurs, notes=None):
+    """Convertit catalogue_films.json et ListeUtilisateurs.json ; retourne (films, utilisateurs, notes).
+
+    Une note présente dans les deux fichiers n'est gardée qu'une fois : en cas de désaccord, celle
+    de ListeUtilisateurs.json l'emporte (comme stockage_sqlite.migrer_depuis_json), et les notes de chaque
+    utilisateur gardent l'ordre du fichier. Les cotes du catalogue sont gardées telles quelles.
+    """
+    notes = notes if notes is not None else NotesPartagees()
+    utilisateurs = [Utilisateur.depuis_json(element, notes) for element in utilisateurs]
+    return [Film.depuis_json(element, notes, ecraser=False) for element in catalogue], utilisateurs, notes
+
+
+def json_liste(enregistrements):
+    """Liste d'enregistrements (films, utilisateurs ou ventes) au format des fichiers JSON ; les dictionnaires sont gardés tels quels."""
+    return [e.vers_json() if isinstance(e, _Enregistrement) else e for e in enregistrements]
+
+
+def json_defaut(objet):
+    """Argument default de json.dump : enregistrements et vues de notes sont écrits comme des dictionnaires."""
+    if isinstance(objet, _Enregistrement):
+        return objet.vers_json()
+    if isinstance(objet, (NotesFilm, NotesUtilisateur)):
+        return dict(objet)
+    raise TypeError(f"Object of type {type(objet).__name__} is not JSON serializable")
+
+
+## Cohérence des fichiers ##
+def verifier_notes(catalogue, utilisateurs):
+    """Compare les notes de catalogue_films.json à celles de ListeUtilisateurs.json, et les cotes aux moyennes des notes.
+
+    Retourne {type d'écart: liste d'exemples}. Les notes d'un utilisateur sur un film absent du
+    catalogue (film retiré) ne sont pas des écarts ; un film sans note garde la cote saisie.
+    """
+    par_nom = {u["username"]: u.get("notes") or {} for u in utilisateurs}
+    ecarts = {"absentes_utilisateurs": [], "absentes_catalogue": [], "differentes": [], "cotes": []}
+    titres = set()
+    for film in catalogue:
+        titre, notes_film = film["titre"], film.get("notes") or {}
+        titres.add(titre)
+        for username, note in notes_film.items():
+            notes_utilisateur = par_nom.get(username, {})
+            if titre not in notes_utilisateur:
+                ecarts["absentes_utilisateurs"].append(f"{username} / {titre}")
+            elif float(notes_utilisateur[titre]) != float(note):
+                ecarts["differentes"].append(f"{username} / {titre} : {note} dans le catalogue, {notes_utilisateur[titre]} pour l'utilisateur")
+        if notes_film:
+            moyenne = sum(notes_film.values()) / len(notes_film)
+            if abs(film.get("cote", 0) - moyenne) > TOLERANCE_COTE:
+                ecarts["cotes"].append(f"{titre} : cote {film.get('cote')}, moyenne des notes {moyenne:.4f}")
+    notes_catalogue = {film["titre"]: film.get("notes") or {} for film in catalogue}
+    for username, notes_utilisateur in par_nom.items():
+        for titre in notes_utilisateur:
+            if titre in titres and username not in notes_catalogue[titre]:
+                ecarts["absentes_catalogue"].append(f"{username} / {titre}")
+    return ecarts
+
+
+def reparer_notes(catalogue, utilisateurs):
+    """Remplace les notes des deux listes par une seule source (charger()) et recalcule les cotes, en place.
+
+    La note de ListeUtilisateurs.json l'emporte en cas de désaccord (comme la migration SQLite) ;
+    un utilisateur qui n'a noté que dans le catalogue est ajouté à la liste des utilisateurs.
+    """
+    films, liste, notes = charger(catalogue, utilisateurs)
+    connus = {u.username for u in liste}
+    prochain_id = max((u.user_id for u in liste if isinstance(u.user_id, int)), default=0) + 1
+    for username in notes.noms:
+        if username not in connus and notes.notes_utilisateur(username):
+            liste.append(Utilisateur(prochain_id, username, notes.notes_utilisateur(username)))
+            prochain_id += 1
+    for film in films:
+        film.cote = film.notes.moyenne(film.cote) # Film sans note : cote inchangée
+    catalogue[:] = json_liste(films)
+    utilisateurs[:] = json_liste(liste)
+
+
+## MAIN ##
+LIBELLES = {
+    "absentes_utilisateurs": "notes du catalogue absentes de ListeUtilisateurs.json",
+    "absentes_catalogue": "notes de ListeUtilisateurs.json absentes du catalogue",
+    "differentes": "notes différentes dans les deux fichiers",
+    "cotes": "cotes différentes de la moyenne des notes",
+}
+
+
+def main(argv=None):
+    """Ligne de commande : python enregistrements.py verifier|reparer
+
+    Lit catalogue_films.json et ListeUtilisateurs.json (complétés par le journal) et signale les
+    écarts entre leurs notes ; reparer réécrit les deux fichiers à partir d'une seule source (les
+    événements du journal restent rejouables). Stockage JSON uniquement : la base SQLite range
+    chaque note une seule fois.
+    """
+    parser = argparse.ArgumentParser(description="Cohérence des notes de catalogue_films.json et ListeUtilisateurs.json.")
+    parser.add_argument("commande", choices=["verifier", "reparer"],
+                        help="verifier : signaler les écarts ; reparer : réécrire les deux fichiers sans écart")
+    args = parser.parse_args(argv)
+
+    fichier_catalogue = get_json_path("catalogue_films.json")
+    fichier_utilisateurs = get_json_path("ListeUtilisateurs.json")
+    with stockage.verrou(journal.chemin_journal()), stockage.verrou(fichier_catalogue), stockage.verrou(fichier_utilisateurs):
+        catalogue, _ = stockage.lire_json(fichier_catalogue)
+        utilisateurs, _ = stockage.lire_json(fichier_utilisateurs)
+        journal.rejouer(catalogue=catalogue, utilisateurs=utilisateurs)
+        ecarts = verifier_notes(catalogue, utilisateurs)
+        for type_ecart, exemples in ecarts.items():
+            if exemples:
+                print(f"{len(exemples)} {LIBELLES[type_ecart]} (ex. : {' ; '.join(exemples[:NB_EXEMPLES])})")
+        if not any(ecarts.values()):
+            print(f"Notes cohérentes ({len(catalogue)} films, {len(utilisateurs)} utilisateurs).")
+            return 0
+        if args.commande == "verifier":
+            return 1
+        reparer_notes(catalogue, utilisateurs)
+        stockage.ecrire_json_atomique(fichier_catalogue, catalogue)
+        stockage.ecrire_json_atomique(fichier_utilisateurs, utilisateurs)
+    print("catalogue_films.json et ListeUtilisateurs.json réparés.")
+    return 0
+
+
+if __name__ == "__main__": # Si le script est exécuté en tant que programme principal
+    sys.exit(main())
@@ -0,0 +1,122 @@
+"""Grille de films virtualisée : seules les cartes des lignes visibles du canvas existent, et elles sont réutilisées au défilement."""
+import tkinter as tk
+
+from index_catalogue import cote
+
+COLONNES = 4 # Nombre de colonnes
+LARGEUR_CARTE = 220 # Dimensions d'une carte de film
+HAUTEUR_CARTE = 250
+MARGE = 10 # Espace autour de chaque carte
+LARGEUR_CASE = LARGEUR_CARTE + 2 * MARGE # Dimensions d'une case de la grille
+HAUTEUR_CASE = HAUTEUR_CARTE + 2 * MARGE
+LIGNES_SUPPLEMENTAIRES = 1 # Lignes préparées au-dessus et au-dessous de la zone visible
+
+
+class CarteFilm:
+    """Carte affichant un film (titre, informations, note de l'utilisateur, bouton de notation)."""
+    def __init__(self, canvas, police, noter): # Constructeur de la classe
+        self.film = None # Film affiché
+        self.frame = tk.Frame(canvas, bg="white", bd=2, relief="groove", width=LARGEUR_CARTE, height=HAUTEUR_CARTE) # Cadre de la carte
+        self.frame.pack_propagate(False) # Empêcher le cadre de changer de taille
+        self.item = canvas.create_window(0, 0, window=self.frame, anchor="nw", state="hidden") # Position dans le canvas
+
+        self.title_label = tk.Label(self.frame, font=("Arial", 12, "bold"), bg="white", wraplength=200) # Titre du film
+        self.title_label.pack(pady=5)
+
+        info_frame = tk.Frame(self.frame, bg="white") # Cadre pour les informations du film
+        info_frame.pack(pady=5)
+        self.genre_label = tk.Label(info_frame, font=police, bg="white", anchor="w") # Genre
+        self.annee_label = tk.Label(info_frame, font=police, bg="white", anchor="w") # Année
+        self.cote_label = tk.Label(info_frame, font=police, bg="white", anchor="w") # Cote
+        self.stock_label = tk.Label(info_frame, font=("Arial", 10, "italic"), bg="white", anchor="w") # Stock
+        self.prix_label = tk.Label(info_frame, font=("Arial", 10, "italic"), bg="white", anchor="w") # Prix
+        for label in (self.genre_label, self.annee_label, self.cote_label, self.stock_label, self.prix_label):
+            label.pack(anchor="w")
+
+        self.rating_label = tk.Label(self.frame, font=("Arial", 12, "italic"), bg="white") # Note de l'utilisateur
+        self.rating_label.pack(pady=5)
+
+        note_btn = tk.Button(self.frame, text="Attribuer note", command=lambda: noter(self.film, self.rating_label),
+                             bg="#007ACC", fg="white", font=police) # Bouton pour noter le film affiché
+        note_btn.pack(pady=5)
+
+    def remplir(self, film, note_utilisateur):
+        """Affiche les informations du film dans la carte (sans recréer de widget)."""
+        self.film = film
+        self.title_label.config(text=film["titre"])
+        self.genre_label.config(text=f"Genre : {film['genre']}")
+        self.annee_label.config(text=f"Année : {film['annee']}")
+        self.cote_label.config(text=f"Cote : {cote(film)}")
+        self.stock_label.config(text=f"Stock : {film['stock']}")
+        self.prix_label.config(text=f"Prix : {film['prix_unitaire']} €")
+        self.rating_label.config(text=f"Votre note : {note_utilisateur}")
+
+
+class GrilleFilms:
+    """Grille de cartes de films dans un canvas défilant.
+
+    La zone de défilement couvre tous les films, mais seules les cartes des lignes visibles (plus
+    LIGNES_SUPPLEMENTAIRES de chaque côté) sont placées ; les cartes qui sortent de la zone visible
+    sont masquées et réutilisées pour les films qui y entrent.
+    """
+    def __init__(self, canvas, scrollbar, police, note_utilisateur, noter): # Constructeur de la classe
+        self.canvas = canvas
+        self.scrollbar = scrollbar
+        self.police = police # Police des informations et du bouton
+        self.note_utilisateur = note_utilisateur # note_utilisateur(film) -> texte de la note de l'utilisateur connecté
+        self.noter = noter # noter(film, label) : action du bouton "Attribuer note"
+        self.films = [] # Films affichés, dans l'ordre
+        self.cartes = {} # position dans films -> carte placée
+        self.libres = [] # Cartes masquées, prêtes à être réutilisées
+
+        self.canvas.configure(yscrollcommand=self._defilement) # Redessiner à chaque déplacement de la vue
+        self.canvas.bind("<Configure>", lambda e: self.rafraichir()) # Redessiner quand la fenêtre change de taille
+
+    def _defilement(self, debut, fin):
+        """Met à jour la barre de défilement et les cartes visibles."""
+        self.scrollbar.set(debut, fin)
+        self.rafraichir()
+
+    def afficher(self, films):
+        """Affiche une nouvelle liste de films."""
+        self.films = list(films)
+        for carte in self.cartes.values(): # Les cartes seront réattribuées par rafraichir
+            self._liberer(carte)
+        self.cartes = {}
+        lignes = (len(self.films) + COLONNES - 1) // COLONNES
+        self.canvas.configure(scrollregion=(0, 0, COLONNES * LARGEUR_CASE, lignes * HAUTEUR_CASE))
+        if self.canvas.canvasy(0) >= lignes * HAUTEUR_CASE: # Liste plus courte que la position actuelle
+            self.canvas.yview_moveto(0)
+        self.rafraichir()
+
+    def _liberer(self, carte):
+        """Masque une carte et la remet dans la réserve."""
+        self.canvas.itemconfigure(carte.item, state="hidden")
+        carte.film = None
+        self.libres.append(carte)
+
+    def rafraichir(self):
+        """Place des cartes sur les lignes visibles et libère celles qui ne le sont plus."""
+        haut = self.canvas.canvasy(0) # Ordonnée du haut de la zone visible
+        hauteur = max(self.canvas.winfo_height(), 1)
+        premiere = max(int(haut // HAUTEUR_CASE) - LIGNES_SUPPLEMENTAIRES, 0)
+        derniere = int((haut + hauteur) // HAUTEUR_CASE) + LIGNES_SUPPLEMENTAIRES
+        visibles = range(premiere * COLONNES, min((derniere + 1) * COLONNES, len(self.films)))
+
+        for i in [i for i in self.cartes if i not in visibles]: # Cartes sorties de la zone visible
+            self._liberer(self.cartes.pop(i))
+        for i in visibles:
+            if i in self.cartes:
+                continue
+            carte = self.libres.pop() if self.libres else CarteFilm(self.canvas, self.police, self.noter)
+            ligne, colonne = divmod(i, COLONNES)
+            self.canvas.coords(carte.item, colonne * LARGEUR_CASE + MARGE, ligne * HAUTEUR_CASE + MARGE)
+            carte.remplir(self.films[i], self.note_utilisateur(self.films[i]))
+            self.canvas.itemconfigure(carte.item, state="normal")
+            self.cartes[i] = carte
+
+    def mettre_a_jour(self, film):
+        """Met à jour la carte du film s'il est visible (après une note ou une vente)."""
+        for carte in self.cartes.values():
+            if carte.film is film:
+                carte.remplir(film, self.note_utilisateur(film))
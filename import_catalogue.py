@@ -0,0 +1,103 @@
+"""Import d'un catalogue JSON au fil de la lecture : les films sont validés, normalisés et indexés par lots."""
+import os
+
+import stockage
+from enregistrements import Film, NotesPartagees
+from index_catalogue import IndexCatalogue
+
+# Nombre de films lus et indexés par lot
+TAILLE_LOT = 2000
+
+
+def normaliser_film(element):
+    """Retourne le film lu sous la forme attendue par l'application ; lève ValueError s'il est invalide.
+
+    Les champs absents reçoivent une valeur par défaut (notes vides, stock 0...) ; une cote absente
+    est la moyenne des notes.
+    """
+    if not isinstance(element, dict):
+        raise ValueError("un film doit être un objet JSON")
+    titre = element.get("titre")
+    if not isinstance(titre, str) or not titre.strip():
+        raise ValueError("titre manquant")
+    notes = element.get("notes") or {}
+    if not isinstance(notes, dict):
+        raise ValueError(f"notes invalides pour {titre}")
+    film = dict(element)
+    film["titre"] = titre.strip()
+    film["genre"] = str(element.get("genre") or "Inconnu")
+    film["annee"] = int(element.get("annee") or 0)
+    film["notes"] = {str(username): float(note) for username, note in notes.items()}
+    if element.get("cote") is not None:
+        film["cote"] = float(element["cote"])
+    else: # Cote = moyenne des notes
+        film["cote"] = sum(film["notes"].values()) / len(film["notes"]) if film["notes"] else 0
+    film["stock"] = int(element.get("stock") or 0)
+    film["prix_unitaire"] = float(element.get("prix_unitaire") or 0.0)
+    return film
+
+
+class ImportCatalogue:
+    """Lecture d'un fichier catalogue par lots de taille_lot films, qui alimentent un nouvel IndexCatalogue.
+
+    Chaque appel à lot() lit, normalise et indexe les films suivants : l'appelant peut afficher la
+    progression entre deux lots ou annuler l'import. Les films invalides ou dont le titre a déjà
+    été lu sont ignorés et comptés dans rejetes. Les films importés sont des enregistrements.Film
+    dont les notes sont rangées dans notes (propres à l'import : l'annuler ne touche pas au catalogue).
+
+    notes : NotesPartagees qui reçoit les notes des films importés (par défaut un magasin vide) ; une
+    note déjà présente y est gardée, comme celles de ListeUtilisateurs.json dans enregistrements.charger.
+    """
+    def __init__(self, fichier, taille_lot=TAILLE_LOT, notes=None): # Constructeur de la classe
+        self.fichier = fichier
+        self.taille_lot = taille_lot
+        self.taille = os.path.getsize(fichier) # Taille du fichier (FileNotFoundError s'il n'existe pas)
+        self.octets_lus = 0
+        self.index = IndexCatalogue([]) # Catalogue importé
+        self.notes = notes if notes is not None else NotesPartagees() # Notes des films importés
+        self.rejetes = 0 # Nombre d'éléments ignorés
+        self.termine = False
+        self.annule = False
+        self._elements = stockage.iterer_json(fichier)
+
+    @property
+    def progression(self):
+        """Fraction du fichier déjà lue (entre 0 et 1)."""
+        return 1.0 if self.termine or not self.taille else min(self.octets_lus / self.taille, 1.0)
+
+    def lot(self):
+        """Lit et indexe le lot suivant ; retourne le nombre de films ajoutés (stockage.FichierCorrompu si le fichier est invalide)."""
+        if self.termine or self.annule:
+            return 0
+        films, titres = [], set() # Films du lot et leurs titres
+        for _ in range(self.taille_lot):
+            suivant = next(self._elements, None)
+            if suivant is None: # Fin du tableau
+                self.termine = True
+                break
+            element, self.octets_lus = suivant
+            try:
+                film = normaliser_film(element)
+            except (ValueError, TypeError, OverflowError):
+                self.rejetes += 1
+                continue
+            if film["titre"] in titres or self.index.trouver(film["titre"]) is not None:
+                self.rejetes += 1 # Titre en double : le premier film est gardé
+                continue
+            films.append(Film.depuis_json(film, self.notes, ecraser=False))
+            titres.add(film["titre"])
+        self.index.ajouter_lot(films)
+        return len(films)
+
+    def annuler(self):
+        """Arrête l'import et ferme le fichier ; les films déjà lus sont abandonnés."""
+        self.annule = True
+        self._elements.close()
+
+    def executer(self, progression=None):
+        """Importe tout le fichier ; progression(fraction) est appelée après chaque lot. Retourne l'index."""
+        while not self.termine and not self.annule:
+            self.lot()
+            if progression is not None:
+                progression(self.progression)
+        return self.index
@@ -0,0 +1,242 @@
+"""Index en mémoire du catalogue de films : titre -> film, films par genre et par année, films triés par cote et par titre."""
+from bisect import bisect_left
+
+import journal
+
+# Longueur maximale des n-grammes de titre indexés pour la recherche par sous-chaîne
+N_GRAMME = 3
+
+def cote(film):
+    """Cote du film (0 si elle est absente ou None, par exemple un Film sans cote)."""
+    return film.get("cote") or 0
+
+
+# Clés de tri de rechercher()
+CLES_TRI = {
+    "titre": lambda film: film["titre"].lower(),
+    "annee": lambda film: film["annee"],
+    "cote": cote,
+}
+
+
+def ngrammes(texte):
+    """Ensemble des sous-chaînes de texte de longueur 1 à N_GRAMME."""
+    return {texte[i:i + n] for n in range(1, N_GRAMME + 1) for i in range(len(texte) - n + 1)}
+
+
+class IndexCatalogue:
+    """Liste des films du catalogue et index associés, mis à jour à chaque ajout, note ou vente.
+
+    films est la liste du catalogue (même format que catalogue_films.json) : elle garde l'ordre
+    d'affichage choisi par trier(). Les films ne doivent être ajoutés, notés ou vendus qu'à travers
+    l'index pour qu'il reste à jour.
+    """
+    def __init__(self, films): # Constructeur de la classe
+        self.films = films # Liste du catalogue (modifiée en place)
+        self.par_titre = {} # titre -> film
+        self.par_genre = {} # genre en minuscules -> films
+        self.par_annee = {} # année -> films
+        self.cotes = [] # Cotes triées par ordre croissant
+        self.films_par_cote = [] # films_par_cote[i] a pour cote cotes[i]
+        self.titres = [] # Titres en minuscules, triés (recherche par préfixe)
+        self.films_par_titre = [] # films_par_titre[i] a pour titre titres[i]
+        self.par_ngramme = {} # n-gramme du titre en minuscules -> films (recherche par sous-chaîne)
+        self.rang = {} # id(film) -> position dans films (ordre d'affichage)
+        self.a_trier = True # Index triés (cotes, titres) à reconstruire avant usage
+        for film in films:
+            self._indexer(film)
+        self._numeroter()
+
+    def _indexer(self, film):
+        """Ajoute le film aux index (sans toucher à la liste films)."""
+        if "notes" not in film: # S'assurer que le champ "notes" existe
+            film["notes"] = {}
+        self.par_titre[film["titre"]] = film
+        self.par_genre.setdefault(film["genre"].lower(), []).append(film)
+        self.par_annee.setdefault(film["annee"], []).append(film)
+        if not self.a_trier: # Sinon, le film sera placé à la reconstruction des index triés
+            i = bisect_left(self.cotes, cote(film))
+            self.cotes.insert(i, cote(film))
+            self.films_par_cote.insert(i, film)
+            titre = film["titre"].lower()
+            i = bisect_left(self.titres, titre)
+            self.titres.insert(i, titre)
+            self.films_par_titre.insert(i, film)
+        for gramme in ngrammes(film["titre"].lower()):
+            self.par_ngramme.setdefault(gramme, []).append(film)
+
+    def _retirer(self, film):
+        """Retire le film de la liste films et de tous les index (avant de le remplacer par un film de même titre)."""
+        def retirer_de(liste):
+            for i, autre in enumerate(liste):
+                if autre is film:
+                    del liste[i]
+                    return
+
+        del self.par_titre[film["titre"]]
+        retirer_de(self.par_genre.get(film["genre"].lower(), []))
+        retirer_de(self.par_annee.get(film["annee"], []))
+        for gramme in ngrammes(film["titre"].lower()):
+            retirer_de(self.par_ngramme.get(gramme, []))
+        if not self.a_trier:
+            i = bisect_left(self.cotes, cote(film))
+            while self.films_par_cote[i] is not film: # Films de même cote : chercher le bon
+                i += 1
+            del self.cotes[i]
+            del self.films_par_cote[i]
+            i = bisect_left(self.titres, film["titre"].lower())
+            while self.films_par_titre[i] is not film: # Titres identiques à la casse près
+                i += 1
+            del self.titres[i]
+            del self.films_par_titre[i]
+        retirer_de(self.films)
+        self._numeroter()
+
+    def _index_tries(self):
+        """Reconstruit les index triés par cote et par titre s'ils ne sont plus à jour (un seul tri par lot ajouté)."""
+        if self.a_trier:
+            self.films_par_cote = sorted(self.films, key=CLES_TRI["cote"]) # Tri stable : ordre d'ajout à cote égale
+            self.cotes = [cote(film) for film in self.films_par_cote]
+            self.films_par_titre = sorted(self.films, key=CLES_TRI["titre"])
+            self.titres = [film["titre"].lower() for film in self.films_par_titre]
+            self.a_trier = False
+
+    def _numeroter(self):
+        """Recalcule la position de chaque film dans la liste films."""
+        self.rang = {id(film): i for i, film in enumerate(self.films)}
+
+    def __len__(self):
+        return len(self.films)
+
+    def __iter__(self):
+        return iter(self.films)
+
+    def trouver(self, titre):
+        """Retourne le film portant ce titre, ou None."""
+        return self.par_titre.get(titre)
+
+    def ajouter(self, film):
+        """Ajoute un film à la fin du catalogue ; un film de même titre déjà présent est remplacé."""
+        ancien = self.par_titre.get(film["titre"])
+        if ancien is not None:
+            self._retirer(ancien)
+        self.films.append(film)
+        self.rang[id(film)] = len(self.films) - 1
+        self._indexer(film)
+
+    def ajouter_lot(self, films):
+        """Ajoute des films à la fin du catalogue (import) ; les index triés seront reconstruits une seule fois.
+
+        Comme pour ajouter(), un film de même titre déjà présent est remplacé.
+        """
+        self.a_trier = True
+        for film in films:
+            ancien = self.par_titre.get(film["titre"])
+            if ancien is not None:
+                self._retirer(ancien)
+            self.films.append(film)
+            self.rang[id(film)] = len(self.films) - 1
+            self._indexer(film)
+
+    def _modifier_cote(self, film, ancienne):
+        """Déplace le film dans l'index des cotes après un changement de cote."""
+        i = bisect_left(self.cotes, ancienne)
+        while self.films_par_cote[i] is not film: # Films de même cote : chercher le bon
+            i += 1
+        del self.cotes[i]
+        del self.films_par_cote[i]
+        i = bisect_left(self.cotes, cote(film))
+        self.cotes.insert(i, cote(film))
+        self.films_par_cote.insert(i, film)
+
+    def noter(self, titre, username, note):
+        """Enregistre la note d'un utilisateur et recalcule la cote du film. Retourne le film, ou None."""
+        film = self.par_titre.get(titre)
+        if film is None:
+            return None
+        ancienne = cote(film)
+        journal.appliquer_note_film(film, username, note) # Cote = moyenne des notes
+        if cote(film) != ancienne and not self.a_trier:
+            self._modifier_cote(film, ancienne)
+        return film
+
+    def modifier_stock(self, titre, stock):
+        """Modifie le stock d'un film (après une vente). Retourne le film, ou None."""
+        film = self.par_titre.get(titre)
+        if film is not None:
+            film["stock"] = stock
+        return film
+
+    def commencant_par(self, prefixe):
+        """Films dont le titre commence par prefixe (sans tenir compte de la casse), par ordre alphabétique."""
+        prefixe = prefixe.lower()
+        self._index_tries()
+        debut = bisect_left(self.titres, prefixe)
+        fin = bisect_left(self.titres, prefixe + "\uffff")
+        return self.films_par_titre[debut:fin]
+
+    def contenant(self, texte):
+        """Films dont le titre contient texte (sans tenir compte de la casse).
+
+        Seuls les films partageant le n-gramme le plus rare de texte sont examinés.
+        """
+        texte = texte.lower()
+        if len(texte) <= N_GRAMME: # Sous-chaîne indexée telle quelle
+            return list(self.par_ngramme.get(texte, []))
+        grammes = [texte[i:i + N_GRAMME] for i in range(len(texte) - N_GRAMME + 1)]
+        plus_rare = min((self.par_ngramme.get(g, []) for g in grammes), key=len)
+        return [film for film in plus_rare if texte in film["titre"].lower()]
+
+    def rechercher(self, texte=None, prefixe=None, genre=None, annee=None, cote_min=None,
+                   tri=None, decroissant=False, debut=0, limite=None):
+        """Retourne (page, total) : les films correspondant à tous les critères, triés et paginés.
+
+        texte : sous-chaîne du titre ; prefixe : début du titre ; genre (sans tenir compte de la
+        casse), annee, cote_min : comme filtrer(). Un critère None ou vide n'est pas appliqué.
+        tri : "titre", "annee", "cote" ou None (ordre d'affichage). page contient au plus limite
+        films à partir de la position debut ; total est le nombre de films correspondants.
+        """
+        candidats = [] # Listes de films correspondant à chaque critère
+        if texte:
+            candidats.append(self.contenant(texte))
+        if prefixe:
+            candidats.append(self.commencant_par(prefixe))
+        if genre:
+            candidats.append(self.par_genre.get(genre.lower(), []))
+        if annee is not None:
+            candidats.append(self.par_annee.get(annee, []))
+        if cote_min is not None:
+            self._index_tries()
+            candidats.append(self.films_par_cote[bisect_left(self.cotes, cote_min):])
+
+        if candidats: # Parcourir seulement la plus petite liste de candidats
+            texte = texte.lower() if texte else None
+            prefixe = prefixe.lower() if prefixe else None
+            genre = genre.lower() if genre else None
+            resultat = [film for film in min(candidats, key=len)
+                        if (texte is None or texte in film["titre"].lower())
+                        and (prefixe is None or film["titre"].lower().startswith(prefixe))
+                        and (genre is None or film["genre"].lower() == genre)
+                        and (annee is None or film["annee"] == annee)
+                        and (cote_min is None or cote(film) >= cote_min)]
+            resultat.sort(key=lambda film: self.rang[id(film)]) # Ordre d'affichage
+        else:
+            resultat = self.films # Aucun critère : tout le catalogue, déjà dans l'ordre d'affichage
+
+        if tri is not None:
+            resultat = sorted(resultat, key=CLES_TRI[tri], reverse=decroissant)
+        fin = None if limite is None else debut + limite
+        return resultat[debut:fin], len(resultat)
+
+    def filtrer(self, genre=None, annee=None, cote_min=None):
+        """Films du genre (sans tenir compte de la casse), de l'année et de cote >= cote_min, dans l'ordre d'affichage.
+
+        Un critère None n'est pas appliqué. Seul l'ensemble de films le plus restreint parmi les
+        index est parcouru.
+        """
+        return self.rechercher(genre=genre, annee=annee, cote_min=cote_min)[0]
+
+    def trier(self, cle, reverse=False):
+        """Trie la liste films (ordre d'affichage) avec la fonction cle."""
+        self.films.sort(key=cle, reverse=reverse)
+        self._numeroter()
@@ -0,0 +1,208 @@
+"""Instrumentation optionnelle (INSTRUMENTATION=1) : durée des opérations critiques, octets écrits, profilage cProfile ou tracemalloc.
+
+Les mesures sont exportées périodiquement dans Fichiers_json/metriques.json (et renvoyées par
+GET /metriques dans service.py). Sans INSTRUMENTATION, chronometre() retourne la fonction
+d'origine et mesure() un contexte vide : l'instrumentation ne coûte rien.
+"""
+import contextlib
+import cProfile
+import functools
+import json
+import os
+import tempfile
+import threading
+import time
+import tracemalloc
+from datetime import datetime
+
+# ========== CONFIGURATION DES CHEMINS ==========
+PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
+
+def get_json_path(filename):
+    """Retourne le chemin vers les fichiers JSON dans Fichiers_json/"""
+    return os.path.join(PROJECT_ROOT, "Fichiers_json", filename)
+
+# ========== FIN CONFIGURATION DES CHEMINS ==========
+
+# Instrumentation activée (INSTRUMENTATION=1), lue au démarrage
+ACTIF = os.environ.get("INSTRUMENTATION", "0") not in ("", "0")
+# Profilage : "cprofile", "tracemalloc" ou "cprofile,tracemalloc" (avec INSTRUMENTATION=1)
+PROFILAGE = {mode.strip() for mode in os.environ.get("INSTRUMENTATION_PROFIL", "").split(",") if mode.strip()}
+# Secondes entre deux exports du fichier des métriques (0 : export à l'arrêt seulement)
+INTERVALLE_EXPORT = float(os.environ.get("INSTRUMENTATION_INTERVALLE", "60"))
+# Fichier des métriques et fichier du profil cProfile (lisible par python -m pstats)
+FICHIER_METRIQUES = os.environ.get("INSTRUMENTATION_FICHIER") or get_json_path("metriques.json")
+FICHIER_PROFIL = get_json_path("profil.prof")
+# Nombre de lignes de code les plus consommatrices de mémoire exportées (tracemalloc)
+NB_ALLOCATIONS = 15
+
+_verrou = threading.Lock() # Les mesures viennent du fil Tk, des tâches et du service
+_mesures = {} # nom -> [nombre, durée totale, durée min, durée max, octets écrits]
+_ecritures = {} # nom de fichier -> [nombre d'écritures, octets écrits]
+_compteurs = {} # nom -> valeur
+_en_cours = threading.local() # Mesures en cours dans le thread (les octets écrits leur sont attribués)
+_debut = datetime.now()
+_profil = None # cProfile.Profile actif
+_arret_export = None # threading.Event arrêtant l'export périodique
+
+
+class _Mesure:
+    """Contexte mesurant la durée d'une opération et les octets écrits pendant celle-ci."""
+    __slots__ = ("nom", "debut", "octets")
+
+    def __init__(self, nom): # Constructeur de la classe
+        self.nom = nom
+        self.debut = 0.0
+        self.octets = 0
+
+    def __enter__(self):
+        pile = getattr(_en_cours, "pile", None)
+        if pile is None:
+            pile = _en_cours.pile = []
+        pile.append(self)
+        self.debut = time.perf_counter()
+        return self
+
+    def __exit__(self, *exception):
+        duree = time.perf_counter() - self.debut
+        _en_cours.pile.remove(self) # Pas forcément la dernière : des coroutines peuvent s'entrelacer dans un thread
+        with _verrou:
+            stats = _mesures.get(self.nom)
+            if stats is None:
+                _mesures[self.nom] = [1, duree, duree, duree, self.octets]
+            else:
+                stats[0] += 1
+                stats[1] += duree
+                stats[2] = min(stats[2], duree)
+                stats[3] = max(stats[3], duree)
+                stats[4] += self.octets
+        return False
+
+
+_INACTIF = contextlib.nullcontext()
+
+
+def mesure(nom):
+    """Contexte mesurant l'opération nom : with instrumentation.mesure("valider_vente"): ..."""
+    return _Mesure(nom) if ACTIF else _INACTIF
+
+
+def chronometre(nom):
+    """Décorateur mesurant chaque appel de la fonction sous le nom donné (fonction inchangée sans INSTRUMENTATION)."""
+    def decorateur(fonction):
+        if not ACTIF:
+            return fonction
+
+        @functools.wraps(fonction)
+        def mesuree(*args, **kwargs):
+            with _Mesure(nom):
+                return fonction(*args, **kwargs)
+        return mesuree
+    return decorateur
+
+
+def octets_ecrits(fichier, octets):
+    """Compte une écriture de fichier ; les octets sont aussi attribués aux opérations en cours dans le thread."""
+    if not ACTIF:
+        return
+    for operation in getattr(_en_cours, "pile", ()):
+        operation.octets += octets
+    nom = os.path.basename(fichier)
+    with _verrou:
+        ecritures = _ecritures.setdefault(nom, [0, 0])
+        ecritures[0] += 1
+        ecritures[1] += octets
+
+
+def compter(nom, valeur=1):
+    """Ajoute valeur au compteur nom."""
+    if not ACTIF:
+        return
+    with _verrou:
+        _compteurs[nom] = _compteurs.get(nom, 0) + valeur
+
+
+## Export ##
+def instantane():
+    """Mesures depuis le démarrage, au format du fichier des métriques (durées en secondes)."""
+    with _verrou:
+        mesures = {nom: {"nombre": n, "total": total, "moyenne": total / n, "min": minimum, "max": maximum,
+                         "octets_ecrits": octets, "octets_par_appel": octets / n}
+                   for nom, (n, total, minimum, maximum, octets) in sorted(_mesures.items())}
+        ecritures = {nom: {"ecritures": n, "octets": octets} for nom, (n, octets) in sorted(_ecritures.items())}
+        compteurs = dict(sorted(_compteurs.items()))
+    donnees = {
+        "actif": ACTIF,
+        "debut": _debut.strftime("%Y-%m-%d %H:%M:%S"),
+        "date": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "pid": os.getpid(),
+        "mesures": mesures,
+        "ecritures": ecritures,
+        "compteurs": compteurs,
+    }
+    if tracemalloc.is_tracing():
+        actuelle, pic = tracemalloc.get_traced_memory()
+        allocations = tracemalloc.take_snapshot().statistics("lineno")[:NB_ALLOCATIONS]
+        donnees["memoire"] = {
+            "actuelle": actuelle,
+            "pic": pic,
+            "allocations": [{"ligne": str(stat.traceback[0]), "octets": stat.size, "nombre": stat.count} for stat in allocations],
+        }
+    if _profil is not None:
+        donnees["profil"] = FICHIER_PROFIL
+    return donnees
+
+
+def exporter(fichier=None):
+    """Écrit les mesures dans le fichier des métriques (fichier temporaire puis renommage)."""
+    fichier = fichier or FICHIER_METRIQUES
+    fd, temporaire = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(fichier)), prefix=".metriques.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(instantane(), f, ensure_ascii=False, indent=4)
+        os.replace(temporaire, fichier)
+    except BaseException:
+        if os.path.exists(temporaire):
+            os.remove(temporaire)
+        raise
+
+
+def _exporter_periodiquement(arret):
+    """Boucle du thread d'export : un export toutes les INTERVALLE_EXPORT secondes jusqu'à l'arrêt."""
+    while not arret.wait(INTERVALLE_EXPORT):
+        try:
+            exporter()
+        except OSError as e: # Ne jamais interrompre l'application pour les métriques
+            print(f"Export des métriques impossible : {e}")
+
+
+def demarrer():
+    """Lance le profilage demandé et l'export périodique (au démarrage de l'application ou du service)."""
+    global _profil, _arret_export
+    if not ACTIF:
+        return
+    if "tracemalloc" in PROFILAGE and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    if "cprofile" in PROFILAGE and _profil is None: # Profile le thread qui appelle demarrer() (fil Tk ou boucle du service)
+        _profil = cProfile.Profile()
+        _profil.enable()
+    if INTERVALLE_EXPORT > 0 and _arret_export is None:
+        _arret_export = threading.Event()
+        threading.Thread(target=_exporter_periodiquement, args=(_arret_export,), name="metriques", daemon=True).start()
+
+
+def arreter():
+    """Arrête l'export périodique et le profilage, écrit le profil puis les métriques finales."""
+    global _profil, _arret_export
+    if not ACTIF:
+        return
+    if _arret_export is not None:
+        _arret_export.set()
+        _arret_export = None
+    if _profil is not None:
+        _profil.disable()
+        _profil.dump_stats(FICHIER_PROFIL)
+    exporter()
+    _profil = None
+    if tracemalloc.is_tracing():
+        tracemalloc.stop()
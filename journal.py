@@ -0,0 +1,163 @@
+"""Journal des modifications (notes, ventes, stock) en ajout seul, rejoué au chargement et compacté périodiquement."""
+import json
+import os
+import uuid
+
+import instrumentation
+import stockage
+
+# ========== CONFIGURATION DES CHEMINS ==========
+PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
+
+def get_json_path(filename):
+    """Retourne le chemin vers les fichiers JSON dans Fichiers_json/"""
+    return os.path.join(PROJECT_ROOT, "Fichiers_json", filename)
+
+# ========== FIN CONFIGURATION DES CHEMINS ==========
+
+# Nombre d'événements au-delà duquel le journal est compacté dans les fichiers JSON
+SEUIL_COMPACTION = 200
+
+
+def chemin_journal(fichier=None):
+    """Retourne le chemin du journal (Fichiers_json/journal.jsonl par défaut)."""
+    return fichier or get_json_path("journal.jsonl")
+
+
+def ajouter_evenement(evenement, fichier=None):
+    """Ajoute un événement à la fin du journal (une ligne JSON), sans réécrire les fichiers JSON.
+
+    Types d'événements :
+      {"type": "note", "username": ..., "film": ..., "note": ...}
+      {"type": "vente", "vente": {...}}  (même format qu'une entrée de ventes.json, avec son "id")
+      {"type": "stock", "film": ..., "delta": ...}  (variation du stock, négative pour une vente)
+    """
+    ajouter_evenements([evenement], fichier)
+
+
+def ajouter_evenements(evenements, fichier=None):
+    """Ajoute plusieurs événements à la fin du journal en une seule écriture."""
+    if not evenements:
+        return
+    ligne = "".join(json.dumps(evenement, ensure_ascii=False) + "\n" for evenement in evenements).encode('utf-8') # Une ligne par événement
+    with stockage.verrou(chemin_journal(fichier)), open(chemin_journal(fichier), 'a+b') as f: # Journal partagé entre les postes
+        if f.seek(0, os.SEEK_END) > 0: # Journal non vide : vérifier le dernier caractère
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b"\n": # Dernière ligne tronquée par un arrêt brutal
+                ligne = b"\n" + ligne # Commencer une nouvelle ligne
+        f.write(ligne)
+        f.flush()
+    instrumentation.octets_ecrits(chemin_journal(fichier), len(ligne))
+
+
+def lire_evenements(fichier=None):
+    """Retourne la liste des événements du journal (vide s'il n'existe pas).
+
+    Une dernière ligne incomplète (arrêt brutal pendant l'écriture) est ignorée.
+    """
+    evenements = []
+    try:
+        with open(chemin_journal(fichier), 'r', encoding='utf-8') as f: # Ouvrir le journal en mode lecture
+            for ligne in f:
+                try:
+                    evenements.append(json.loads(ligne))
+                except json.JSONDecodeError:
+                    continue # Ligne tronquée
+    except FileNotFoundError:
+        pass
+    return evenements
+
+
+def nombre_evenements(fichier=None):
+    """Retourne le nombre de lignes du journal."""
+    try:
+        with open(chemin_journal(fichier), 'r', encoding='utf-8') as f:
+            return sum(1 for _ in f)
+    except FileNotFoundError:
+        return 0
+
+
+def identifiant_vente():
+    """Identifiant unique d'une nouvelle vente (champ "id").
+
+    Deux ventes du même film, par le même vendeur, dans la même seconde et de même quantité sont
+    identiques à l'identifiant près : seul l'identifiant permet de reconnaître une vente du
+    journal déjà reportée dans ventes.json.
+    """
+    return uuid.uuid4().hex
+
+
+def ventes_a_ajouter(evenements, deja_vendues):
+    """Ventes des événements à ajouter à l'historique ; deja_vendues contient les identifiants des ventes déjà présentes.
+
+    Une vente sans identifiant (journal antérieur aux identifiants) est toujours ajoutée.
+    """
+    ventes = []
+    for ev in evenements:
+        if ev.get("type") == "vente":
+            ident = ev["vente"].get("id")
+            if ident is None or ident not in deja_vendues:
+                ventes.append(ev["vente"])
+                if ident is not None:
+                    deja_vendues.add(ident)
+    return ventes
+
+
+def appliquer_note_film(film, username, note):
+    """Enregistre la note d'un utilisateur dans un film et met à jour sa cote moyenne.
+
+    Les notes d'un enregistrements.Film tiennent leur somme à jour : la cote est obtenue en O(1).
+    Pour un film lu dans un fichier JSON (dictionnaire), elle est recalculée à partir des notes.
+    """
+    if "notes" not in film: # S'assurer que le champ "notes" existe
+        film["notes"] = {}
+    notes = film["notes"]
+    notes[username] = note
+    moyenne = getattr(notes, "moyenne", None)
+    film["cote"] = moyenne() if moyenne is not None else sum(notes.values()) / len(notes) # Cote = moyenne des notes
+
+
+def appliquer_note_utilisateur(utilisateurs, par_nom, username, film, note):
+    """Enregistre la note dans la liste des utilisateurs (crée l'utilisateur s'il n'existe pas)."""
+    utilisateur = par_nom.get(username)
+    if utilisateur is None: # Nouvel utilisateur, comme à la connexion (connect_user)
+        new_id = (max((u['user_id'] for u in utilisateurs), default=0) + 1) # Générer un nouvel identifiant
+        utilisateur = {'user_id': new_id, 'username': username, 'notes': {}}
+        utilisateurs.append(utilisateur)
+        par_nom[username] = utilisateur
+    utilisateur['notes'][film] = note
+
+
+def rejouer(catalogue=None, ventes=None, utilisateurs=None, fichier=None, evenements=None):
+    """Applique les événements du journal aux listes chargées depuis les fichiers JSON.
+
+    Chaque liste peut être None si elle n'est pas utile. Les notes sont des affectations (rejouables
+    sans effet de bord) ; une vente dont l'identifiant est déjà dans ventes n'est pas ajoutée une
+    seconde fois, au cas où le journal n'aurait pas été vidé après une compaction. Le stock est une
+    variation ajoutée au stock lu : deux postes qui vendent le même film sont tous deux comptés. Un
+    événement "stock" sans "delta" (journal antérieur) fixe le stock.
+    """
+    if evenements is None:
+        evenements = lire_evenements(fichier)
+    films = {f["titre"]: f for f in catalogue} if catalogue is not None else {} # titre -> film
+    par_nom = {u["username"]: u for u in utilisateurs} if utilisateurs is not None else {} # username -> utilisateur
+
+    for ev in evenements:
+        type_ev = ev.get("type")
+        if type_ev == "note":
+            if catalogue is not None and ev["film"] in films:
+                appliquer_note_film(films[ev["film"]], ev["username"], ev["note"])
+            if utilisateurs is not None:
+                appliquer_note_utilisateur(utilisateurs, par_nom, ev["username"], ev["film"], ev["note"])
+        elif type_ev == "stock":
+            if catalogue is not None and ev["film"] in films:
+                film = films[ev["film"]]
+                film["stock"] = film.get("stock", 0) + ev["delta"] if "delta" in ev else ev["stock"]
+    if ventes is not None:
+        ventes.extend(ventes_a_ajouter(evenements, {v["id"] for v in ventes if "id" in v}))
+
+
+def vider(fichier=None):
+    """Vide le journal après une compaction."""
+    with stockage.verrou(chemin_journal(fichier)), open(chemin_journal(fichier), 'w', encoding='utf-8'):
+        pass
@@ -1,15 +1,36 @@
+import time
+DEBUT_DEMARRAGE = time.perf_counter() # Origine des mesures du rapport de démarrage (avant les autres imports)
 import tkinter as tk
 from tkinter import *
 from tkinter import messagebox, simpledialog, filedialog, ttk
+import argparse
+import base64
+import contextlib
+import io
 import json
 import os
-from datetime import datetime
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+import tempfile
+import threading
+from datetime import datetime, timedelta
 
 import subprocess
 import json
 
+from recommandation import MoteurRecommandation, CacheRecommandations, charger_table, resultat_depuis_table
+import journal
+import instrumentation
+import enregistrements
+from enregistrements import NotesPartagees, Film
+from index_catalogue import IndexCatalogue, CLES_TRI
+from grille_films import GrilleFilms
+from agregats_ventes import AgregatsVentes
+from ventes_colonnes import VentesColonnes
+from import_catalogue import ImportCatalogue
+from taches import ExecuteurTaches, FenetreProgression
+from client_service import ClientService, ErreurService
+import stockage
+import stockage_sqlite
+
 # ========== CONFIGURATION DES CHEMINS ==========
 PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
 
@@ -21,103 +42,326 @@ def get_project_path(filename):
     """Retourne le chemin vers les fichiers à la racine du projet"""
     return os.path.join(PROJECT_ROOT, filename)
 
+# Moteur de recommandation : "python" (en mémoire) ou "exe" (programme C recommandation.exe)
+MOTEUR_RECOMMANDATION = os.environ.get("MOTEUR_RECOMMANDATION", "python")
+# Nombre de voisins pour les recommandations classées par score (0 = plus proche voisin unique, comme le C)
+RECOMMANDATION_KNN = int(os.environ.get("RECOMMANDATION_KNN", "0"))
+# Délai (en millisecondes) entre la dernière frappe dans le champ de recherche et la recherche
+DELAI_RECHERCHE = 250
+# Stockage des données : "json" (fichiers de Fichiers_json/) ou "sqlite" (Fichiers_json/catalogue.db)
+STOCKAGE = os.environ.get("STOCKAGE", "json")
+# Adresse du service HTTP (python service.py) à utiliser à la place des fichiers locaux, ex. http://127.0.0.1:8765
+SERVICE_URL = os.environ.get("SERVICE_URL")
+
 # ========== FIN CONFIGURATION DES CHEMINS ==========
 
+# Connexion à la base SQLite (mode STOCKAGE=sqlite)
+_connexions = threading.local() # Une connexion par thread : sqlite3 interdit d'utiliser une connexion dans un autre thread
+
+def connexion_sqlite():
+    """Retourne la connexion du thread courant à Fichiers_json/catalogue.db, ouverte au premier appel."""
+    if getattr(_connexions, "connexion", None) is None:
+        _connexions.connexion = stockage_sqlite.connecter()
+    return _connexions.connexion
+
+def stockage_sqlite_actif(fichier=None):
+    """Indique si les données du fichier par défaut (fichier None) sont lues dans la base SQLite."""
+    return STOCKAGE == "sqlite" and fichier is None
+
 # Fonctions d'import du catalogue
 def importer_catalogue(fichier): 
     """Importe un fichier JSON contenant un catalogue de films."""
-    try:
-        with open(fichier, 'r', encoding='utf-8') as f: # Ouvrir le fichier en mode lecture
-            return json.load(f) # Charger le contenu du fichier JSON
-    except (FileNotFoundError, json.JSONDecodeError):
-        return [] # Retourner une liste vide si le fichier n'existe pas ou est invalide
+    if stockage_sqlite_actif() and os.path.abspath(fichier) == get_json_path("catalogue_films.json"):
+        return stockage_sqlite.charger_catalogue(connexion_sqlite()) # Catalogue lu dans la base
+    # Liste vide si le fichier n'existe pas ; stockage.FichierCorrompu s'il est illisible
+    return stockage.fichier_partage(fichier, "titre").charger()
+
+# Chargement du catalogue de l'application
+def charger_catalogue():
+    """Charge Fichiers_json/catalogue_films.json complété par le journal (ou le catalogue de la base SQLite)."""
+    fichier = get_json_path("catalogue_films.json")
+    if stockage_sqlite_actif():
+        return importer_catalogue(fichier)
+    return stockage.fichier_partage(fichier, "titre").charger(
+        lambda c: journal.rejouer(catalogue=c)) # Appliquer les notes et le stock enregistrés depuis la dernière compaction
 
 # Fonctions d'export du catalogue
-def exporter_catalogue(fichier, catalogue): 
-    """Exporte le catalogue de films dans un fichier JSON."""
-    with open(fichier, 'w', encoding='utf-8') as f: # Ouvrir le fichier en mode écriture
-        json.dump(catalogue, f, ensure_ascii=False, indent=4) # Écrire le contenu du catalogue dans le fichier JSON
+def exporter_catalogue(fichier, catalogue, variations=None): 
+    """Exporte le catalogue de films dans un fichier JSON.
+
+    variations : variations de stock de ce poste déjà dans le journal (voir catalogue_sans_variations),
+    à donner quand fichier est catalogue_films.json.
+    """
+    catalogue = catalogue_sans_variations(catalogue, variations) # Films au format de catalogue_films.json
+    if stockage_sqlite_actif() and os.path.abspath(fichier) == get_json_path("catalogue_films.json"):
+        stockage_sqlite.sauvegarder_catalogue(connexion_sqlite(), catalogue) # Catalogue écrit dans la base
+        return
+    stockage.fichier_partage(fichier, "titre").sauvegarder(catalogue) # Écriture atomique, fusionnée avec les autres postes
 
 # Fonctions de chargement des ventes
 def charger_ventes(fichier=None):
-    """Charge l'historique des ventes depuis Fichiers_json/ventes.json."""
+    """Charge l'historique des ventes depuis Fichiers_json/ventes.json (complété par le journal)."""
+    if stockage_sqlite_actif(fichier):
+        return stockage_sqlite.charger_ventes(connexion_sqlite())
+    rejouer_journal = fichier is None # Le journal ne concerne que les fichiers par défaut
     if fichier is None:
         fichier = get_json_path('ventes.json')
     if not os.path.exists(fichier): # Vérifier si le fichier existe
-        with open(fichier, 'w', encoding='utf-8') as f: # Créer le fichier s'il n'existe pas
-            json.dump([], f, ensure_ascii=False, indent=4) # Écrire une liste vide dans le fichier JSON
-    with open(fichier, 'r', encoding='utf-8') as f: # Ouvrir le fichier en mode lecture
-        try:
-            return json.load(f) # Charger le contenu du fichier JSON
-        except json.JSONDecodeError:
-            return [] # Retourner une liste vide si le fichier est vide ou invalide
+        stockage.ecrire_json_atomique(fichier, []) # Créer le fichier s'il n'existe pas
+    ventes, _ = stockage.lire_json(fichier) # stockage.FichierCorrompu si le fichier est illisible
+    if rejouer_journal:
+        journal.rejouer(ventes=ventes) # Ajouter les ventes enregistrées depuis la dernière compaction
+    return ventes
+
+def charger_historique_ventes():
+    """Historique des ventes en colonnes : ventes.json est lu vente par vente (sans le charger en entier), puis complété par le journal."""
+    if stockage_sqlite_actif():
+        return VentesColonnes.depuis_json(charger_ventes())
+    evenements = journal.lire_evenements() # Ventes enregistrées depuis la dernière compaction
+    en_attente = {ev["vente"]["id"] for ev in evenements if ev.get("type") == "vente" and "id" in ev["vente"]}
+    deja_vendues = set() # Identifiants des ventes du journal déjà reportées dans ventes.json
+
+    def lire_ventes():
+        for vente, _ in stockage.iterer_json(get_json_path('ventes.json')):
+            if vente.get("id") in en_attente:
+                deja_vendues.add(vente["id"])
+            yield vente
+
+    historique = VentesColonnes.depuis_json(lire_ventes())
+    for vente in journal.ventes_a_ajouter(evenements, deja_vendues):
+        historique.ajouter(vente)
+    return historique
 
 # Sauvegarde des ventes
 def sauvegarder_ventes(ventes, fichier=None): 
     """Sauvegarde l'historique des ventes dans Fichiers_json/ventes.json."""
+    if stockage_sqlite_actif(fichier):
+        stockage_sqlite.sauvegarder_ventes(connexion_sqlite(), ventes)
+        return
     if fichier is None:
         fichier = get_json_path('ventes.json')
-    with open(fichier, 'w', encoding='utf-8') as f: # Ouvrir le fichier en mode écriture
-        json.dump(ventes, f, ensure_ascii=False, indent=4) # Écrire le contenu des ventes dans le fichier JSON
+    with stockage.verrou(fichier): # Les ventes ne sont jamais modifiées : ajouter au fichier celles qui n'y sont pas
+        contenu, _ = stockage.lire_json(fichier)
+        stockage.ecrire_json_atomique(fichier, stockage.fusionner([], list(ventes), contenu))
 
 # Fonctions de chargement des utilisateurs
 def charger_utilisateurs(fichier=None):
-    """Charge la liste des utilisateurs depuis Fichiers_json/ListeUtilisateurs.json."""
+    """Charge la liste des utilisateurs depuis Fichiers_json/ListeUtilisateurs.json (complétée par le journal)."""
+    if stockage_sqlite_actif(fichier):
+        return stockage_sqlite.charger_utilisateurs(connexion_sqlite())
+    rejouer_journal = fichier is None # Le journal ne concerne que les fichiers par défaut
     if fichier is None:
         fichier = get_json_path('ListeUtilisateurs.json')
     if not os.path.exists(fichier): # Vérifier si le fichier existe
-        with open(fichier, 'w', encoding='utf-8') as f: # Créer le fichier s'il n'existe pas
-            json.dump([], f, ensure_ascii=False, indent=4) # Écrire une liste vide dans le fichier JSON
-    with open(fichier, 'r', encoding='utf-8') as f: # Ouvrir le fichier en mode lecture
-        try:
-            return json.load(f) # Charger le contenu du fichier JSON
-        except json.JSONDecodeError:
-            return []  # Retourner une liste vide si le fichier est vide ou invalide
+        stockage.ecrire_json_atomique(fichier, []) # Créer le fichier s'il n'existe pas
+    completer = (lambda u: journal.rejouer(utilisateurs=u)) if rejouer_journal else None # Appliquer les notes enregistrées depuis la dernière compaction
+    return stockage.fichier_partage(fichier, "username").charger(completer) # stockage.FichierCorrompu si le fichier est illisible
 
 # Sauvegarde des utilisateurs
 def sauvegarder_utilisateurs(utilisateurs, fichier=None): 
     """Sauvegarde la liste des utilisateurs dans Fichiers_json/ListeUtilisateurs.json."""
+    utilisateurs = enregistrements.json_liste(utilisateurs) # Utilisateurs au format de ListeUtilisateurs.json
+    if stockage_sqlite_actif(fichier):
+        stockage_sqlite.sauvegarder_utilisateurs(connexion_sqlite(), utilisateurs)
+        return
     if fichier is None:
         fichier = get_json_path('ListeUtilisateurs.json')
-    with open(fichier, 'w', encoding='utf-8') as f: # Ouvrir le fichier en mode écriture
-        json.dump(utilisateurs, f, ensure_ascii=False, indent=4) # Écrire le contenu des utilisateurs dans le fichier JSON
-
-# Ajouter une note à un film pour un utilisateur
-def ajouter_note_utilisateur(username, film, note, fichier=None): 
-    """Ajoute une note à un film pour un utilisateur dans le fichier ListeUtilisateurs.json."""
-    if fichier is None:
-        fichier = get_json_path('ListeUtilisateurs.json')
-    liste_utilisateurs = charger_utilisateurs(fichier) # Charger la liste des utilisateurs
-    utilisateur_existant = next((u for u in liste_utilisateurs if u['username'] == username), None) # Rechercher l'utilisateur par son nom
-
-    if utilisateur_existant: # Si l'utilisateur existe 
-        utilisateur_existant['notes'][film] = note # Ajouter la note pour le film
-    else: # Si l'utilisateur n'existe pas
-        new_id = (max((u['user_id'] for u in liste_utilisateurs), default=0) + 1) # Générer un nouvel identifiant
-        nouveau_utilisateur = {
-            'user_id': new_id,
-            'username': username,
-            'notes': {film: note}
-        }
-        liste_utilisateurs.append(nouveau_utilisateur) # Ajouter le nouvel utilisateur à la liste
-
-    sauvegarder_utilisateurs(liste_utilisateurs, fichier) # Sauvegarder la liste des utilisateurs dans le fichier
-
+    stockage.fichier_partage(fichier, "username").sauvegarder(utilisateurs) # Écriture atomique, fusionnée avec les autres postes
+
+# Compaction du journal
+def catalogue_sans_variations(catalogue, variations):
+    """Films au format de catalogue_films.json, stock diminué des variations de ce poste déjà dans le journal.
+
+    Le stock réel est celui du fichier plus les variations du journal ("delta"). variations
+    (titre -> somme des variations journalisées par ce poste depuis le chargement) est retiré du
+    stock en mémoire : la fusion garde alors le stock du fichier, auquel le rejeu du journal ajoute
+    les ventes de tous les postes une seule fois.
+    """
+    films = enregistrements.json_liste(catalogue)
+    if variations:
+        films = [dict(f, stock=f.get("stock", 0) - variations[f["titre"]]) if variations.get(f["titre"]) else f
+                 for f in films]
+    return films
+
+
+@instrumentation.chronometre("compacter_journal")
+def compacter_journal(catalogue, variations=None):
+    """Réécrit les fichiers JSON à partir de l'état en mémoire puis vide le journal.
+
+    Le journal est partagé par tous les postes : ses événements (y compris ceux des autres postes)
+    sont appliqués aux fichiers fusionnés avant d'être effacés. Les ventes n'étant jamais modifiées,
+    ventes.json est seulement complété par les ventes du journal. variations : voir
+    catalogue_sans_variations.
+    """
+    with stockage.verrou(journal.chemin_journal()): # Aucun poste ne peut ajouter d'événement pendant la compaction
+        evenements = journal.lire_evenements()
+        stockage.fichier_partage(get_json_path("catalogue_films.json"), "titre").sauvegarder(
+            catalogue_sans_variations(catalogue, variations),
+            lambda c: journal.rejouer(catalogue=c, evenements=evenements)) # Catalogue (notes, cotes et stock)
+        fichier_ventes = get_json_path("ventes.json")
+        with stockage.verrou(fichier_ventes): # Historique des ventes
+            ventes, _ = stockage.lire_json(fichier_ventes)
+            journal.rejouer(ventes=ventes, evenements=evenements)
+            stockage.ecrire_json_atomique(fichier_ventes, ventes)
+        stockage.fichier_partage(get_json_path("ListeUtilisateurs.json"), "username").mettre_a_jour(
+            lambda u: journal.rejouer(utilisateurs=u, evenements=evenements)) # Notes des utilisateurs
+        journal.vider() # Les événements sont maintenant dans les fichiers JSON
+
+
+# Graphiques de l'analyse des ventes
+@instrumentation.chronometre("generer_graphiques")
+def generer_graphiques(tache, ventes_par_jour, genres_vendus, ventes_par_utilisateur, stocks):
+    """Dessine les graphiques de l'analyse des ventes (dans une tâche de fond) et retourne leurs images PNG en base64.
+
+    stocks est la liste des couples (titre, stock) du catalogue. Les figures sont rendues par Agg,
+    sans widget Tk : seules les images sont affichées dans le fil Tk.
+    """
+    # matplotlib n'est importé qu'à la première analyse des ventes (son import domine le temps de démarrage)
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+    # Créer les figures matplotlib 
+    fig1 = Figure(figsize=(9, 6), dpi=100) # Créer une figure pour les graphiques
+
+    # Subplot 1 : Revenu par jour (line chart)
+    ax1 = fig1.add_subplot(1,2,1)  # 2 lignes, 2 colonnes, 1ère position
+    sorted_dates = sorted(ventes_par_jour.keys()) # Trier les dates
+    x_dates = sorted_dates # Dates en abscisse
+    y_revenus = [ventes_par_jour[d] for d in x_dates] # Revenus en ordonnée
+
+    ax1.plot(x_dates, y_revenus, marker='o', color='blue') # Tracer le graphique
+    ax1.set_title("Revenu par jour") # Ajouter un titre
+    ax1.set_xlabel("Date") # Ajouter une étiquette pour l'axe des x
+    ax1.set_ylabel("Revenu (€)") # Ajouter une étiquette pour l'axe des y
+    ax1.tick_params(axis='x', rotation=45) # Faire pivoter les dates
+
+    # Subplot 2 : Ventes par genre (bar chart)
+    ax2 = fig1.add_subplot(1,2,2)  # 1 lignes, 2 colonnes, 2ème position
+    genres = list(genres_vendus.keys()) # Genres
+    q_genres = [genres_vendus[g] for g in genres] # Quantités vendues
+
+    ax2.bar(genres, q_genres, color='green') # Tracer le graphique
+    ax2.set_title("Quantité vendue par genre") # Ajouter un titre
+    ax2.set_xlabel("Genre") # Ajouter une étiquette pour l'axe des x
+    ax2.set_ylabel("Quantité") # Ajouter une étiquette pour l'axe des y
+    ax2.tick_params(axis='x', rotation=45) # Faire pivoter les genres
+
+    # figure 2 : Ventes par utilisateur
+    fig2 = Figure(figsize=(9, 6), dpi=100) # Créer une nouvelle figure
+    ax3 = fig2.add_subplot(1,1,1)  # 1 ligne, 1 colonne, 1ère position
+    users = list(ventes_par_utilisateur.keys()) # Utilisateurs
+    q_users = [ventes_par_utilisateur[u] for u in users] # Quantités vendues
+
+    ax3.bar(users, q_users, color='orange') # Tracer le graphique
+    ax3.set_title("Quantité vendue par utilisateur") # Ajouter un titre
+    ax3.set_xlabel("Utilisateur")   # Ajouter une étiquette pour l'axe des x
+    ax3.set_ylabel("Quantité") # Ajouter une étiquette pour l'axe des y
+    ax3.tick_params(axis='x', rotation=45) # Faire pivoter les utilisateurs
+
+    fig1.tight_layout() # Ajuster la disposition des graphiques
+    fig2.tight_layout() # Ajuster la disposition des graphiques
+
+    # figure 3 : Stock de films
+    fig3 = Figure(figsize=(9, 6), dpi=100) # Créer une nouvelle figure
+    ax4 = fig3.add_subplot(1,1,1)  # 1 ligne, 1 colonne, 1ère position
+    films_titres = [titre for titre, _ in stocks] # Titres des films
+    films_stock  = [stock for _, stock in stocks] # Stock des films
+    ax4.bar(films_titres, films_stock, color='purple') # Tracer le graphique
+    ax4.set_title("Stock disponible par film") # Ajouter un titre
+    ax4.set_xlabel("Film") # Ajouter une étiquette pour l'axe des x
+    ax4.set_ylabel("Stock") # Ajouter une étiquette pour l'axe des y
+    ax4.tick_params(axis='x', rotation=90) # Faire pivoter les titres des films
+
+    fig1.tight_layout() # Ajuster la disposition des graphiques
+    fig2.tight_layout() # Ajuster la disposition des graphiques
+    fig3.tight_layout() # Ajuster la disposition des graphiques
+
+    images = []
+    for fig in (fig1, fig2, fig3):
+        tache.verifier() # Arrêt si la fenêtre a été fermée
+        tampon = io.BytesIO()
+        FigureCanvasAgg(fig).print_png(tampon) # Rendu de la figure
+        images.append(base64.b64encode(tampon.getvalue()).decode("ascii"))
+    return images
+
+
+# Chargement des données au démarrage
+@instrumentation.chronometre("charger_donnees")
+def charger_donnees(tache, client=None):
+    """Charge les données de l'application dans une tâche de fond, pendant l'affichage de l'écran de connexion.
+
+    Retourne un dictionnaire : index du catalogue, notes des films, utilisateurs, historique et
+    agrégats des ventes, nombre d'événements du journal, table et cache de recommandations. Avec un
+    client, les données viennent du service.
+    """
+    donnees = {"table": None, "nb_evenements": 0}
+    donnees["notes"] = NotesPartagees() # Notes des films, dont sont aussi tirées celles de l'utilisateur connecté
+    if client is not None: # Données tenues par le service
+        donnees["index"] = IndexCatalogue(enregistrements.charger(client.rechercher()[0], [], donnees["notes"])[0])
+        tache.verifier()
+        donnees["utilisateurs"] = None # Utilisateurs demandés au service à la connexion
+        donnees["ventes"] = VentesColonnes.depuis_json(client.ventes())
+        donnees["agregats"] = AgregatsVentes()
+        for champ, valeur in client.statistiques()["ventes"].items():
+            setattr(donnees["agregats"], champ, valeur)
+        donnees["cache_reco"] = None
+        return donnees
+
+    if STOCKAGE == "json": # Liste utilisée par la première connexion (en SQLite, l'utilisateur est cherché dans la base)
+        donnees["utilisateurs"] = charger_utilisateurs()
+    else:
+        donnees["utilisateurs"] = None
+    tache.verifier()
+    # Notes des deux fichiers rangées une seule fois (en SQLite, la table des notes suffit) : source du moteur de recommandation
+    films = enregistrements.charger(charger_catalogue(), donnees["utilisateurs"] or [], donnees["notes"])[0]
+    donnees["index"] = IndexCatalogue(films) # Index du catalogue (titre, genre, année, cote)
+    tache.verifier()
+    donnees["ventes"] = charger_historique_ventes() # Historique des ventes, en colonnes triées par date
+    donnees["agregats"] = AgregatsVentes.charger(donnees["ventes"], donnees["index"].trouver) # Revenu par jour, quantités par genre et par vendeur
+    tache.verifier()
+    if STOCKAGE == "sqlite": # Les notes sont dans la base : la table et le cache dépendent de catalogue.db
+        donnees["cache_reco"] = CacheRecommandations(sources=[stockage_sqlite.chemin_base()])
+    else:
+        donnees["nb_evenements"] = journal.nombre_evenements() # Événements en attente de compaction
+        donnees["table"] = charger_table() # Table précalculée par "python recommandation.py --tous" (None si absente ou périmée)
+        donnees["cache_reco"] = CacheRecommandations() # Résultats déjà calculés, par utilisateur
+    return donnees
 
 # Classe principale de l'application
 class FilmCatalogueApp:
     """Application de gestion de catalogue de films avec interface graphique."""
-    def __init__(self, root, catalogue): # Constructeur de la classe
+    def __init__(self, root, client=None, rapport_demarrage=False): # Constructeur de la classe
         self.root = root # Fenêtre principale de l'application
         self.root.title("Catalogue de Films") # Titre de la fenêtre
         self.root.geometry("1000x700") # Dimensions de la fenêtre
         self.root.configure(bg="#E8F4FF") # Couleur de fond
 
-        self.catalogue = catalogue # Catalogue de films
+        # Données chargées en tâche de fond pendant l'affichage de l'écran de connexion (voir donnees_chargees)
+        self.index = None # Index du catalogue (titre, genre, année, cote)
+        self.catalogue = [] # Catalogue de films
+        self.notes = None # Notes des films (NotesPartagees) : film["notes"] et self.user_notes en sont des vues
+        self.utilisateurs = None # Utilisateurs lus au démarrage, pour la première connexion
+        self.ventes = None # Historique des ventes, en colonnes triées par date
+        self.agregats = None # Revenu par jour, quantités par genre et par vendeur
+        self.agregats_modifies = False # Ventes ajoutées aux agrégats depuis leur dernier enregistrement
+        self.nb_evenements = 0 # Événements en attente de compaction
+        self.variations_stock = {} # titre -> variations de stock journalisées par ce poste (voir catalogue_sans_variations)
+        self.table = None # Table de recommandations précalculée
+        self.cache_reco = None # Résultats de recommandation déjà calculés, par utilisateur
         self.user = None # Utilisateur connecté
         self.user_id = None # Identifiant de l'utilisateur connecté
         self.user_notes = {} # Notes attribuées par l'utilisateur connecté
-        self.ventes = charger_ventes()  # Charger l'historique des ventes
+        self.client = client # Client du service (None : données locales)
+        self.moteur = None # Moteur de recommandation, construit au premier appel
+        self.verrou_moteur = threading.Lock() # Détenu par une tâche pendant le calcul ; le fil Tk ne l'attend jamais
+        self.version_notes = 0 # Incrémentée à chaque note : un résultat calculé avant n'est pas mis en cache
+        self.version_moteur = 0 # Version des notes prise en compte par le moteur
+        self.version_import = 0 # Version des notes au dernier import du catalogue : un moteur plus ancien est périmé
+        self.notes_en_attente = [] # (username, titre, note, nouveau film noté) pas encore appliquées au moteur
+        self.dossier_executable = None # Dossier de travail de recommandation.exe, créé à son premier appel
+        self.taches = ExecuteurTaches(self.root) # Opérations longues exécutées hors du fil Tk
+        self.rapport_demarrage = rapport_demarrage # Afficher les temps de démarrage puis quitter
+        self.temps_demarrage = {"imports": time.perf_counter() - DEBUT_DEMARRAGE} # Étape -> secondes depuis DEBUT_DEMARRAGE
 
         # Configuration de police
         self.default_font = ("Arial", 12)  # Police par défaut
@@ -156,6 +400,11 @@ class FilmCatalogueApp:
         self.sales_menu.add_command(label="Analyse des ventes", command=self.afficher_analyse_ventes) # Ajouter une option au menu
         self.menu_bar.add_cascade(label="Ventes", menu=self.sales_menu) # Ajouter le menu à la barre de menu
 
+        if self.client is not None: # Le catalogue est tenu par le service : pas d'écriture dans les fichiers locaux
+            self.file_menu.entryconfig("Importer Catalogue", state="disabled")
+            self.file_menu.entryconfig("Exporter Catalogue", state="disabled")
+            self.edit_menu.entryconfig("Ajouter un film", state="disabled")
+
 
         # Frame de connexion utilisateur
         self.login_frame = tk.Frame(self.root, bg="#E8F4FF") # Créer un cadre pour le formulaire de connexion
@@ -164,8 +413,11 @@ class FilmCatalogueApp:
         tk.Label(self.login_frame, text="Nom d'utilisateur :", bg="#E8F4FF", font=self.default_font).grid(row=0, column=0, padx=5) # Ajouter un label
         self.username_entry = tk.Entry(self.login_frame, font=self.default_font, width=20) # Ajouter un champ de saisie
         self.username_entry.grid(row=0, column=1, padx=5) # Afficher le champ de saisie
-        connect_btn = tk.Button(self.login_frame, text="Se connecter / Créer compte", command=self.connect_user, bg="#007ACC", fg="white", font=self.default_font)
-        connect_btn.grid(row=0, column=2, padx=5) # Ajouter un bouton pour se connecter
+        self.connect_btn = tk.Button(self.login_frame, text="Se connecter / Créer compte", command=self.connect_user, bg="#007ACC", fg="white", font=self.default_font,
+                                     state="disabled") # Activé une fois les données chargées
+        self.connect_btn.grid(row=0, column=2, padx=5) # Ajouter un bouton pour se connecter
+        self.chargement_label = tk.Label(self.login_frame, text="Chargement des données...", bg="#E8F4FF", font=("Arial", 10, "italic"))
+        self.chargement_label.grid(row=1, column=0, columnspan=3, pady=5)
 
 
         # Cadre des filtres et tri - caché avant connexion
@@ -173,6 +425,8 @@ class FilmCatalogueApp:
         self.genre_filter = tk.StringVar() # Variable pour le filtre de genre
         self.year_filter = tk.StringVar() # Variable pour le filtre d'année
         self.min_rating_filter = tk.StringVar() # Variable pour le filtre de cote
+        self.search_filter = tk.StringVar() # Variable pour la recherche par titre
+        self.recherche_en_attente = None # Recherche programmée après la dernière frappe
         self.sort_option = tk.StringVar(value="titre") # Variable pour le tri
 
         # Logo
@@ -196,6 +450,13 @@ class FilmCatalogueApp:
         tk.Entry(self.filters_frame, textvariable=self.min_rating_filter, font=self.default_font, width=10).grid(row=1, column=6, padx=5, sticky="w") # Ajouter un champ de saisie
         tk.Button(self.filters_frame, text="Appliquer Filtres", command=self.apply_filters, bg="#007ACC", fg="white", font=self.default_font).grid(row=1, column=7, padx=10) # Ajouter un bouton pour appliquer les filtres
 
+        # Ligne de recherche (résultats mis à jour pendant la saisie)
+        tk.Label(self.filters_frame, text="Recherche :", bg="#E8F4FF", font=("Arial", 14, "bold")).grid(row=2, column=0, padx=5, sticky="e") # Ajouter un label
+        tk.Entry(self.filters_frame, textvariable=self.search_filter, font=self.default_font, width=30).grid(row=2, column=1, columnspan=3, padx=5, pady=5, sticky="w") # Ajouter un champ de saisie
+        self.resultats_label = tk.Label(self.filters_frame, text="", bg="#E8F4FF", font=("Arial", 10, "italic")) # Nombre de films trouvés
+        self.resultats_label.grid(row=2, column=4, columnspan=2, padx=5, sticky="w")
+        self.search_filter.trace_add("write", lambda *args: self.programmer_recherche()) # Relancer la recherche à chaque frappe
+
 
         # Ligne de tri
         tk.Label(self.filters_frame, text="Tri :", bg="#E8F4FF", font=("Arial", 14, "bold")).grid(row=3, column=0, padx=5, sticky="e") # Ajouter un label
@@ -217,18 +478,61 @@ class FilmCatalogueApp:
         # Barre de défilement
         self.scrollbar = ttk.Scrollbar(self.scroll_frame, orient="vertical", command=self.canvas.yview) # Créer une barre de défilement
         self.scrollbar.pack(side="right", fill="y") # Afficher la barre de défilement
-        self.canvas.configure(yscrollcommand=self.scrollbar.set) # Configurer la barre de défilement
-
-        # Cadre intérieur pour les films
-        self.films_frame = tk.Frame(self.canvas, bg="#E8F4FF") # Créer un cadre pour afficher les films
-        self.canvas.create_window((0, 0), window=self.films_frame, anchor="nw") # Ajouter le cadre au canvas
 
-        self.films_frame.bind("<Configure>", lambda e: self.canvas.configure(scrollregion=self.canvas.bbox("all"))) # Ajuster la zone de défilement
+        # Grille des films : seules les cartes visibles sont créées, puis réutilisées au défilement
+        self.grille = GrilleFilms(self.canvas, self.scrollbar, self.default_font,
+                                  lambda film: self.user_notes.get(film["titre"], "Pas noté"), self.rate_film)
 
         ## Button pour recommandation
         btn_reco = tk.Button(self.filters_frame, text="Recommandation", bg="#007ACC", fg="white", font=("Arial", 12), command=self.lancer_recommandation) # Ajouter un bouton pour lancer la recommandation
         btn_reco.grid(row=0, column=7, padx=5) # Afficher le bouton
 
+        # Charger les données pendant l'affichage de l'écran de connexion ; les menus qui en dépendent attendent la fin
+        self.etat_menus_donnees("disabled")
+        self.temps_demarrage["interface"] = time.perf_counter() - DEBUT_DEMARRAGE
+        self.taches.soumettre(charger_donnees, self.client, succes=self.donnees_chargees, echec=self.echec_chargement)
+
+    def etat_menus_donnees(self, etat):
+        """Active ("normal") ou désactive ("disabled") les menus qui utilisent le catalogue, les utilisateurs ou les ventes."""
+        for label in ("Importer Catalogue", "Exporter Catalogue"):
+            self.file_menu.entryconfig(label, state=etat)
+        for label in ("Édition", "Utilisateur", "Statistiques", "Ventes"):
+            self.menu_bar.entryconfig(label, state=etat)
+
+    def donnees_chargees(self, donnees):
+        """Fin du chargement des données (dans le fil Tk) : connexion et menus deviennent utilisables."""
+        self.index = donnees["index"]
+        self.catalogue = self.index.films
+        self.notes = donnees["notes"]
+        self.utilisateurs = donnees["utilisateurs"]
+        self.ventes = donnees["ventes"]
+        self.agregats = donnees["agregats"]
+        self.nb_evenements = donnees["nb_evenements"]
+        self.table = donnees["table"]
+        self.cache_reco = donnees["cache_reco"]
+        self.temps_demarrage["donnees"] = time.perf_counter() - DEBUT_DEMARRAGE
+
+        self.chargement_label.grid_remove()
+        self.connect_btn.config(state="normal")
+        self.etat_menus_donnees("normal")
+        if self.rapport_demarrage:
+            self.afficher_rapport_demarrage()
+            self.root.destroy()
+
+    def echec_chargement(self, erreur):
+        """Données illisibles ou service injoignable : ne pas démarrer avec des données vides, qui écraseraient les fichiers."""
+        if isinstance(erreur, stockage.FichierCorrompu):
+            messagebox.showerror("Erreur", f"{erreur}\nRestaurez le fichier avant de relancer l'application.")
+        else:
+            messagebox.showerror("Erreur", str(erreur))
+        self.root.destroy()
+
+    def afficher_rapport_demarrage(self):
+        """Affiche le temps écoulé depuis le lancement à la fin de chaque étape du démarrage."""
+        print("Temps de démarrage :")
+        for etape, duree in self.temps_demarrage.items():
+            print(f"  {etape:<10} {duree * 1000:8.1f} ms")
+
 ## Méthode des connexions et déconnexions des utilisateurs ##
     def connect_user(self):
         """Connexion de l'utilisateur ou création d'un compte si inexistant"""
@@ -237,29 +541,52 @@ class FilmCatalogueApp:
             messagebox.showerror("Erreur", "Veuillez entrer un nom d'utilisateur.") # Afficher un message d'erreur
             return
 
-        utilisateurs = charger_utilisateurs() # Charger la liste des utilisateurs
-        utilisateur_existant = next((u for u in utilisateurs if u['username'] == self.user), None) # Rechercher l'utilisateur par son nom
-
-        if not utilisateur_existant:
-            # L'utilisateur n'existe pas, on propose de le créer
-            reponse = messagebox.askyesno("Nouvel Utilisateur", f"L'utilisateur '{self.user}' n'existe pas. Voulez-vous le créer ?")
-            if reponse:  # Si l'utilisateur veut créer un compte
-                new_id = (max((u['user_id'] for u in utilisateurs), default=0) + 1) # Générer un nouvel identifiant
-                nouveau_utilisateur = { 
-                    'user_id': new_id,
-                    'username': self.user,
-                    'notes': {}
-                }
-                utilisateurs.append(nouveau_utilisateur) # Ajouter le nouvel utilisateur à la liste
-                sauvegarder_utilisateurs(utilisateurs) # Sauvegarder la liste des utilisateurs dans le fichier
-                self.user_id = new_id # Affecter l'identifiant de l'utilisateur
-                self.user_notes = {} # Initialiser les notes de l'utilisateur
-            else:
+        if self.client is not None: # Utilisateurs tenus par le service
+            try:
+                utilisateur_existant = self.client.utilisateur(self.user)
+                if not utilisateur_existant and messagebox.askyesno("Nouvel Utilisateur", f"L'utilisateur '{self.user}' n'existe pas. Voulez-vous le créer ?"):
+                    utilisateur_existant = self.client.creer_utilisateur(self.user)
+            except ErreurService as e:
+                messagebox.showerror("Erreur", str(e))
+                return
+            if not utilisateur_existant:
                 return # Si l'utilisateur ne veut pas créer un compte, on ne fait rien
-        else:
             self.user_id = utilisateur_existant['user_id'] # Affecter l'identifiant de l'utilisateur
-            self.user_notes = utilisateur_existant['notes'] # Récupérer les notes de l'utilisateur
+        else:
+            if STOCKAGE == "sqlite": # Requête sur l'index unique des noms, sans lire tous les utilisateurs
+                utilisateurs = None
+                utilisateur_existant = stockage_sqlite.trouver_utilisateur(connexion_sqlite(), self.user)
+            else:
+                # Liste lue au démarrage pour la première connexion, puis relue (utilisateurs créés sur d'autres postes)
+                utilisateurs = self.utilisateurs if self.utilisateurs is not None else charger_utilisateurs()
+                self.utilisateurs = None
+                utilisateur_existant = next((u for u in utilisateurs if u['username'] == self.user), None) # Rechercher l'utilisateur par son nom
+
+            if not utilisateur_existant:
+                # L'utilisateur n'existe pas, on propose de le créer
+                reponse = messagebox.askyesno("Nouvel Utilisateur", f"L'utilisateur '{self.user}' n'existe pas. Voulez-vous le créer ?")
+                if reponse:  # Si l'utilisateur veut créer un compte
+                    # Sans note, le nouvel utilisateur ne change aucune recommandation : il est ajouté au moteur à sa première demande
+                    with self.ecriture_locale(): # Le cache reste associé au fichier des notes réécrit
+                        if utilisateurs is None: # Une ligne insérée dans la base
+                            new_id = stockage_sqlite.creer_utilisateur(connexion_sqlite(), self.user)
+                        else:
+                            new_id = (max((u['user_id'] for u in utilisateurs), default=0) + 1) # Générer un nouvel identifiant
+                            nouveau_utilisateur = { 
+                                'user_id': new_id,
+                                'username': self.user,
+                                'notes': {}
+                            }
+                            utilisateurs.append(nouveau_utilisateur) # Ajouter le nouvel utilisateur à la liste
+                            sauvegarder_utilisateurs(utilisateurs) # Sauvegarder la liste des utilisateurs dans le fichier
+                    self.table = None # La table précalculée n'est plus à jour
+                    self.user_id = new_id # Affecter l'identifiant de l'utilisateur
+                else:
+                    return # Si l'utilisateur ne veut pas créer un compte, on ne fait rien
+            else:
+                self.user_id = utilisateur_existant['user_id'] # Affecter l'identifiant de l'utilisateur
 
+        self.user_notes = self.notes.notes_utilisateur(self.user) # Notes de l'utilisateur, tirées des notes des films
         self.login_frame.pack_forget() # Masquer le cadre de connexion
         self.filters_frame.pack(pady=10, padx=10, fill="x") # Afficher le cadre de filtres et tri
         self.scroll_frame.pack(expand=True, fill="both") # Afficher le cadre d'affichage des films
@@ -283,44 +610,44 @@ class FilmCatalogueApp:
         # Effacer le champ nom d'utilisateur
         self.username_entry.delete(0, tk.END)
 
+    def ecriture_locale(self):
+        """Contexte des écritures de ce poste dans les fichiers des notes (voir CacheRecommandations.ecriture_locale).
+
+        Le cache n'est associé aux fichiers réécrits que si aucune note n'attend d'être répercutée sur ses entrées.
+        """
+        if self.cache_reco is None: # Mode client : pas de cache local
+            return contextlib.nullcontext()
+        return self.cache_reco.ecriture_locale(not self.notes_en_attente)
+
+    def journaliser(self, evenement):
+        """Ajoute un événement au journal et le compacte quand il devient trop long."""
+        if STOCKAGE == "sqlite": # Écriture ponctuelle de la seule ligne modifiée, pas de journal
+            with self.ecriture_locale():
+                stockage_sqlite.appliquer_evenement(connexion_sqlite(), evenement)
+            return
+        with self.ecriture_locale():
+            journal.ajouter_evenement(evenement)
+        if evenement["type"] == "stock": # Déjà dans le stock en mémoire : à retirer avant la fusion (catalogue_sans_variations)
+            self.variations_stock[evenement["film"]] = self.variations_stock.get(evenement["film"], 0) + evenement["delta"]
+        self.nb_evenements += 1
+        if self.nb_evenements >= journal.SEUIL_COMPACTION:
+            self.compacter()
+
+    def compacter(self):
+        """Réécrit les fichiers JSON à partir de l'état en mémoire et vide le journal, puis enregistre les agrégats des ventes."""
+        if self.nb_evenements > 0:
+            with self.ecriture_locale(): # ListeUtilisateurs.json et le journal sont réécrits par ce poste
+                compacter_journal(self.catalogue, self.variations_stock)
+            self.nb_evenements = 0
+        if self.agregats_modifies:
+            self.agregats.sauvegarder()
+            self.agregats_modifies = False
+
 ## Méthode de gestion catalogue de films ##
+    @instrumentation.chronometre("display_films")
     def display_films(self, films):
         """Afficher les films dans le cadre avec des options de notation"""
-        for widget in self.films_frame.winfo_children(): # Parcourir les widgets  du cadre
-            widget.destroy() # Supprimer le widget
-
-        columns = 4 # Nombre de colonnes
-        row = 0 # Ligne de départ
-        col = 0 # Colonne de départ
-
-        for film in films: 
-            frame = tk.Frame(self.films_frame, bg="white", bd=2, relief="groove", width=220, height=250) # Créer un cadre pour chaque film
-            frame.grid(row=row, column=col, padx=10, pady=10) # Afficher le cadre
-            frame.pack_propagate(False) # Empêcher le cadre de changer de taille
-
-            title_label = tk.Label(frame, text=film["titre"], font=("Arial", 12, "bold"), bg="white", wraplength=200) # Ajouter un label pour le titre du film
-            title_label.pack(pady=5) # Afficher le label
-
-            info_frame = tk.Frame(frame, bg="white") # Créer un cadre pour les informations du film
-            info_frame.pack(pady=5) # Afficher le cadre
-
-            tk.Label(info_frame, text=f"Genre : {film['genre']}", font=self.default_font, bg="white", anchor="w").pack(anchor="w") # Ajouter un label pour le genre
-            tk.Label(info_frame, text=f"Année : {film['annee']}", font=self.default_font, bg="white", anchor="w").pack(anchor="w") # Ajouter un label pour l'année
-            tk.Label(info_frame, text=f"Cote : {film['cote']}", font=self.default_font, bg="white", anchor="w").pack(anchor="w") # Ajouter un label pour la cote
-            tk.Label(info_frame, text=f"Stock : {film['stock']}", font=("Arial", 10, "italic"), bg="white", anchor="w").pack(anchor="w") # Ajouter un label pour le stock
-            tk.Label(info_frame, text=f"Prix : {film['prix_unitaire']} €", font=("Arial", 10, "italic"), bg="white", anchor="w").pack(anchor="w") # Ajouter un label pour le prix
-
-            user_rating = self.user_notes.get(film["titre"], "Pas noté") # Récupérer la note de l'utilisateur pour ce film
-            rating_label = tk.Label(frame, text=f"Votre note : {user_rating}", font=("Arial", 12, "italic"), bg="white") # Ajouter un label pour la note
-            rating_label.pack(pady=5) # Afficher le label
-
-            note_btn = tk.Button(frame, text="Attribuer note", command=lambda f=film, l=rating_label: self.rate_film(f, l), bg="#007ACC", fg="white", font=self.default_font) # Ajouter un bouton pour noter le film
-            note_btn.pack(pady=5) # Afficher le bouton
-
-            col += 1 # Passer à la colonne suivante
-            if col >= columns:  # Si on atteint le nombre de colonnes
-                col = 0  # Revenir à la première colonne
-                row += 1 # Passer à la ligne suivante
+        self.grille.afficher(films) # Les cartes sont créées ou réutilisées pour les seules lignes visibles
 
     def ajouter_film(self):
         """Ouvre une fenêtre pour ajouter un film au catalogue"""
@@ -377,8 +704,9 @@ class FilmCatalogueApp:
                 messagebox.showerror("Erreur", "L'année, la quantité doivent être des entiers et la cote, le prix doivent être des nombres.") # Afficher un message d'erreur
                 return # Arrêter la fonction
 
-            self.catalogue.append({"titre": titre, "genre": genre, "annee": annee, "cote": cote, "notes": {}, "stock": stock, "prix_unitaire": prix}) # Ajouter le film au catalogue
-            exporter_catalogue(get_json_path("catalogue_films.json"), self.catalogue) # Sauvegarder le catalogue dans le fichier JSON
+            self.index.ajouter(Film.depuis_json({"titre": titre, "genre": genre, "annee": annee, "cote": cote, "notes": {}, "stock": stock, "prix_unitaire": prix}, self.notes)) # Ajouter le film au catalogue
+            with self.ecriture_locale(): # Sans note, le nouveau film ne change aucune recommandation
+                exporter_catalogue(get_json_path("catalogue_films.json"), self.catalogue, self.variations_stock) # Sauvegarder le catalogue dans le fichier JSON
             self.display_films(self.catalogue) # Afficher les films dans l'interface
             add_film_window.destroy() # Fermer la fenêtre
 
@@ -390,137 +718,201 @@ class FilmCatalogueApp:
         note = simpledialog.askfloat("Noter le film", f"Attribuez une note à '{film['titre']}' (0-10) :") # Demander à l'utilisateur de saisir une note
         if note is not None: # Vérifier que l'utilisateur a saisi une note
             if 0 <= note <= 10: # Vérifier si la note est entre 0 et 10
-                # Rechercher le film dans self.catalogue
-                for f in self.catalogue: 
-                    if f["titre"] == film["titre"]: 
-                        # S'assurer que le champ "notes" existe
-                        if "notes" not in f: # Si le champ "notes" n'existe pas
-                            f["notes"] = {} # Créer un champ "notes" vide
-
-                        # Mettre à jour la note de l'utilisateur pour ce film
-                        f["notes"][self.user] = note 
-            
-                        # Recalculer la cote comme la moyenne des notes
-                        if f["notes"]:
-                            f["cote"] = sum(f["notes"].values()) / len(f["notes"])
-                        else:
-                            f["cote"] = 0.0 # Si aucun utilisateur n'a noté le film, la cote est 0
-
-                        # Sauvegarder les modifications dans le fichier JSON du catalogue
-                        exporter_catalogue(get_json_path("catalogue_films.json"), self.catalogue)
-                        break # Sortir de la boucle
+                if self.client is not None: # Enregistrer la note auprès du service, hors du fil Tk
+                    username = self.user
+                    self.taches.soumettre(lambda tache: self.client.noter(username, film["titre"], note),
+                                          succes=lambda _: self.enregistrer_note(username, film, note),
+                                          echec=lambda e: messagebox.showerror("Erreur", str(e)))
+                else:
+                    self.enregistrer_note(self.user, film, note)
 
-                
-                # Mettre à jour le label dans l'interface
-                self.user_notes[film["titre"]] = note # Mettre à jour la note de l'utilisateur
-                label.config(text=f"Votre note : {note}") # Mettre à jour le label
+            else: # Si la note n'est pas entre 0 et 10
+                messagebox.showerror("Erreur", "La note doit être entre 0 et 10.") # Afficher un message d'erreur
 
-                # Mettre à jour l'affichage
-                self.display_films(self.catalogue)
 
-                # Mettre à jour le fichier ListeUtilisateurs.json si nécessaire
-                ajouter_note_utilisateur(self.user, film["titre"], note)
+    def enregistrer_note(self, username, film, note):
+        """Applique une note à l'index et à la carte du film, puis (données locales) au moteur et au journal."""
+        with instrumentation.mesure("rate_film"): # Mise à jour de l'index, de la grille, du journal et du moteur
+            # Enregistrer la note (self.user_notes la voit aussi) et mettre à jour la cote en O(1)
+            nouveau = film["titre"] not in self.user_notes # Nouveau film noté : les similarités changent
+            film = self.index.noter(film["titre"], username, note) or film
 
-            else: # Si la note n'est pas entre 0 et 10
-                messagebox.showerror("Erreur", "La note doit être entre 0 et 10.") # Afficher un message d'erreur
+            # Mettre à jour la carte du film (cote et "Votre note")
+            self.grille.mettre_a_jour(film)
 
+            if self.client is None:
+                # Invalider le cache avant d'écrire : il reste alors associé au journal complété
+                self.mettre_a_jour_recommandations(film["titre"], note, nouveau)
+                # Enregistrer la note dans le journal (catalogue et ListeUtilisateurs.json à la compaction)
+                self.journaliser({"type": "note", "username": username, "film": film["titre"], "note": note})
 
+    @instrumentation.chronometre("apply_filters")
     def apply_filters(self):
-        """Appliquer les filtres de genre, année et cote sur le catalogue de films."""
+        """Appliquer la recherche par titre et les filtres de genre, année et cote sur le catalogue de films."""
         genre = self.genre_filter.get().strip().lower() # Récupérer le genre
         year = self.year_filter.get().strip() # Récupérer l'année
         min_rating = self.min_rating_filter.get().strip() # Récupérer la cote minimale
 
-        filtered = self.catalogue # Copie du catalogue
-        if genre: # Filtrer par genre
-            filtered = [film for film in filtered if film["genre"].lower() == genre] 
+        y = mr = None # Critères non renseignés
         if year: # Filtrer par année
             try:
                 y = int(year) # Convertir l'année en entier
-                filtered = [film for film in filtered if film["annee"] == y] 
             except ValueError:
                 messagebox.showerror("Erreur", "L'année doit être un entier.") # Afficher un message d'erreur
                 return 
         if min_rating: # Filtrer par cote minimale
             try:
                 mr = float(min_rating) # Convertir la cote minimale en float
-                filtered = [film for film in filtered if film["cote"] >= mr]
             except ValueError:
                 messagebox.showerror("Erreur", "La cote min. doit être un nombre.") # Afficher un message d'erreur
                 return
 
+        texte = self.search_filter.get().strip() # Récupérer le texte recherché dans les titres
+        if STOCKAGE == "sqlite": # Requête sur les index de la base, films affichés pris dans l'index du catalogue
+            filtered = [film for film in map(self.index.trouver, stockage_sqlite.titres_filtres(
+                connexion_sqlite(), texte=texte, genre=genre, annee=y, cote_min=mr)) if film is not None]
+            filtered.sort(key=lambda film: self.index.rang[id(film)]) # Ordre d'affichage
+            total = len(filtered)
+        else:
+            filtered, total = self.index.rechercher(texte=texte, genre=genre, annee=y, cote_min=mr) # Recherche dans les index du catalogue
+        self.resultats_label.config(text=f"{total} film(s)") # Afficher le nombre de films trouvés
         self.display_films(filtered) # Afficher les films filtrés dans l'interface
 
+    def programmer_recherche(self):
+        """Relance la recherche DELAI_RECHERCHE ms après la dernière frappe (les frappes rapprochées n'en déclenchent qu'une)."""
+        if self.recherche_en_attente is not None: # Annuler la recherche programmée par la frappe précédente
+            self.root.after_cancel(self.recherche_en_attente)
+        self.recherche_en_attente = self.root.after(DELAI_RECHERCHE, self.lancer_recherche)
+
+    def lancer_recherche(self):
+        """Recherche programmée par programmer_recherche."""
+        self.recherche_en_attente = None
+        self.apply_filters()
+
+    @instrumentation.chronometre("sort_films")
     def sort_films(self):
         """Trier les films du catalogue par titre, année ou cote."""
         sort_by = self.sort_option.get() # Récupérer l'option de tri
         if sort_by == "titre": # Trier par titre
-            self.catalogue.sort(key=lambda x: x["titre"].lower())
+            self.index.trier(lambda x: x["titre"].lower())
         elif sort_by == "annee": # Trier par année
-            self.catalogue.sort(key=lambda x: x["annee"])
+            self.index.trier(lambda x: x["annee"])
         elif sort_by == "cote": # Trier par cote
-            self.catalogue.sort(key=lambda x: x["cote"], reverse=True)
+            self.index.trier(CLES_TRI["cote"], reverse=True) # 0 pour un film sans cote
         self.display_films(self.catalogue) # Afficher les films triés dans l'interface
 
     def importer_catalogue_interface(self):
-        """Ouvre une fenêtre pour importer un fichier JSON contenant un catalogue de films."""
+        """Ouvre une fenêtre pour importer un fichier JSON contenant un catalogue de films.
+
+        Le fichier est lu et indexé par lots dans une tâche de fond : une fenêtre indique la
+        progression et son bouton "Annuler" arrête l'import sans changer le catalogue.
+        """
         fichier = filedialog.askopenfilename(title="Sélectionnez un fichier catalogue",
                                              filetypes=[("Fichiers JSON", "*.json")]) # Ouvrir une boîte de dialogue pour sélectionner un fichier
-        if fichier: # Si un fichier est sélectionné
-            new_catalogue = importer_catalogue(fichier) # Importer le catalogue
-            if new_catalogue: # Si le catalogue est importé avec succès
-                self.catalogue = new_catalogue # Mettre à jour le catalogue
+        if not fichier: # Aucun fichier sélectionné
+            return
+
+        notes = self.notes.copie() # Notes des utilisateurs gardées ; copiées dans le fil Tk, seul à modifier les notes
+
+        def importer(tache):
+            """Lit le fichier par lots (dans un thread) ; retourne (index, nombre de films ignorés, notes réunies)."""
+            import_en_cours = ImportCatalogue(fichier, notes=notes) # Lecture par lots, films normalisés
+            def progression(fraction):
+                tache.verifier() # Arrêt entre deux lots si l'import est annulé
+                tache.signaler(fraction, f"{len(import_en_cours.index)} films importés...")
+            try:
+                return import_en_cours.executer(progression), import_en_cours.rejetes, import_en_cours.notes
+            finally:
+                if not import_en_cours.termine: # Annulé ou fichier illisible : fermer le fichier
+                    import_en_cours.annuler()
+
+        def termine(resultat):
+            """Remplace le catalogue par le catalogue importé."""
+            fenetre.fermer()
+            index, rejetes, notes = resultat
+            if len(index): # Si le catalogue est importé avec succès
+                self.index = index # Index construit pendant l'import
+                self.catalogue = self.index.films # Mettre à jour le catalogue
+                self.notes = notes # Notes des utilisateurs, complétées par celles du catalogue importé
+                self.variations_stock = {} # Stocks du fichier importé, écrits tels quels
+                if self.user:
+                    self.user_notes = self.notes.notes_utilisateur(self.user)
+                # Le moteur, la table et le cache portent sur les notes d'avant l'import
+                self.version_notes += 1
+                self.version_import = self.version_notes # Moteur reconstruit au prochain calcul
+                self.table = None
+                self.cache_reco.vider()
                 self.display_films(self.catalogue) # Afficher les films dans l'interface
-                for film in self.catalogue: # Parcourir les films du catalogue
-                    if "notes" not in film: # S'assurer que le champ "notes" existe
-                        film["notes"] = {} # Créer un champ "notes" vide
-                messagebox.showinfo("Importation", "Catalogue importé avec succès!") # Afficher un message de confirmation
+                message = "Catalogue importé avec succès!"
+                if rejetes:
+                    message += f" ({rejetes} films invalides ou en double ignorés)"
+                messagebox.showinfo("Importation", message) # Afficher un message de confirmation
             else:
                 messagebox.showerror("Erreur", "Impossible d'importer le catalogue.") # Afficher un message d'erreur
-            
+
+        def echec(erreur):
+            """Fichier absent ou illisible."""
+            fenetre.fermer()
+            messagebox.showerror("Erreur", f"Impossible d'importer le catalogue.\n{erreur}") # Afficher un message d'erreur
+
+        fenetre = FenetreProgression(self.root, "Importation", "Importation du catalogue...")
+        fenetre.suivre(self.taches.soumettre(importer, succes=termine, echec=echec, progression=fenetre.progression))
 
     def exporter_catalogue_interface(self):
-        """Ouvre une fenêtre pour exporter le catalogue de films au format JSON."""
+        """Ouvre une fenêtre pour exporter le catalogue de films au format JSON (écriture dans une tâche de fond)."""
         fichier = filedialog.asksaveasfilename(defaultextension=".json",
                                                filetypes=[("Fichiers JSON", "*.json")]) # Ouvrir une boîte de dialogue pour enregistrer le fichier
         if fichier: # Si un fichier est sélectionné
-            exporter_catalogue(fichier, self.catalogue) # Exporter le catalogue
-            messagebox.showinfo("Exportation", "Catalogue exporté avec succès!") # Afficher un message de confirmation
+            copie = enregistrements.json_liste(self.catalogue) # Copie : le catalogue peut changer pendant l'écriture
+
+            def exporter(tache):
+                exporter_catalogue(fichier, copie) # Exporter le catalogue
+
+            def termine(_):
+                fenetre.fermer()
+                messagebox.showinfo("Exportation", "Catalogue exporté avec succès!") # Afficher un message de confirmation
+
+            def echec(erreur):
+                fenetre.fermer()
+                messagebox.showerror("Erreur", f"Impossible d'exporter le catalogue.\n{erreur}") # Afficher un message d'erreur
+
+            fenetre = FenetreProgression(self.root, "Exportation", "Exportation du catalogue...")
+            fenetre.suivre(self.taches.soumettre(exporter, succes=termine, echec=echec))
 
 
 
 ## Méthodes de calcul des statistiques ##
 
-    def films_mieux_notes_par_genre(self):
-        """Retourne un dict {genre: (titre_film, cote)} du meilleur film par genre"""
+    def films_mieux_notes_par_genre(self, films=None):
+        """Retourne un dict {genre: (titre_film, cote)} du meilleur film par genre (parmi films, par défaut le catalogue)"""
         meilleur_par_genre = {} # Initialiser un dictionnaire vide
-        for film in self.catalogue: # Parcourir les films du catalogue
+        for film in (self.catalogue if films is None else films): # Parcourir les films du catalogue
             genre = film["genre"] # Récupérer le genre du film
             # S'assurer que la cote est correctement calculée
-            cote = film["cote"] 
+            cote = CLES_TRI["cote"](film) # 0 pour un film sans cote
             if genre not in meilleur_par_genre or cote > meilleur_par_genre[genre][1]: # Si le genre n'est pas dans le dictionnaire ou si la cote est supérieure
                 meilleur_par_genre[genre] = (film["titre"], cote) # Mettre à jour le meilleur film par genre
         return meilleur_par_genre # Retourner le dictionnaire
 
     def nombre_films_par_annee(self): 
         """Retourne un dict {annee: nombre_de_films}"""
-        count = {} # Initialiser un dictionnaire vide 
-        for film in self.catalogue: # Parcourir les films du catalogue
-            annee = film["annee"]  # Récupérer l'année du film
-            count[annee] = count.get(annee, 0) + 1 # Mettre à jour le nombre de films par année
-        return count # Retourner le dictionnaire
+        return {annee: len(films) for annee, films in self.index.par_annee.items()} # Taille de chaque groupe de l'index
 
     def nombre_total_films(self):
         """Retourne le nombre total de films"""
         return len(self.catalogue) # Retourner le nombre de films dans le catalogue
 
     def afficher_statistiques(self):
-        """Affiche une fenêtre avec les statistiques calculées dans une interface plus conviviale, avec une scrollbar."""
-        # Calculer les stats
-        meilleurs_films = self.films_mieux_notes_par_genre() # Meilleurs films par genre
+        """Calcule les statistiques dans une tâche de fond puis les affiche."""
+        films = list(self.catalogue) # Copie : le catalogue peut être trié ou complété pendant le calcul
         nb_par_annee = self.nombre_films_par_annee() # Nombre de films par année
         total = self.nombre_total_films() # Nombre total de films
+        self.taches.soumettre(lambda tache: self.films_mieux_notes_par_genre(films), # Meilleurs films par genre
+                              succes=lambda meilleurs_films: self.fenetre_statistiques(meilleurs_films, nb_par_annee, total),
+                              echec=lambda erreur: messagebox.showerror("Erreur", f"Calcul des statistiques impossible.\n{erreur}"))
 
+    def fenetre_statistiques(self, meilleurs_films, nb_par_annee, total):
+        """Affiche une fenêtre avec les statistiques calculées dans une interface plus conviviale, avec une scrollbar."""
         # Créer une fenêtre Toplevel pour afficher les stats
         stats_window = tk.Toplevel(self.root) # Créer une nouvelle fenêtre
         stats_window.title("Statistiques") # Définir le titre de la fenêtre
@@ -633,11 +1025,9 @@ class FilmCatalogueApp:
         def on_film_selected(event):
             """Fonction appelée lorsqu'un film est sélectionné dans la combobox"""
             titre_choisi = film_var.get() # Récupérer le titre du film choisi
-            # Trouver le film dans self.catalogue
-            for film in self.catalogue: # Parcourir les films du catalogue
-                if film["titre"] == titre_choisi: # Si le titre du film correspond
-                    prix_var.set(film.get("prix_unitaire", 0.0)) # Pré-remplir le prix unitaire
-                    break # Sortir de la boucle
+            film = self.index.trouver(titre_choisi) # Trouver le film dans l'index
+            if film is not None:
+                prix_var.set(film.get("prix_unitaire", 0.0)) # Pré-remplir le prix unitaire
 
         film_combo.bind("<<ComboboxSelected>>", on_film_selected) # Appeler la fonction on_film_selected lorsqu'un film est sélectionné
 
@@ -662,12 +1052,7 @@ class FilmCatalogueApp:
                 messagebox.showerror("Erreur", "Veuillez saisir une quantité valide.") # Afficher un message d'erreur
                 return # Arrêter la fonction
 
-            # Récupérer le film dans self.catalogue
-            film_selectionne = None # Initialiser le film sélectionné à None
-            for film in self.catalogue: # Parcourir les films du catalogue
-                if film["titre"] == titre_choisi: # Si le titre du film correspond
-                    film_selectionne = film # Mettre à jour le film sélectionné
-                    break # Sortir de la boucle
+            film_selectionne = self.index.trouver(titre_choisi) # Récupérer le film dans l'index
 
             if film_selectionne is None: # Si le film n'est pas trouvé
                 messagebox.showerror("Erreur", "Film introuvable dans le catalogue.") # Afficher un message d'erreur
@@ -681,48 +1066,91 @@ class FilmCatalogueApp:
                 messagebox.showerror("Erreur", f"Stock insuffisant. Stock actuel: {stock_actuel}")
                 return
 
-            # Mettre à jour le stock
-            film_selectionne["stock"] = stock_actuel - quantite_vendue
-
-            # Calculer le revenu total
-            prix_uni = film_selectionne.get("prix_unitaire", 0.0)
-            revenu_total = quantite_vendue * prix_uni
-
-            # Créer l'entrée de vente
-            nouvelle_vente = {
-                "date": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                "film": titre_choisi,
-                "vendeur": self.user,  # utilisateur courant
-                "quantite": quantite_vendue,
-                "prix_unitaire": prix_uni,
-                "revenu_total": revenu_total
-            }
-            self.ventes.append(nouvelle_vente) # Ajouter la vente à la liste des ventes
-            sauvegarder_ventes(self.ventes)  # mise à jour ventes.json
-
-            # Sauvegarder le catalogue mis à jour (stock modifié)
-            exporter_catalogue(get_json_path("catalogue_films.json"), self.catalogue)
+            if self.client is not None: # Vente enregistrée par le service hors du fil Tk (stock vérifié à nouveau, partagé entre les postes)
+                username = self.user
+                bouton_valider.config(state="disabled") # Une seule vente par clic
+                self.taches.soumettre(lambda tache: self.client.vendre(titre_choisi, quantite_vendue, username),
+                                      succes=lambda resultat: vente_service(film_selectionne, *resultat),
+                                      echec=echec_vente)
+                return
 
+            with instrumentation.mesure("valider_vente"): # Stock, historique, agrégats et journal
+                # Mettre à jour le stock
+                self.index.modifier_stock(titre_choisi, stock_actuel - quantite_vendue)
+
+                # Calculer le revenu total
+                prix_uni = film_selectionne.get("prix_unitaire", 0.0)
+                revenu_total = quantite_vendue * prix_uni
+
+                # Créer l'entrée de vente
+                nouvelle_vente = {
+                    "date": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                    "film": titre_choisi,
+                    "vendeur": self.user,  # utilisateur courant
+                    "quantite": quantite_vendue,
+                    "prix_unitaire": prix_uni,
+                    "revenu_total": revenu_total,
+                    "id": journal.identifiant_vente() # Distingue deux ventes identiques (rejeu du journal)
+                }
+                self.ventes.ajouter(nouvelle_vente) # Ajouter la vente à l'historique
+                self.agregats.ajouter(nouvelle_vente, film_selectionne.get("genre", "Inconnu")) # Mettre à jour les agrégats des ventes
+                self.agregats_modifies = True # Agrégats enregistrés à la prochaine compaction
+
+                # Enregistrer la vente et le nouveau stock dans le journal (ventes.json et catalogue à la compaction)
+                self.journaliser({"type": "vente", "vente": nouvelle_vente})
+                self.journaliser({"type": "stock", "film": titre_choisi, "delta": -quantite_vendue}) # Variation : les ventes des autres postes restent comptées
+
+            vente_terminee(film_selectionne)
+
+        def vente_service(film_selectionne, nouvelle_vente, stock):
+            """Répercute une vente enregistrée par le service (appelée dans le fil Tk à la fin de la tâche)."""
+            with instrumentation.mesure("valider_vente"): # Stock, historique et agrégats
+                self.index.modifier_stock(nouvelle_vente["film"], stock)
+                self.ventes.ajouter(nouvelle_vente) # Ajouter la vente à l'historique
+                self.agregats.ajouter(nouvelle_vente, film_selectionne.get("genre", "Inconnu")) # Mettre à jour les agrégats des ventes
+            vente_terminee(film_selectionne)
+
+        def echec_vente(erreur):
+            """Affiche l'erreur du service et permet de valider à nouveau."""
+            messagebox.showerror("Erreur", str(erreur))
+            if bouton_valider.winfo_exists(): # La fenêtre a pu être fermée pendant la requête
+                bouton_valider.config(state="normal")
+
+        def vente_terminee(film_selectionne):
+            """Confirme la vente, ferme la fenêtre et met à jour la carte du film vendu."""
             messagebox.showinfo("Succès", "Vente enregistrée avec succès.")
             vente_window.destroy() # Fermer la fenêtre
 
-            self.display_films(self.catalogue) # Mettre à jour l'affichage des films
+            self.grille.mettre_a_jour(film_selectionne) # Mettre à jour la carte du film vendu
 
-        tk.Button(vente_window, text="Valider la vente", bg="#007ACC", fg="white", font=font_default, command=valider_vente).pack(pady=15) # Ajouter un bouton pour valider la vente
+        bouton_valider = tk.Button(vente_window, text="Valider la vente", bg="#007ACC", fg="white", font=font_default, command=valider_vente) # Ajouter un bouton pour valider la vente
+        bouton_valider.pack(pady=15) # Afficher le bouton
 
 
     # --------------------------------------------------------------------
     # 2) HISTORIQUE DES VENTES
     # --------------------------------------------------------------------
     def afficher_historiques_ventes(self):
-        """Ouvre une nouvelle fenêtre avec un tableau (Treeview) résumant toutes les ventes passées :
+        """Ouvre une nouvelle fenêtre avec un tableau (Treeview) résumant les ventes passées :
            titre du film, date, utilisateur, quantité, prix unitaire ou total.
+           Les dates "Du" et "Au" (YYYY-MM-DD, incluses) limitent les ventes affichées.
         """
         hist_window = tk.Toplevel(self.root) # Créer une nouvelle fenêtre
         hist_window.title("Historique des ventes") # Définir le titre de la fenêtre
         hist_window.geometry("700x400") # Définir les dimensions de la fenêtre
         hist_window.configure(bg="#E8F4FF") # Définir la couleur de fond
 
+        filtre_frame = tk.Frame(hist_window, bg="#E8F4FF") # Cadre pour l'intervalle de dates
+        filtre_frame.pack(fill="x", padx=10, pady=(10, 0))
+        tk.Label(filtre_frame, text="Du :", bg="#E8F4FF").pack(side="left")
+        debut_entry = tk.Entry(filtre_frame, width=12) # Date de début (YYYY-MM-DD)
+        debut_entry.pack(side="left", padx=5)
+        tk.Label(filtre_frame, text="Au :", bg="#E8F4FF").pack(side="left")
+        fin_entry = tk.Entry(filtre_frame, width=12) # Date de fin (YYYY-MM-DD), incluse
+        fin_entry.pack(side="left", padx=5)
+        total_label = tk.Label(filtre_frame, bg="#E8F4FF") # Nombre de ventes et revenu de l'intervalle
+        total_label.pack(side="right")
+
         cols = ("date", "film", "vendeur", "quantite", "prix_unitaire", "revenu_total") # Colonnes du tableau
         tree = ttk.Treeview(hist_window, columns=cols, show='headings') # Créer un Treeview pour afficher les ventes
         tree.pack(expand=True, fill="both", padx=10, pady=10) # Afficher le Treeview
@@ -739,20 +1167,38 @@ class FilmCatalogueApp:
         for c in cols: # Parcourir les colonnes
             tree.column(c, stretch=True, width=100) # Ajuster la largeur des colonnes
 
-        # Insérer les lignes (les ventes)
-        for v in self.ventes: # Parcourir les ventes
-            tree.insert("", tk.END, values=( 
-                v.get("date", ""),
-                v.get("film", ""),
-                v.get("vendeur", ""),
-                v.get("quantite", ""),
-                v.get("prix_unitaire", ""),
-                v.get("revenu_total", "")
-            )) # Insérer une ligne dans le tableau
+        def afficher_intervalle():
+            """Affiche les ventes comprises entre les dates saisies (recherche dichotomique sur les dates)."""
+            try:
+                debut = debut_entry.get().strip() or None
+                fin = fin_entry.get().strip() or None
+                if debut is not None:
+                    debut = datetime.strptime(debut, "%Y-%m-%d").strftime("%Y-%m-%d")
+                if fin is not None: # Le jour de fin est inclus
+                    fin = (datetime.strptime(fin, "%Y-%m-%d") + timedelta(days=1)).strftime("%Y-%m-%d")
+            except ValueError:
+                messagebox.showerror("Erreur", "Les dates doivent être au format AAAA-MM-JJ.", parent=hist_window)
+                return
+            tree.delete(*tree.get_children()) # Vider le tableau
+            # Insérer les lignes (les ventes)
+            for v in self.ventes.ventes_entre(debut, fin): # Parcourir les ventes de l'intervalle
+                tree.insert("", tk.END, values=( 
+                    v.get("date", ""),
+                    v.get("film", ""),
+                    v.get("vendeur", ""),
+                    v.get("quantite", ""),
+                    v.get("prix_unitaire", ""),
+                    v.get("revenu_total", "")
+                )) # Insérer une ligne dans le tableau
+            total_label.config(text=f"{len(tree.get_children())} ventes, revenu : {self.ventes.revenu_total(debut, fin):.2f} €")
+
+        tk.Button(filtre_frame, text="Filtrer", command=afficher_intervalle).pack(side="left", padx=5)
+        afficher_intervalle()
 
     # --------------------------------------------------------------------
     # 3) ANALYSE DES VENTES (TABLEAU DE BORD + GRAPHIQUES)
     # --------------------------------------------------------------------
+    @instrumentation.chronometre("afficher_analyse_ventes")
     def afficher_analyse_ventes(self):
         """Ouvre une fenêtre avec un tableau de bord des ventes, des graphiques et des statistiques."""
         # Créer la fenêtre Toplevel
@@ -785,37 +1231,13 @@ class FilmCatalogueApp:
 
         analysis_frame.bind("<Configure>", on_frame_configure) # Appeler la fonction on_frame_configure quand le cadre est modifié
 
-        # 2) statistiques
-        total_revenu = 0.0
-        ventes_par_jour = {}         # date (YYYY-MM-DD) -> revenu du jour
-        genres_vendus = {}           # genre -> quantité totale vendue
-        ventes_par_utilisateur = {}  # username -> quantité totale vendue
-        nombre_ventes = len(self.ventes) 
-        total_films_vendus = 0
-
-        for vente in self.ventes:
-            # Revenu total
-            total_revenu += vente["revenu_total"] 
-
-            # Grouper par jour (extrait la partie "YYYY-MM-DD" de "YYYY-MM-DD HH:MM:SS")
-            date_str = vente["date"].split(" ")[0] # Extraire la date
-            ventes_par_jour[date_str] = ventes_par_jour.get(date_str, 0.0) + vente["revenu_total"] # Ajouter le revenu du jour
-
-            # Récupérer le genre du film en cherchant dans le catalogue
-            film_titre = vente["film"] # Récupérer le titre du film
-            quantite = vente["quantite"] # Récupérer la quantité vendue
-            total_films_vendus += quantite # Ajouter la quantité vendue au total
-
-            # Identifier le genre
-            for film in self.catalogue: # Parcourir les films du catalogue
-                if film["titre"] == film_titre: # Si le titre du film correspond
-                    genre = film.get("genre", "Inconnu") # Récupérer le genre du film
-                    genres_vendus[genre] = genres_vendus.get(genre, 0) + quantite # Ajouter la quantité vendue par genre
-                    break # Sortir de la boucle
-
-            # Comptabiliser les ventes par utilisateur
-            vendeur = vente.get("vendeur", "Inconnu") # Récupérer le vendeur
-            ventes_par_utilisateur[vendeur] = ventes_par_utilisateur.get(vendeur, 0) + quantite # Ajouter la quantité vendue par utilisateur
+        # 2) statistiques (agrégats tenus à jour à chaque vente)
+        total_revenu = self.agregats.total_revenu
+        ventes_par_jour = self.agregats.par_jour               # date (YYYY-MM-DD) -> revenu du jour
+        genres_vendus = self.agregats.par_genre                # genre -> quantité totale vendue
+        ventes_par_utilisateur = self.agregats.par_vendeur     # username -> quantité totale vendue
+        nombre_ventes = self.agregats.nombre_ventes
+        total_films_vendus = self.agregats.total_films_vendus
 
         # Afficher un tableau de bord textuel
         font_title = ("Arial", 16, "bold") # Police pour le titre
@@ -830,98 +1252,142 @@ class FilmCatalogueApp:
         tk.Label(board_frame, text=f"Nombre total de ventes : {nombre_ventes}", bg="#E8F4FF", font=font_default).pack(anchor="w", padx=20) # Ajouter un label pour le nombre total de ventes
         tk.Label(board_frame, text=f"Nombre total de films vendus : {total_films_vendus}", bg="#E8F4FF", font=font_default).pack(anchor="w", padx=20) # Ajouter un label pour le nombre total de films vendus
 
-        # Créer les figures matplotlib 
-        fig1 = plt.Figure(figsize=(9, 6), dpi=100) # Créer une figure pour les graphiques
-
-        # Subplot 1 : Revenu par jour (line chart)
-        ax1 = fig1.add_subplot(1,2,1)  # 2 lignes, 2 colonnes, 1ère position
-        sorted_dates = sorted(ventes_par_jour.keys()) # Trier les dates
-        x_dates = sorted_dates # Dates en abscisse
-        y_revenus = [ventes_par_jour[d] for d in x_dates] # Revenus en ordonnée
-
-        ax1.plot(x_dates, y_revenus, marker='o', color='blue') # Tracer le graphique
-        ax1.set_title("Revenu par jour") # Ajouter un titre
-        ax1.set_xlabel("Date") # Ajouter une étiquette pour l'axe des x
-        ax1.set_ylabel("Revenu (€)") # Ajouter une étiquette pour l'axe des y
-        ax1.tick_params(axis='x', rotation=45) # Faire pivoter les dates
-
-        # Subplot 2 : Ventes par genre (bar chart)
-        ax2 = fig1.add_subplot(1,2,2)  # 1 lignes, 2 colonnes, 2ème position
-        genres = list(genres_vendus.keys()) # Genres
-        q_genres = [genres_vendus[g] for g in genres] # Quantités vendues
-
-        ax2.bar(genres, q_genres, color='green') # Tracer le graphique
-        ax2.set_title("Quantité vendue par genre") # Ajouter un titre
-        ax2.set_xlabel("Genre") # Ajouter une étiquette pour l'axe des x
-        ax2.set_ylabel("Quantité") # Ajouter une étiquette pour l'axe des y
-        ax2.tick_params(axis='x', rotation=45) # Faire pivoter les genres
-
-        # figure 2 : Ventes par utilisateur
-        fig2 = plt.Figure(figsize=(9, 6), dpi=100) # Créer une nouvelle figure
-        ax3 = fig2.add_subplot(1,1,1)  # 1 ligne, 1 colonne, 1ère position
-        users = list(ventes_par_utilisateur.keys()) # Utilisateurs
-        q_users = [ventes_par_utilisateur[u] for u in users] # Quantités vendues
-
-        ax3.bar(users, q_users, color='orange') # Tracer le graphique
-        ax3.set_title("Quantité vendue par utilisateur") # Ajouter un titre
-        ax3.set_xlabel("Utilisateur")   # Ajouter une étiquette pour l'axe des x
-        ax3.set_ylabel("Quantité") # Ajouter une étiquette pour l'axe des y
-        ax3.tick_params(axis='x', rotation=45) # Faire pivoter les utilisateurs
-
-        fig1.tight_layout() # Ajuster la disposition des graphiques
-        fig2.tight_layout() # Ajuster la disposition des graphiques
-
-        # figure 3 : Stock de films
-        fig3 = plt.Figure(figsize=(9, 6), dpi=100) # Créer une nouvelle figure
-        ax4 = fig3.add_subplot(1,1,1)  # 1 ligne, 1 colonne, 1ère position
-        films_titres = [film["titre"] for film in self.catalogue] # Titres des films
-        films_stock  = [film["stock"] for film in self.catalogue] # Stock des films
-        ax4.bar(films_titres, films_stock, color='purple') # Tracer le graphique
-        ax4.set_title("Stock disponible par film") # Ajouter un titre
-        ax4.set_xlabel("Film") # Ajouter une étiquette pour l'axe des x
-        ax4.set_ylabel("Stock") # Ajouter une étiquette pour l'axe des y
-        ax4.tick_params(axis='x', rotation=90) # Faire pivoter les titres des films
-
-        fig1.tight_layout() # Ajuster la disposition des graphiques
-        fig2.tight_layout() # Ajuster la disposition des graphiques
-        fig3.tight_layout() # Ajuster la disposition des graphiques
-
-        # 5) Intégrer la figure dans Tkinter
-        canvas_fig = FigureCanvasTkAgg(fig1, master=analysis_frame) # Créer un canvas pour afficher la figure
-        canvas_fig.draw() # Afficher la figure
-        canvas_fig.get_tk_widget().pack(expand=True, fill="both", padx=10, pady=10) # Afficher le canvas
-
-        canvas_fig = FigureCanvasTkAgg(fig2, master=analysis_frame) 
-        canvas_fig.draw()
-        canvas_fig.get_tk_widget().pack(expand=True, fill="both", padx=10, pady=10)
-
-        canvas_fig = FigureCanvasTkAgg(fig3, master=analysis_frame)
-        canvas_fig.draw()
-        canvas_fig.get_tk_widget().pack(expand=True, fill="both", padx=10, pady=10)
- 
-    def lancer_recommandation(self): 
-        """Lancer le programme de recommandation externe et afficher les recommandations."""   
-        user_cible = self.user # Utilisateur cible
+        # Graphiques dessinés dans une tâche de fond, affichés dès qu'ils sont prêts
+        attente_label = tk.Label(analysis_frame, text="Génération des graphiques...", bg="#E8F4FF", font=font_default)
+        attente_label.pack(pady=10)
+        stocks = [(film["titre"], film["stock"]) for film in self.catalogue] # Stock des films
 
-        # Ecrire dans un fichier JSON
-        import json 
-        with open(get_json_path("target_user.json"),"w",encoding="utf-8") as f: # Ouvrir le fichier en écriture
-            json.dump({"target": user_cible}, f) # Ecrire le nom de l'utilisateur cible
+        def afficher_graphiques(images):
+            """Intègre les images des graphiques dans la fenêtre."""
+            attente_label.destroy()
+            for image in images:
+                photo = tk.PhotoImage(data=image, master=analysis_frame)
+                label = tk.Label(analysis_frame, image=photo, bg="#E8F4FF")
+                label.image = photo # Garder une référence à l'image
+                label.pack(expand=True, fill="both", padx=10, pady=10) # Afficher le graphique
 
-        exe_path = get_project_path("recommandation.exe")
-        result = subprocess.run([exe_path], capture_output=True, text=True) # Lancer le programme de recommandation
-        if result.returncode != 0: # Si le programme a retourné une erreur
-            messagebox.showerror("Erreur", f"Échec : {result.stderr}") # Afficher un message d'erreur
-            return  # Sortir de la fonction
-        
-        # Lire recommendations.json
+        def echec(erreur):
+            attente_label.config(text=f"Impossible de générer les graphiques : {erreur}")
+
+        tache = self.taches.soumettre(generer_graphiques, dict(ventes_par_jour), dict(genres_vendus), dict(ventes_par_utilisateur),
+                                      stocks, succes=afficher_graphiques, echec=echec)
+
+        def fermeture(event):
+            """Fenêtre fermée : les graphiques ne sont plus utiles."""
+            if event.widget is analysis_window: # L'événement est aussi reçu pour chaque widget de la fenêtre
+                tache.annuler()
+
+        analysis_window.bind("<Destroy>", fermeture)
+
+    def mettre_a_jour_recommandations(self, titre, note, nouveau):
+        """Répercute une note de l'utilisateur connecté sur le moteur et le cache de recommandations.
+
+        La note est mise en attente, puis appliquée tout de suite si aucune tâche n'utilise le moteur,
+        sinon à la fin du calcul en cours : le fil Tk n'attend jamais le verrou du moteur.
+        """
+        self.notes_en_attente.append((self.user, titre, note, nouveau))
+        self.version_notes += 1
+        self.table = None # La table précalculée n'est plus à jour
+        self.appliquer_notes_en_attente()
+
+    def appliquer_notes_en_attente(self):
+        """Applique les notes en attente au moteur et invalide les entrées du cache affectées (dans le fil Tk).
+
+        Rien n'est fait si une tâche détient le verrou du moteur, ou si le moteur n'est pas encore
+        construit (les entrées du cache ne peuvent être invalidées qu'avec lui) : les notes restent en
+        attente et le cache n'est pas lu tant qu'il y en a.
+        """
+        if (not self.notes_en_attente or self.moteur is None or self.version_moteur < self.version_import
+                or not self.verrou_moteur.acquire(blocking=False)):
+            return
         try:
-            with open(get_json_path("recommendations.json"),"r",encoding="utf-8") as f: # Ouvrir le fichier en lecture
-                data = json.load(f) # Charger les données
-        except (FileNotFoundError, json.JSONDecodeError) as e:
-            messagebox.showerror("Erreur", "Impossible de lire recommendations.json") # Afficher un message d'erreur
-            return # Sortir de la fonction
+            for username, titre, note, nouveau in self.notes_en_attente:
+                self.moteur.mettre_a_jour_note(username, titre, note) # Mise à jour incrémentale des index
+                self.cache_reco.invalider(self.moteur, username, nouveau) # Invalider les seules entrées affectées
+            self.notes_en_attente.clear()
+            self.version_moteur = self.version_notes
+        finally:
+            self.verrou_moteur.release()
+
+    @instrumentation.chronometre("recommandation")
+    def calculer_recommandations(self, tache, username, table, version, notes=None):
+        """Calcule les recommandations de username (dans une tâche de fond).
+
+        Retourne (résultat, version des notes prise en compte) ; le résultat est None si
+        l'utilisateur est introuvable. version est celle des notes au lancement du calcul, notes
+        leur copie (NotesPartagees.copie) si le moteur n'est pas encore construit ou s'il est périmé
+        par un import du catalogue. Le moteur est construit hors du verrou, qui n'est pris que
+        pendant le calcul.
+        """
+        if table is not None and RECOMMANDATION_KNN <= 0: # Lecture dans la table précalculée
+            return resultat_depuis_table(table, username), version
+        moteur = None
+        if notes is not None: # Premier calcul ou catalogue importé : construire le moteur
+            tache.signaler(None, "Chargement des notes...")
+            moteur = MoteurRecommandation(notes.utilisateurs()) # Notes de l'application à la version donnée
+            tache.verifier()
+        tache.signaler(None, "Calcul des recommandations...")
+        with self.verrou_moteur: # Le fil Tk applique les notes en attente une fois le moteur libre
+            if (moteur is not None and version >= self.version_import
+                    and (self.moteur is None or self.version_moteur < self.version_import)):
+                self.moteur, self.version_moteur = moteur, version # Remplace un moteur absent ou périmé
+            if moteur is None or (self.moteur is not None and self.version_moteur >= version):
+                moteur, version = self.moteur, self.version_moteur # Moteur partagé, à jour des notes en attente appliquées
+            if username not in moteur.index_nom: # Utilisateur créé après la construction du moteur
+                moteur.ajouter_utilisateur(username)
+            if RECOMMANDATION_KNN > 0: # Recommandations classées par score
+                return moteur.recommander_knn(username, RECOMMANDATION_KNN), version
+            return moteur.recommander(username), version # Moteur Python en mémoire
 
+    def lancer_recommandation(self): 
+        """Calculer les recommandations pour l'utilisateur connecté (dans une tâche de fond) et les afficher."""   
+        mode = f"knn{RECOMMANDATION_KNN}" if RECOMMANDATION_KNN > 0 else "plus_proche" # Clé du cache
+        username = self.user
+        if self.client is not None: # Recommandations calculées par le service
+            fenetre = FenetreProgression(self.root, "Recommandation", "Calcul des recommandations...")
+            def termine_service(data):
+                fenetre.fermer()
+                self.afficher_recommandations(data)
+            def echec_service(erreur):
+                fenetre.fermer()
+                messagebox.showerror("Erreur", str(erreur)) # Afficher un message d'erreur
+            fenetre.suivre(self.taches.soumettre(lambda tache: self.client.recommander(username, RECOMMANDATION_KNN),
+                                                 succes=termine_service, echec=echec_service))
+            return
+        self.appliquer_notes_en_attente() # Cache à jour si le moteur est libre
+        if (MOTEUR_RECOMMANDATION != "exe" and not self.notes_en_attente
+                and self.cache_reco.lire(username, mode) is not None): # Résultat déjà calculé
+            self.afficher_recommandations(self.cache_reco.lire(username, mode))
+            return
+
+        def termine(data):
+            fenetre.fermer()
+            if MOTEUR_RECOMMANDATION != "exe":
+                data, version = data
+                if data is not None and version == self.version_notes: # Moteur à jour de toutes les notes
+                    self.cache_reco.enregistrer(username, mode, data)
+                data = data or {} # Vide si l'utilisateur est introuvable
+            self.appliquer_notes_en_attente() # Notes enregistrées pendant le calcul
+            self.afficher_recommandations(data)
+
+        def echec(erreur):
+            fenetre.fermer()
+            self.appliquer_notes_en_attente()
+            messagebox.showerror("Erreur", str(erreur)) # Afficher un message d'erreur
+
+        fenetre = FenetreProgression(self.root, "Recommandation", "Calcul des recommandations...")
+        if MOTEUR_RECOMMANDATION == "exe": # Programme C externe, sur une copie des notes faite dans le fil Tk
+            tache = self.taches.soumettre(self.recommandation_executable, username, self.notes.copie(), self.preparer_executable(),
+                                          succes=termine, echec=echec, progression=fenetre.progression)
+        else:
+            # Copiée dans le fil Tk, seul à modifier les notes, si le moteur est à construire
+            notes = self.notes.copie() if self.moteur is None or self.version_moteur < self.version_import else None
+            tache = self.taches.soumettre(self.calculer_recommandations, username, self.table, self.version_notes, notes,
+                                          succes=termine, echec=echec, progression=fenetre.progression)
+        fenetre.suivre(tache)
+
+    def afficher_recommandations(self, data):
+        """Affiche les recommandations dans une boîte de dialogue."""
         recs = data.get("recommendations", []) # Récupérer les recommandations
         if not recs: # Si aucune recommandation n'est disponible
             messagebox.showinfo("Recommandation", "Aucune recommandation disponible.") # Afficher un message d'information
@@ -929,18 +1395,75 @@ class FilmCatalogueApp:
 
         txt = f"Recommandations pour {data.get('target')}:\n\n" # Texte des recommandations
         for rec in recs: # Parcourir les recommandations
-            txt += f" - {rec['titre']}\n" # Ajouter le titre du film à la liste
+            if "score" in rec: # Score prédit (mode k plus proches voisins)
+                txt += f" - {rec['titre']} (score : {rec['score']:.2f})\n"
+            else:
+                txt += f" - {rec['titre']}\n" # Ajouter le titre du film à la liste
         messagebox.showinfo("Recommandation", txt) # Afficher les recommandations dans une boîte de dialogue
 
+    def preparer_executable(self):
+        """Retourne le dossier de travail du programme de recommandation externe (créé au premier appel, supprimé en quittant).
+
+        Le programme lit et écrit ses fichiers dans Fichiers_json/ sous ce dossier : les fichiers
+        partagés du catalogue ne sont ni lus ni réécrits pour lui.
+        """
+        if self.dossier_executable is None:
+            self.dossier_executable = tempfile.TemporaryDirectory(prefix="recommandation_")
+            os.makedirs(os.path.join(self.dossier_executable.name, "Fichiers_json"))
+        return self.dossier_executable.name
+
+    @instrumentation.chronometre("recommandation_executable")
+    def recommandation_executable(self, tache, user_cible, notes, dossier):
+        """Lancer le programme de recommandation externe (dans une tâche de fond) et retourner le contenu de recommendations.json.
+
+        Le programme lit les notes du moteur Python (NotesPartagees : catalogue, utilisateurs et
+        journal, ou base SQLite), écrites au format de ListeUtilisateurs.json dans dossier.
+        """
+        fichiers = os.path.join(dossier, "Fichiers_json")
+        utilisateurs = [{"user_id": i + 1, "username": u["username"], "notes": dict(u["notes"])}
+                        for i, u in enumerate(notes.utilisateurs())]
+        stockage.ecrire_json_atomique(os.path.join(fichiers, "ListeUtilisateurs.json"), utilisateurs, indent=None)
+        tache.verifier()
+        # Ecrire dans un fichier JSON
+        stockage.ecrire_json_atomique(os.path.join(fichiers, "target_user.json"), {"target": user_cible}, indent=None) # Ecrire le nom de l'utilisateur cible
+
+        exe_path = get_project_path("recommandation.exe")
+        processus = subprocess.Popen([exe_path], stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, cwd=dossier) # Lancer le programme de recommandation
+        while True:
+            try:
+                _, erreurs = processus.communicate(timeout=0.1)
+                break
+            except subprocess.TimeoutExpired: # Toujours en cours : vérifier l'annulation
+                if tache.annulee:
+                    processus.kill()
+                    processus.communicate()
+                    tache.verifier()
+        if processus.returncode != 0: # Si le programme a retourné une erreur
+            raise RuntimeError(f"Échec : {erreurs}")
+        
+        # Lire recommendations.json
+        try:
+            with open(os.path.join(fichiers, "recommendations.json"),"r",encoding="utf-8") as f: # Ouvrir le fichier en lecture
+                return json.load(f) # Charger les données
+        except (FileNotFoundError, json.JSONDecodeError) as e:
+            raise RuntimeError("Impossible de lire recommendations.json") from e
+
 
 ## MAIN ##
-def main():
-    fichier_catalogue = get_json_path("catalogue_films.json") # Fichier JSON contenant le catalogue de films
-    catalogue = importer_catalogue(fichier_catalogue) # Importer le catalogue de films
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Catalogue de films.")
+    parser.add_argument("--rapport-demarrage", action="store_true",
+                        help="affiche les temps de démarrage (imports, interface, données) puis quitte")
+    args = parser.parse_args(argv)
 
+    instrumentation.demarrer() # Profilage et export des métriques (INSTRUMENTATION=1)
     root = tk.Tk() # Créer une fenêtre principale
-    app = FilmCatalogueApp(root, catalogue) # Créer une instance de l'application
+    client = ClientService(SERVICE_URL) if SERVICE_URL else None # Client du service HTTP, ou données locales
+    app = FilmCatalogueApp(root, client, args.rapport_demarrage) # Créer une instance de l'application (données chargées en tâche de fond)
     root.mainloop() # Lancer la boucle principale
+    app.taches.arreter() # Abandonner les tâches qui n'ont pas commencé
+    app.compacter() # Intégrer le journal aux fichiers JSON en quittant
+    instrumentation.arreter() # Écrire les métriques et le profil
 
 if __name__ == "__main__": # Si le script est exécuté en tant que programme principal
     main() # Appeler la fonction main() pour lancer l'application
@@ -0,0 +1,54 @@
+"""Matrice utilisateurs x films des films notés et similarités de Jaccard vectorisées (NumPy, optionnel)."""
+try:
+    import numpy as np
+except ImportError: # NumPy n'est pas installé : le module reste importable mais inutilisable
+    np = None
+
+try:
+    from scipy import sparse
+except ImportError: # SciPy n'est nécessaire que pour la représentation creuse
+    sparse = None
+
+
+class MatriceNotes:
+    """Films notés par chaque utilisateur, dans une matrice utilisateurs x films (1 si noté, 0 sinon).
+
+    La matrice est dense (numpy.ndarray) par défaut, ou creuse (scipy.sparse.csr_matrix) avec
+    creuse=True. Utilisée par MoteurRecommandation.calculer_table : les similarités d'un bloc
+    d'utilisateurs avec tous les autres sont obtenues en un produit de matrices.
+    """
+    def __init__(self, nb_utilisateurs, nb_films, notes, creuse=False): # Constructeur de la classe
+        if np is None:
+            raise ImportError("MatriceNotes nécessite NumPy : pip install numpy")
+        if creuse and sparse is None:
+            raise ImportError("La représentation creuse nécessite SciPy : pip install scipy")
+        self.creuse = creuse
+
+        # notes : liste de (ligne, colonne) des films notés ; un doublon compte une fois
+        lignes = np.fromiter((n[0] for n in notes), dtype=np.int64, count=len(notes))
+        colonnes = np.fromiter((n[1] for n in notes), dtype=np.int64, count=len(notes))
+        forme = (nb_utilisateurs, nb_films)
+        if creuse:
+            self.masque = sparse.csr_matrix((np.ones(len(notes)), (lignes, colonnes)), shape=forme)
+            self.masque.data[:] = 1.0 # Les doublons ont été additionnés
+        else:
+            self.masque = np.zeros(forme)
+            self.masque[lignes, colonnes] = 1.0
+
+    def _produit(self, a, lignes):
+        """Produit a[lignes] @ a.T sous forme de tableau dense (len(lignes) x nombre d'utilisateurs)."""
+        resultat = a[lignes] @ a.T
+        return resultat.toarray() if self.creuse else np.asarray(resultat)
+
+    def nombre_notes(self):
+        """Nombre de films notés par chaque utilisateur."""
+        return np.asarray(self.masque.sum(axis=1)).ravel()
+
+    def similarites_jaccard(self, lignes):
+        """Similarité de Jaccard entre les utilisateurs lignes et tous les utilisateurs."""
+        lignes = np.asarray(lignes)
+        intersection = self._produit(self.masque, lignes)
+        tailles = self.nombre_notes()
+        union = tailles[lignes][:, None] + tailles[None, :] - intersection
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(union > 0, intersection / union, 0.0) # Eviter la division par zéro
@@ -3,12 +3,13 @@
 #include <stdlib.h>
 #include <string.h>
 #include <stdbool.h>
+#include <stdint.h>
 #include "cjson/cJSON.h"  // Bibliothèque cJSON
 
-// Définition des constantes pour les tailles maximales
-#define MAX_FILMS 50
-#define MAX_USERS 50
-#define MAX_TITLE 128
+// Définition des constantes
+#define MAX_TITLE 128  // Taille maximale d'un titre de film
+#define CAPACITE_INITIALE 16  // Capacité initiale des tableaux dynamiques
+#define SEUIL_BITSET 1024  // Nombre maximal de titres pour représenter les films notés par des ensembles de bits
 
 // Fonction pour lire le nom de l'utilisateur cible à partir d'un fichier JSON
 bool lireTarget(const char *nomFichier, char *outUser, size_t maxLen)
@@ -73,17 +74,191 @@ bool lireTarget(const char *nomFichier, char *outUser, size_t maxLen)
     return true;
 }
 
+// Table des titres : chaque titre de film est stocké une seule fois et reçoit un identifiant entier
+typedef struct {
+    char **titres;     // titres[id] = titre du film
+    int    nbTitres;   // Nombre de titres enregistrés
+    int    capTitres;  // Capacité du tableau titres
+    int   *alveoles;   // Table de hachage (adressage ouvert) : identifiant ou -1 si vide
+    int    capAlveoles;  // Nombre d'alvéoles (puissance de 2)
+} TableTitres;
+
 // Définition d'une structure pour représenter un utilisateur
 typedef struct {
     int   user_id;  // Identifiant unique de l'utilisateur
     char  username[64];  // Nom d'utilisateur
     int   nbFilms;  // Nombre de films notés par l'utilisateur
-    char  filmsNotes[MAX_FILMS][MAX_TITLE];  // Tableau de titres de films notés
+    int   nbDistincts;  // Nombre de films distincts (taille de filmsTries)
+    int  *films;  // Identifiants des films notés, dans l'ordre du fichier
+    int  *filmsTries;  // Identifiants distincts triés par ordre croissant
+    uint64_t *bits;  // Ensemble de bits des films notés (NULL si le catalogue est trop grand)
 } Utilisateur;
 
+// Ensemble des utilisateurs chargés, alloué sur le tas et agrandi au besoin
+typedef struct {
+    Utilisateur *users;  // Tableau des utilisateurs
+    int          nbUsers;  // Nombre d'utilisateurs chargés
+    int          capUsers;  // Capacité du tableau
+    TableTitres  titres;  // Titres de films internés
+    int          nbMots;  // Nombre de mots de 64 bits par ensemble de bits (0 si non utilisés)
+    int         *debutsIndex;  // Index inversé : evaluateurs du film id dans indexEvaluateurs[debutsIndex[id] .. debutsIndex[id + 1]]
+    int         *indexEvaluateurs;  // Positions des utilisateurs ayant noté chaque film, par ordre croissant
+} BaseUtilisateurs;
+
+// Fonction de hachage FNV-1a d'une chaîne de caractères
+static unsigned int hacher(const char *s)
+{
+    unsigned int h = 2166136261u;
+    while (*s) {
+        h ^= (unsigned char)*s++;
+        h *= 16777619u;
+    }
+    return h;
+}
+
+// Fonction pour agrandir la table de hachage (double le nombre d'alvéoles)
+static bool agrandirAlveoles(TableTitres *t)
+{
+    int cap = t->capAlveoles ? t->capAlveoles * 2 : 64;
+    int *alveoles = (int*)malloc(sizeof(int) * cap);
+    if (!alveoles) return false;
+    for (int i = 0; i < cap; i++) alveoles[i] = -1;  // Toutes les alvéoles sont vides
+
+    // Réinsérer les identifiants existants
+    for (int id = 0; id < t->nbTitres; id++) {
+        unsigned int pos = hacher(t->titres[id]) & (cap - 1);
+        while (alveoles[pos] != -1) pos = (pos + 1) & (cap - 1);  // Sondage linéaire
+        alveoles[pos] = id;
+    }
+    free(t->alveoles);
+    t->alveoles = alveoles;
+    t->capAlveoles = cap;
+    return true;
+}
+
+// Fonction pour obtenir l'identifiant d'un titre (l'ajoute à la table s'il est nouveau), -1 en cas d'erreur
+int internerTitre(TableTitres *t, const char *titre)
+{
+    // Garder un taux de remplissage inférieur à 1/2
+    if ((t->nbTitres + 1) * 2 > t->capAlveoles && !agrandirAlveoles(t)) return -1;
+
+    // Chercher le titre dans la table
+    unsigned int pos = hacher(titre) & (t->capAlveoles - 1);
+    while (t->alveoles[pos] != -1) {
+        if (strcmp(t->titres[t->alveoles[pos]], titre) == 0) return t->alveoles[pos];  // Titre déjà connu
+        pos = (pos + 1) & (t->capAlveoles - 1);
+    }
+
+    // Nouveau titre : agrandir le tableau des titres si nécessaire
+    if (t->nbTitres == t->capTitres) {
+        int cap = t->capTitres ? t->capTitres * 2 : CAPACITE_INITIALE;
+        char **titres = (char**)realloc(t->titres, sizeof(char*) * cap);
+        if (!titres) return -1;
+        t->titres = titres;
+        t->capTitres = cap;
+    }
+
+    // Copier le titre (tronqué à MAX_TITLE - 1 caractères comme auparavant)
+    size_t len = strlen(titre);
+    if (len > MAX_TITLE - 1) len = MAX_TITLE - 1;
+    char *copie = (char*)malloc(len + 1);
+    if (!copie) return -1;
+    memcpy(copie, titre, len);
+    copie[len] = '\0';
+
+    t->titres[t->nbTitres] = copie;
+    t->alveoles[pos] = t->nbTitres;
+    return t->nbTitres++;
+}
+
+// Fonction de comparaison de deux entiers pour qsort
+static int comparerEntiers(const void *a, const void *b)
+{
+    int x = *(const int*)a, y = *(const int*)b;
+    return (x > y) - (x < y);
+}
+
+// Fonction pour libérer toute la mémoire de la base d'utilisateurs
+void libererBase(BaseUtilisateurs *base)
+{
+    for (int i = 0; i < base->nbUsers; i++) {
+        free(base->users[i].films);
+        free(base->users[i].filmsTries);
+        free(base->users[i].bits);
+    }
+    free(base->users);
+    for (int id = 0; id < base->titres.nbTitres; id++) free(base->titres.titres[id]);
+    free(base->titres.titres);
+    free(base->titres.alveoles);
+    free(base->debutsIndex);
+    free(base->indexEvaluateurs);
+    memset(base, 0, sizeof(*base));
+}
+
+// Fonction pour construire les ensembles de bits des films notés lorsque le catalogue est petit
+static void construireEnsemblesBits(BaseUtilisateurs *base)
+{
+    base->nbMots = 0;
+    if (base->titres.nbTitres == 0 || base->titres.nbTitres > SEUIL_BITSET) return;  // Garder les tableaux triés
+
+    int nbMots = (base->titres.nbTitres + 63) / 64;  // Nombre de mots de 64 bits nécessaires
+    for (int i = 0; i < base->nbUsers; i++) {
+        Utilisateur *u = &base->users[i];
+        u->bits = (uint64_t*)calloc(nbMots, sizeof(uint64_t));
+        if (!u->bits) {
+            // Mémoire insuffisante : revenir aux tableaux triés pour tout le monde
+            for (int k = 0; k < i; k++) {
+                free(base->users[k].bits);
+                base->users[k].bits = NULL;
+            }
+            return;
+        }
+        for (int j = 0; j < u->nbFilms; j++) {
+            u->bits[u->films[j] / 64] |= (uint64_t)1 << (u->films[j] % 64);  // Marquer le film comme noté
+        }
+    }
+    base->nbMots = nbMots;
+}
+
+// Fonction pour construire l'index inversé film -> utilisateurs ayant noté ce film
+static bool construireIndexInverse(BaseUtilisateurs *base)
+{
+    int nbTitres = base->titres.nbTitres;
+    base->debutsIndex = (int*)calloc(nbTitres + 1, sizeof(int));
+    if (!base->debutsIndex) return false;
+
+    // Compter le nombre d'évaluateurs de chaque film
+    long total = 0;
+    for (int i = 0; i < base->nbUsers; i++) {
+        for (int j = 0; j < base->users[i].nbDistincts; j++) base->debutsIndex[base->users[i].filmsTries[j] + 1]++;
+        total += base->users[i].nbDistincts;
+    }
+    // Transformer les comptes en positions de début (sommes cumulées)
+    for (int id = 0; id < nbTitres; id++) base->debutsIndex[id + 1] += base->debutsIndex[id];
+
+    base->indexEvaluateurs = (int*)malloc(sizeof(int) * (total > 0 ? total : 1));
+    int *positions = (int*)malloc(sizeof(int) * (nbTitres > 0 ? nbTitres : 1));
+    if (!base->indexEvaluateurs || !positions) {
+        free(positions);
+        return false;
+    }
+    memcpy(positions, base->debutsIndex, sizeof(int) * nbTitres);
+
+    // Remplir les listes : les utilisateurs sont parcourus dans l'ordre, les listes sont donc triées
+    for (int i = 0; i < base->nbUsers; i++) {
+        for (int j = 0; j < base->users[i].nbDistincts; j++) {
+            base->indexEvaluateurs[positions[base->users[i].filmsTries[j]]++] = i;
+        }
+    }
+    free(positions);
+    return true;
+}
+
 // Fonction pour charger les utilisateurs depuis un fichier JSON
-int chargerUtilisateurs(const char *filename, Utilisateur *users)
+int chargerUtilisateurs(const char *filename, BaseUtilisateurs *base)
 {
+    memset(base, 0, sizeof(*base));
+
     // Ouvrir le fichier contenant les utilisateurs
     FILE *f = fopen(filename, "rb");
     if (!f) {
@@ -111,9 +286,9 @@ int chargerUtilisateurs(const char *filename, Utilisateur *users)
 
     // Parser/transformer le contenu JSON
     cJSON *root = cJSON_Parse(buffer);
+    free(buffer);  // Le texte n'est plus nécessaire après le parsing
     if (!root) {
         printf("Erreur parse JSON ListeUtilisateurs : %s\n", cJSON_GetErrorPtr());
-        free(buffer);
         return 0;
     }
 
@@ -121,21 +296,24 @@ int chargerUtilisateurs(const char *filename, Utilisateur *users)
     if (!cJSON_IsArray(root)) {
         printf("Le JSON ListeUtilisateurs n’est pas un tableau.\n");
         cJSON_Delete(root);
-        free(buffer);
         return 0;
     }
 
-    // Extraire le nombre d'utilisateurs à partir du tableau JSON
-    int nbUsers = cJSON_GetArraySize(root);
-    if (nbUsers > MAX_USERS) nbUsers = MAX_USERS;  // Limiter à MAX_USERS utilisateurs
-
-    // Boucle pour parcourir chaque utilisateur dans le tableau JSON
-    for (int i = 0; i < nbUsers; i++) {
-        cJSON *userObj = cJSON_GetArrayItem(root, i);  // Récupérer chaque objet utilisateur
-        if (!userObj) continue;  // Si l'objet est NULL -> passer au suivant
+    // Allouer le tableau des utilisateurs à la bonne taille
+    int nbObjets = cJSON_GetArraySize(root);
+    base->capUsers = nbObjets > 0 ? nbObjets : 1;
+    base->users = (Utilisateur*)calloc(base->capUsers, sizeof(Utilisateur));
+    if (!base->users) {
+        printf("Erreur d’allocation mémoire\n");
+        cJSON_Delete(root);
+        return 0;
+    }
 
+    // Parcourir chaque utilisateur du tableau JSON (parcours chaîné, sans accès indexé en O(n))
+    cJSON *userObj = NULL;
+    cJSON_ArrayForEach(userObj, root) {
         // Initialiser l'utilisateur
-        Utilisateur *u = &users[i];
+        Utilisateur *u = &base->users[base->nbUsers];
         u->nbFilms = 0;
 
         // Extraire l'ID utilisateur et le nom
@@ -158,53 +336,171 @@ int chargerUtilisateurs(const char *filename, Utilisateur *users)
 
         // Extraire les films notés par l'utilisateur
         if (j_notes && cJSON_IsObject(j_notes)) {
-            cJSON *child = j_notes->child;  // Les films sont les éléments enfants de "notes"
-            // Parcourir les films notés
-            while (child) {
-                if (u->nbFilms < MAX_FILMS) {
-                    strncpy(u->filmsNotes[u->nbFilms], child->string, MAX_TITLE - 1);  // Stocker le titre du film
-                    u->nbFilms++;  // Incrémenter le nombre de films notés
+            int nb = cJSON_GetArraySize(j_notes);  // Nombre de films notés
+            if (nb > 0) {
+                u->films = (int*)malloc(sizeof(int) * nb);
+                u->filmsTries = (int*)malloc(sizeof(int) * nb);
+                if (!u->films || !u->filmsTries) {
+                    printf("Erreur d’allocation mémoire\n");
+                    base->nbUsers++;  // Pour que libererBase libère cet utilisateur
+                    cJSON_Delete(root);
+                    libererBase(base);
+                    return 0;
+                }
+            }
+            // Les films sont les éléments enfants de "notes"
+            cJSON *child = NULL;
+            cJSON_ArrayForEach(child, j_notes) {
+                int id = internerTitre(&base->titres, child->string);  // Identifiant du titre
+                if (id < 0) continue;  // Erreur d'allocation : ignorer ce film
+                u->films[u->nbFilms++] = id;  // Stocker l'identifiant du film
+            }
+            if (u->nbFilms > 0) {
+                memcpy(u->filmsTries, u->films, sizeof(int) * u->nbFilms);
+                qsort(u->filmsTries, u->nbFilms, sizeof(int), comparerEntiers);  // Trier pour les recherches
+                // Supprimer les doublons éventuels
+                u->nbDistincts = 1;
+                for (int j = 1; j < u->nbFilms; j++) {
+                    if (u->filmsTries[j] != u->filmsTries[u->nbDistincts - 1]) u->filmsTries[u->nbDistincts++] = u->filmsTries[j];
                 }
-                child = child->next;  // Passer au film suivant
             }
         }
+        base->nbUsers++;
     }
 
-    // Libérer la mémoire utilisée par cJSON et le buffer
+    // Libérer la mémoire utilisée par cJSON
     cJSON_Delete(root);
-    free(buffer);
+
+    // Construire les ensembles de bits si le catalogue est petit
+    construireEnsemblesBits(base);
+
+    // Construire l'index inversé film -> utilisateurs
+    if (!construireIndexInverse(base)) {
+        printf("Erreur d’allocation mémoire\n");
+        libererBase(base);
+        return 0;
+    }
 
     // Retourner le nombre d'utilisateurs chargés
-    return nbUsers;
+    return base->nbUsers;
 }
 
-// Fonction pour calculer la similarité de Jaccard entre deux utilisateurs
-float jaccard(const Utilisateur *A, const Utilisateur *B)
+// Fonction pour savoir si un utilisateur a noté un film (test de bit ou recherche dichotomique)
+static bool aNote(const Utilisateur *u, int idFilm)
+{
+    if (u->bits) return (u->bits[idFilm / 64] >> (idFilm % 64)) & 1;
+    if (u->nbDistincts == 0) return false;  // Aucun film noté
+    return bsearch(&idFilm, u->filmsTries, u->nbDistincts, sizeof(int), comparerEntiers) != NULL;
+}
+
+// Fonction pour compter les bits à 1 d'un mot de 64 bits
+static int compterBits(uint64_t x)
+{
+#if defined(__GNUC__)
+    return __builtin_popcountll(x);
+#else
+    int n = 0;
+    while (x) {
+        x &= x - 1;  // Effacer le bit à 1 le plus faible
+        n++;
+    }
+    return n;
+#endif
+}
+
+// Fonction pour compter les films notés à la fois par A et par B
+static int tailleIntersection(const BaseUtilisateurs *base, const Utilisateur *A, const Utilisateur *B)
 {
     int intersection_count = 0;
-    // Calculer l'intersection des films notés
-    for (int i = 0; i < A->nbFilms; i++) {
-        const char* filmA = A->filmsNotes[i];  // Titre du film de l'utilisateur A
-        // Chercher si ce film existe aussi pour l'utilisateur B
-        for (int j = 0; j < B->nbFilms; j++) {
-            if (strcmp(filmA, B->filmsNotes[j]) == 0) {
-                intersection_count++;  // Incrémenter si le film existe dans les deux listes
-                break;
-            }
+
+    // Petit catalogue : ET logique des ensembles de bits puis comptage des bits
+    if (A->bits && B->bits) {
+        for (int m = 0; m < base->nbMots; m++) {
+            intersection_count += compterBits(A->bits[m] & B->bits[m]);
         }
+        return intersection_count;
     }
 
+    // Sinon : fusion des deux tableaux triés
+    int i = 0, j = 0;
+    while (i < A->nbDistincts && j < B->nbDistincts) {
+        if (A->filmsTries[i] < B->filmsTries[j]) {
+            i++;
+        } else if (A->filmsTries[i] > B->filmsTries[j]) {
+            j++;
+        } else {
+            intersection_count++;  // Film présent dans les deux listes
+            i++;
+            j++;
+        }
+    }
+    return intersection_count;
+}
+
+// Fonction pour calculer la similarité de Jaccard à partir de la taille de l'intersection et des deux ensembles
+static float jaccardDepuisComptes(int intersection_count, int nbA, int nbB)
+{
     // Calculer l'union des films notés
-    int union_count = A->nbFilms + B->nbFilms - intersection_count;
+    int union_count = nbA + nbB - intersection_count;
     if (union_count == 0) return 0.0f;  // Eviter la division par zéro
 
     // Renvoyer la similarité de Jaccard (intersection / union)=formule de l'énoncé
     return (float)intersection_count / (float)union_count;
 }
 
+// Fonction pour calculer la similarité de Jaccard entre deux utilisateurs
+float jaccard(const BaseUtilisateurs *base, const Utilisateur *A, const Utilisateur *B)
+{
+    return jaccardDepuisComptes(tailleIntersection(base, A, B), A->nbDistincts, B->nbDistincts);
+}
+
+// Fonction pour trouver l'utilisateur le plus similaire à l'utilisateur idxT (-1 s'il n'y a aucun autre utilisateur)
+// Seuls les utilisateurs ayant au moins un film en commun avec la cible sont examinés grâce à l'index inversé :
+// les autres ont une similarité nulle. compteurs doit contenir nbUsers zéros et est remis à zéro en sortie,
+// touches doit pouvoir contenir nbUsers entiers.
+int plusSimilaire(const BaseUtilisateurs *base, int idxT, int *compteurs, int *touches, float *outSim)
+{
+    const Utilisateur *cible = &base->users[idxT];
+    int nbTouches = 0;
+
+    // Accumuler le nombre de films en commun avec chaque utilisateur qui a co-noté un film de la cible
+    for (int j = 0; j < cible->nbDistincts; j++) {
+        int id = cible->filmsTries[j];
+        for (int p = base->debutsIndex[id]; p < base->debutsIndex[id + 1]; p++) {
+            int i = base->indexEvaluateurs[p];
+            if (i == idxT) continue;  // Ne pas prendre en compte l'utilisateur cible
+            if (compteurs[i]++ == 0) touches[nbTouches++] = i;  // Premier film en commun
+        }
+    }
+
+    // Garder le plus similaire, le premier dans l'ordre du fichier en cas d'égalité (comme un parcours complet)
+    float bestSim = -1.0f;
+    int bestIdx = -1;
+    for (int k = 0; k < nbTouches; k++) {
+        int i = touches[k];
+        float sim = jaccardDepuisComptes(compteurs[i], cible->nbDistincts, base->users[i].nbDistincts);
+        if (sim > bestSim || (sim == bestSim && i < bestIdx)) {
+            bestSim = sim;
+            bestIdx = i;
+        }
+        compteurs[i] = 0;  // Remettre le compteur à zéro pour le prochain appel
+    }
+
+    // Aucun film en commun avec personne : toutes les similarités sont nulles, le premier autre utilisateur l'emporte
+    if (bestIdx < 0 && base->nbUsers > 1) {
+        bestIdx = (idxT == 0) ? 1 : 0;
+        bestSim = 0.0f;
+    }
+    *outSim = bestSim;
+    return bestIdx;
+}
+
 // Fonction pour recommander des films à un utilisateur en fonction de la similarité de Jaccard
-void recommander(Utilisateur *users, int nbUsers, const char *targetName)
+void recommander(const BaseUtilisateurs *base, const char *targetName)
 {
+    const Utilisateur *users = base->users;
+    int nbUsers = base->nbUsers;
+
     // Trouver l'utilisateur cible dans la liste
     int idxT = -1;
     for (int i = 0; i < nbUsers; i++) {
@@ -218,17 +514,19 @@ void recommander(Utilisateur *users, int nbUsers, const char *targetName)
         return;
     }
 
-    // Calculer la similarité de Jaccard avec tous les autres utilisateurs
-    float bestSim = -1.0f;
-    int bestIdx = -1;
-    for (int i = 0; i < nbUsers; i++) {
-        if (i == idxT) continue;  // Ne pas prendre en compte l'utilisateur cible
-        float sim = jaccard(&users[idxT], &users[i]);
-        if (sim > bestSim) {
-            bestSim = sim;
-            bestIdx = i;  // Conserver l'utilisateur le plus similaire
-        }
+    // Calculer la similarité de Jaccard avec les utilisateurs ayant des films en commun
+    int *compteurs = (int*)calloc(nbUsers, sizeof(int));
+    int *touches = (int*)malloc(sizeof(int) * nbUsers);
+    if (!compteurs || !touches) {
+        printf("Erreur d’allocation mémoire\n");
+        free(compteurs);
+        free(touches);
+        return;
     }
+    float bestSim;
+    int bestIdx = plusSimilaire(base, idxT, compteurs, touches, &bestSim);
+    free(compteurs);
+    free(touches);
     if (bestIdx < 0) {
         printf("Aucun autre utilisateur.\n");
         return;
@@ -241,22 +539,18 @@ void recommander(Utilisateur *users, int nbUsers, const char *targetName)
     const Utilisateur *bestUser = &users[bestIdx];
     const Utilisateur *targetU = &users[idxT];
 
-    char recommended[MAX_FILMS][MAX_TITLE];
+    // Au plus un film recommandé par film noté par l'utilisateur similaire
+    int *recommended = (int*)malloc(sizeof(int) * (bestUser->nbFilms > 0 ? bestUser->nbFilms : 1));
+    if (!recommended) {
+        printf("Erreur d’allocation mémoire\n");
+        return;
+    }
     int recCount = 0;
 
     for (int j = 0; j < bestUser->nbFilms; j++) {
-        const char *titre = bestUser->filmsNotes[j];
         // Vérifier si l'utilisateur cible a déjà vu ce film
-        bool dejaVu = false;
-        for (int k = 0; k < targetU->nbFilms; k++) {
-            if (strcmp(titre, targetU->filmsNotes[k]) == 0) {
-                dejaVu = true;  // Film déjà vu par l'utilisateur cible
-                break;
-            }
-        }
-        if (!dejaVu) {
-            strncpy(recommended[recCount], titre, MAX_TITLE - 1);  // Ajouter à la liste des recommandations
-            recCount++;
+        if (!aNote(targetU, bestUser->films[j])) {
+            recommended[recCount++] = bestUser->films[j];  // Ajouter à la liste des recommandations
         }
     }
 
@@ -266,7 +560,7 @@ void recommander(Utilisateur *users, int nbUsers, const char *targetName)
     } else {
         printf("Recommandations pour %s:\n", targetName);
         for (int i = 0; i < recCount; i++) {
-            printf(" - %s\n", recommended[i]);
+            printf(" - %s\n", base->titres.titres[recommended[i]]);
         }
     }
 
@@ -277,6 +571,7 @@ void recommander(Utilisateur *users, int nbUsers, const char *targetName)
     FILE *fw = fopen(cheminSortie, "w");
     if (!fw) {
         printf("Impossible de créer %s\n", cheminSortie);
+        free(recommended);
         return;
     }
     fprintf(fw, "{\n");
@@ -285,7 +580,7 @@ void recommander(Utilisateur *users, int nbUsers, const char *targetName)
     fprintf(fw, "  \"similarity\": %.3f,\n", bestSim);
     fprintf(fw, "  \"recommendations\": [\n");
     for (int i = 0; i < recCount; i++) {
-        fprintf(fw, "    { \"titre\":\"%s\" }", recommended[i]);
+        fprintf(fw, "    { \"titre\":\"%s\" }", base->titres.titres[recommended[i]]);
         if (i < recCount - 1) fprintf(fw, ",");
         fprintf(fw, "\n");
     }
@@ -293,6 +588,7 @@ void recommander(Utilisateur *users, int nbUsers, const char *targetName)
 
     printf("recommendations.json créé avec %d films recommandés.\n", recCount);
     fclose(fw);
+    free(recommended);
 }
 
 // Fonction principale du programme
@@ -307,15 +603,19 @@ int main(void)
     }
 
     // Charger les utilisateurs depuis le fichier JSON
-    Utilisateur users[MAX_USERS];
-    int nbUsers = chargerUtilisateurs("Fichiers_json/ListeUtilisateurs.json", users);
+    BaseUtilisateurs base;
+    int nbUsers = chargerUtilisateurs("Fichiers_json/ListeUtilisateurs.json", &base);
     if (nbUsers <= 0) {
         printf("Aucun utilisateur chargé.\n");
+        libererBase(&base);
         return 1;
     }
 
     // Appeler la fonction pour recommander des films
-    recommander(users, nbUsers, userName);
+    recommander(&base, userName);
+
+    // Libérer la mémoire
+    libererBase(&base);
 
     return 0;
 }
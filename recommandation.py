@@ -0,0 +1,581 @@
+"""Moteur de recommandation en Python (équivalent de recommandation.c, sans sous-processus)."""
+import argparse
+import heapq
+import json
+import os
+import sys
+from contextlib import contextmanager
+
+import enregistrements
+import journal
+import stockage
+
+# ========== CONFIGURATION DES CHEMINS ==========
+PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
+
+def get_json_path(filename):
+    """Retourne le chemin vers les fichiers JSON dans Fichiers_json/"""
+    return os.path.join(PROJECT_ROOT, "Fichiers_json", filename)
+
+# ========== FIN CONFIGURATION DES CHEMINS ==========
+
+
+# Nombre maximal de titres pour représenter les films notés par des entiers utilisés comme ensembles de bits
+SEUIL_BITSET = 1024
+# Nombre maximal de cases des tableaux denses du calcul matriciel de la table (matrice des notes sans SciPy, bloc de cibles)
+SEUIL_MATRICE = 4_000_000
+
+if hasattr(int, "bit_count"): # Python 3.10+
+    compter_bits = int.bit_count
+else:
+    def compter_bits(x):
+        """Compte les bits à 1 d'un entier positif."""
+        return bin(x).count("1")
+
+
+def jaccard(films_a, films_b):
+    """Calcule la similarité de Jaccard entre deux ensembles de films notés."""
+    intersection = len(films_a & films_b) # Films notés par les deux utilisateurs
+    union = len(films_a) + len(films_b) - intersection # Films notés par au moins un des deux
+    if union == 0:
+        return 0.0 # Eviter la division par zéro
+    return intersection / union
+
+
+class MoteurRecommandation:
+    """Moteur de recommandation chargé en mémoire, réutilisable entre plusieurs appels.
+
+    Les titres sont internés en identifiants entiers au chargement. Les films notés par chaque
+    utilisateur sont ensuite représentés par un ensemble de bits (petit catalogue) ou par un
+    ensemble d'identifiants, ce qui évite toute comparaison de chaînes dans le calcul de similarité.
+    """
+    def __init__(self, utilisateurs): # Constructeur de la classe
+        self.titres = [] # titres[id] = titre du film
+        self.id_titre = {} # titre -> identifiant entier
+        self.noms = [] # Noms d'utilisateur, dans l'ordre du fichier
+        self.films = [] # Identifiants des films notés par chaque utilisateur, dans l'ordre du fichier
+        self.valeurs = [] # Notes correspondantes (valeurs[i][j] = note du film films[i][j])
+        self.index_nom = {} # username -> position dans les listes
+        self.matrice = None # Matrice des films notés (matrice_notes.py) de calculer_table, oubliée à chaque modification
+        for u in utilisateurs: # Parcourir les utilisateurs
+            ids = [self.interner(titre) for titre in u.get("notes", {})] # Identifiants des films notés
+            self.valeurs.append([float(note) for note in u.get("notes", {}).values()])
+            if u.get("username") not in self.index_nom: # Garder la première occurrence, comme le C
+                self.index_nom[u.get("username")] = len(self.noms)
+            self.noms.append(u.get("username", "Inconnu"))
+            self.films.append(ids)
+
+        # Ensembles de bits si le catalogue est petit, ensembles d'identifiants sinon
+        self.bitset = len(self.titres) <= SEUIL_BITSET
+        if self.bitset:
+            self.ensembles = [sum(1 << i for i in set(ids)) for ids in self.films]
+        else:
+            self.ensembles = [frozenset(ids) for ids in self.films]
+        self.tailles = [len(set(ids)) for ids in self.films] # Nombre de films distincts notés
+
+        # Index inversé : evaluateurs[id] = positions des utilisateurs ayant noté le film, par ordre croissant
+        self.evaluateurs = [[] for _ in self.titres]
+        for i, ids in enumerate(self.films):
+            for id_film in set(ids):
+                self.evaluateurs[id_film].append(i)
+
+    def interner(self, titre):
+        """Retourne l'identifiant entier d'un titre (en l'ajoutant s'il est nouveau)."""
+        id_film = self.id_titre.get(titre)
+        if id_film is None: # Nouveau titre
+            id_film = len(self.titres)
+            self.id_titre[titre] = id_film
+            self.titres.append(titre)
+        return id_film
+
+    def ajouter_utilisateur(self, username):
+        """Ajoute un utilisateur sans note au moteur et retourne sa position."""
+        idx = len(self.noms)
+        self.matrice = None
+        self.index_nom.setdefault(username, idx)
+        self.noms.append(username)
+        self.films.append([])
+        self.valeurs.append([])
+        self.ensembles.append(0 if self.bitset else frozenset())
+        self.tailles.append(0)
+        return idx
+
+    def mettre_a_jour_note(self, username, titre, note):
+        """Applique une note au moteur en place, sans reconstruire les index.
+
+        Retourne True si l'ensemble des films notés par l'utilisateur a changé (nouveau film noté),
+        False si seule la valeur d'une note existante a changé (les similarités sont alors inchangées).
+        """
+        idx = self.index_nom.get(username)
+        if idx is None: # Nouvel utilisateur
+            idx = self.ajouter_utilisateur(username)
+        self.matrice = None
+        id_film = self.interner(titre)
+        if id_film == len(self.evaluateurs): # Nouveau titre
+            self.evaluateurs.append([])
+
+        if self.a_note(idx, id_film): # Film déjà noté : seule la valeur change
+            self.valeurs[idx][self.films[idx].index(id_film)] = float(note)
+            return False
+
+        # Nouveau film noté : mettre à jour l'ensemble, sa taille et l'index inversé
+        self.films[idx].append(id_film)
+        self.valeurs[idx].append(float(note))
+        if self.bitset:
+            self.ensembles[idx] |= 1 << id_film
+        else:
+            self.ensembles[idx] = self.ensembles[idx] | {id_film}
+        self.tailles[idx] += 1
+        self.evaluateurs[id_film].append(idx)
+        return True
+
+    def similarite(self, i, j):
+        """Similarité de Jaccard entre les utilisateurs aux positions i et j."""
+        if self.bitset: # ET logique puis comptage des bits
+            intersection = compter_bits(self.ensembles[i] & self.ensembles[j])
+        else:
+            intersection = len(self.ensembles[i] & self.ensembles[j])
+        union = self.tailles[i] + self.tailles[j] - intersection
+        if union == 0:
+            return 0.0 # Eviter la division par zéro
+        return intersection / union
+
+    def a_note(self, i, id_film):
+        """Indique si l'utilisateur à la position i a noté le film id_film."""
+        if self.bitset:
+            return (self.ensembles[i] >> id_film) & 1 == 1
+        return id_film in self.ensembles[i]
+
+    def intersections(self, idx_t):
+        """Retourne {position: nombre de films en commun} pour les utilisateurs ayant co-noté un film de idx_t."""
+        communs = {}
+        for id_film in set(self.films[idx_t]):
+            for i in self.evaluateurs[id_film]:
+                communs[i] = communs.get(i, 0) + 1
+        communs.pop(idx_t, None) # Ne pas prendre en compte l'utilisateur cible
+        return communs
+
+    def plus_similaire(self, idx_t):
+        """Retourne (position, similarité) de l'utilisateur le plus similaire à idx_t, ou (-1, -1.0).
+
+        Seuls les utilisateurs ayant au moins un film en commun avec la cible sont examinés ; les
+        autres ont une similarité nulle. En cas d'égalité, le premier dans l'ordre du fichier l'emporte.
+        """
+        best_sim = -1.0
+        best_idx = -1
+        taille_t = self.tailles[idx_t]
+        for i, intersection in self.intersections(idx_t).items():
+            sim = intersection / (taille_t + self.tailles[i] - intersection)
+            if sim > best_sim or (sim == best_sim and i < best_idx):
+                best_sim = sim
+                best_idx = i # Conserver l'utilisateur le plus similaire
+
+        # Aucun film en commun : toutes les similarités sont nulles, le premier autre utilisateur l'emporte
+        if best_idx < 0 and len(self.noms) > 1:
+            best_idx = 1 if idx_t == 0 else 0
+            best_sim = 0.0
+        return best_idx, best_sim
+
+    def voisins(self, idx_t, k):
+        """Retourne les k utilisateurs les plus similaires à idx_t : liste de (position, similarité).
+
+        Le premier élément est toujours celui de plus_similaire ; seuls les utilisateurs ayant un film
+        en commun avec la cible sont classés, sauf si personne n'en a (repli de plus_similaire).
+        """
+        taille_t = self.tailles[idx_t]
+        scores = ((-(intersection / (taille_t + self.tailles[i] - intersection)), i)
+                  for i, intersection in self.intersections(idx_t).items())
+        meilleurs = [(i, -score) for score, i in heapq.nsmallest(k, scores)] # Tri par similarité puis position
+        if not meilleurs and k > 0: # Aucun film en commun
+            best_idx, best_sim = self.plus_similaire(idx_t)
+            if best_idx >= 0:
+                meilleurs = [(best_idx, best_sim)]
+        return meilleurs
+
+    def films_non_vus(self, idx_t, idx_voisin):
+        """Identifiants des films notés par idx_voisin et non vus par idx_t, dans l'ordre du fichier."""
+        return [id_film for id_film in self.films[idx_voisin] if not self.a_note(idx_t, id_film)]
+
+    def recommander(self, cible):
+        """Retourne le résultat de recommandation pour l'utilisateur cible (même format que recommendations.json).
+
+        Retourne None si l'utilisateur cible est introuvable ou s'il n'y a aucun autre utilisateur.
+        """
+        idx_t = self.index_nom.get(cible) # Position de l'utilisateur cible
+        if idx_t is None:
+            return None # Utilisateur introuvable
+
+        # Chercher l'utilisateur le plus similaire (le premier en cas d'égalité, comme le C)
+        best_idx, best_sim = self.plus_similaire(idx_t)
+        if best_idx < 0:
+            return None # Aucun autre utilisateur
+
+        # Films notés par l'utilisateur similaire et non vus par l'utilisateur cible
+        recs = [{"titre": self.titres[id_film]} for id_film in self.films_non_vus(idx_t, best_idx)]
+        return {
+            "target": cible,
+            "most_similar_user": self.noms[best_idx],
+            "similarity": round(best_sim, 3),
+            "recommendations": recs
+        }
+
+    def recommander_knn(self, cible, k=10, n=10):
+        """Recommandations classées à partir des notes des k plus proches voisins.
+
+        Le score d'un film non vu est la moyenne des notes des voisins qui l'ont noté, pondérée par
+        leur similarité avec la cible. Seuls les films des k voisins sont parcourus. Retourne le
+        format de recommander, avec les voisins utilisés et un champ "score" par recommandation.
+        """
+        idx_t = self.index_nom.get(cible) # Position de l'utilisateur cible
+        if idx_t is None:
+            return None # Utilisateur introuvable
+        voisins = self.voisins(idx_t, k)
+        if not voisins:
+            return None # Aucun autre utilisateur
+
+        # Accumuler les notes pondérées des voisins (un voisin de similarité nulle a un poids nul)
+        sommes = {} # id_film -> somme des similarité * note
+        poids = {} # id_film -> somme des similarités
+        for i, sim in voisins:
+            if sim <= 0:
+                continue
+            for id_film, note in zip(self.films[i], self.valeurs[i]):
+                if self.a_note(idx_t, id_film):
+                    continue # Film déjà vu par l'utilisateur cible
+                sommes[id_film] = sommes.get(id_film, 0.0) + sim * note
+                poids[id_film] = poids.get(id_film, 0.0) + sim
+
+        # Classer par score, puis par poids total (plus de voisins d'accord), puis par titre
+        classement = heapq.nsmallest(n, ((-sommes[f] / poids[f], -poids[f], self.titres[f], f) for f in sommes))
+        best_idx, best_sim = voisins[0]
+        return {
+            "target": cible,
+            "mode": "knn",
+            "most_similar_user": self.noms[best_idx],
+            "similarity": round(best_sim, 3),
+            "neighbours": [{"username": self.noms[i], "similarity": round(sim, 3)} for i, sim in voisins],
+            "recommendations": [{"titre": self.titres[f], "score": round(-score, 2)} for score, _, _, f in classement]
+        }
+
+    def matrice_notes(self):
+        """Matrice utilisateurs x films des films notés (matrice_notes.MatriceNotes), ou None.
+
+        None si NumPy n'est pas installé, ou si la matrice dense serait trop grande et que SciPy
+        (représentation creuse) ne l'est pas. Une ligne par position, même si un nom est en double.
+        """
+        if self.matrice is None:
+            import matrice_notes # Importé au premier calcul de table : NumPy ne ralentit pas le démarrage
+            creuse = matrice_notes.sparse is not None
+            if matrice_notes.np is None or (not creuse and len(self.noms) * len(self.titres) > SEUIL_MATRICE):
+                return None
+            notes = [(i, id_film) for i, ids in enumerate(self.films) for id_film in ids]
+            self.matrice = matrice_notes.MatriceNotes(len(self.noms), len(self.titres), notes, creuse)
+        return self.matrice
+
+    def voisins_depuis_similarites(self, idx_t, sims, k):
+        """voisins(idx_t, k) à partir des similarités de idx_t avec tous les utilisateurs (ligne NumPy de MatriceNotes)."""
+        import matrice_notes
+        np = matrice_notes.np
+        sims[idx_t] = 0.0 # Ne pas prendre en compte l'utilisateur cible
+        candidats = np.flatnonzero(sims > 0) # Au moins un film en commun
+        ordre = np.lexsort((candidats, -sims[candidats]))[:max(k, 0)] # Tri par similarité puis position
+        meilleurs = [(int(candidats[o]), float(sims[candidats[o]])) for o in ordre]
+        if not meilleurs and k > 0: # Aucun film en commun : repli de plus_similaire
+            return self.voisins(idx_t, k)
+        return meilleurs
+
+    def ligne_table(self, idx_t, voisins):
+        """Ligne de la table précalculée de idx_t, à partir de ses voisins."""
+        return {
+            "voisins": [[i, round(sim, 3)] for i, sim in voisins],
+            "recommendations": self.films_non_vus(idx_t, voisins[0][0]) if voisins else []
+        }
+
+    def calculer_table(self, k=10, positions=None):
+        """Calcule les k plus proches voisins et les recommandations de plusieurs utilisateurs.
+
+        Retourne {position: {"voisins": [[position, similarité], ...], "recommendations": [id_film, ...]}}
+        pour chaque position demandée (tous les utilisateurs par défaut). Avec NumPy, les similarités
+        d'un bloc de cibles avec tous les utilisateurs sont calculées en un produit de matrices
+        (MatriceNotes.similarites_jaccard) ; le résultat est identique au calcul par utilisateur.
+        """
+        if positions is None:
+            positions = range(len(self.noms))
+        matrice = self.matrice_notes()
+        if matrice is None: # Similarités calculées utilisateur par utilisateur
+            return {idx_t: self.ligne_table(idx_t, self.voisins(idx_t, k)) for idx_t in positions}
+        positions = list(positions)
+        taille_bloc = max(1, SEUIL_MATRICE // max(1, len(self.noms))) # Tableau dense cibles x utilisateurs borné
+        lignes = {}
+        for debut in range(0, len(positions), taille_bloc):
+            bloc = positions[debut:debut + taille_bloc]
+            for idx_t, sims in zip(bloc, matrice.similarites_jaccard(bloc)):
+                lignes[idx_t] = self.ligne_table(idx_t, self.voisins_depuis_similarites(idx_t, sims, k))
+        return lignes
+
+    def table_recommandations(self, k=10, workers=1):
+        """Construit la table précalculée de tous les utilisateurs (contenu de table_recommandations.json).
+
+        Avec workers > 1 (0 = nombre de cœurs), les utilisateurs cibles sont répartis par blocs entre
+        plusieurs processus ; le résultat est identique à celui du calcul séquentiel.
+        """
+        if workers == 0:
+            workers = os.cpu_count() or 1
+        nb = len(self.noms)
+        if workers > 1 and nb > 1:
+            from concurrent.futures import ProcessPoolExecutor # Importé ici : multiprocessing ne ralentit pas le démarrage de l'application
+            lignes = {}
+            taille_bloc = max(1, -(-nb // (workers * 4))) # Plusieurs blocs par processus pour équilibrer la charge
+            blocs = [(debut, min(debut + taille_bloc, nb), k) for debut in range(0, nb, taille_bloc)]
+            with ProcessPoolExecutor(max_workers=workers, initializer=_initialiser_processus, initargs=(self,)) as executor:
+                for bloc in executor.map(_calculer_bloc, blocs): # Résultats dans l'ordre des blocs
+                    lignes.update(bloc)
+        else:
+            lignes = self.calculer_table(k)
+        return {
+            "k": k,
+            "utilisateurs": self.noms,
+            "titres": self.titres,
+            "lignes": [lignes[i] for i in range(len(self.noms))]
+        }
+
+
+## Cache des recommandations ##
+class CacheRecommandations:
+    """Cache persistant des résultats de recommandation, par utilisateur et par mode de calcul.
+
+    Une entrée n'est invalidée que si la note enregistrée peut la modifier : quand l'ensemble des
+    films notés par un utilisateur change, ses entrées, celles des utilisateurs qui ont un film en
+    commun avec lui et celles qui dépendent de lui comme voisin ; quand seule la valeur d'une note
+    change, les entrées k-NN qui l'utilisent comme voisin.
+
+    Le cache est associé aux dates de modification des fichiers des notes (source_mtime). Les
+    écritures de ce poste passent par ecriture_locale() : le cache reste alors associé aux fichiers
+    réécrits (journal complété, compaction), et n'est abandonné au démarrage suivant que si un autre
+    poste a modifié les notes.
+    """
+    def __init__(self, fichier=None, sources=None, sauvegarde_auto=True): # Constructeur de la classe
+        self.fichier = fichier or get_json_path("cache_recommandations.json") # Fichier du cache
+        self.sauvegarde_auto = sauvegarde_auto # False : le propriétaire appelle sauvegarder() lui-même (écritures groupées)
+        self.sources = sources or sources_notes() # Fichiers dont dépendent les notes
+        self.entrees = {} # username -> {mode: résultat}
+        self.source_mtime = self.date_source() # Version des fichiers des notes à laquelle correspondent les entrées
+        try:
+            with open(self.fichier, 'r', encoding='utf-8') as f: # Ouvrir le fichier en mode lecture
+                data = json.load(f)
+            if data.get("source_mtime") == self.source_mtime: # Ignorer un cache calculé sur d'autres notes
+                self.entrees = data.get("entrees", {})
+        except (OSError, json.JSONDecodeError, AttributeError):
+            pass # Cache absent ou invalide : repartir d'un cache vide
+
+    def date_source(self):
+        """Dates de modification des fichiers des notes (None pour un fichier absent)."""
+        return [os.path.getmtime(f) if os.path.exists(f) else None for f in self.sources]
+
+    def sauvegarder(self, entrees=None):
+        """Écrit le cache dans son fichier, associé à la version des fichiers des notes de ses entrées.
+
+        entrees : copie des entrées à écrire (voir copie_entrees), par défaut self.entrees.
+        """
+        entrees = self.entrees if entrees is None else entrees
+        stockage.ecrire_json_atomique(self.fichier, {"source_mtime": self.source_mtime, "entrees": entrees},
+                                      indent=None, separators=(",", ":"))
+
+    @contextmanager
+    def ecriture_locale(self, a_jour=True):
+        """Contexte d'une écriture de ce poste dans les fichiers des notes (journal, compaction, utilisateurs).
+
+        Si le cache correspondait aux fichiers avant l'écriture (aucun autre poste ne les a modifiés
+        depuis) et que a_jour est vrai (les notes écrites ont déjà invalidé les entrées affectées),
+        il est associé aux fichiers réécrits ; sinon il sera abandonné au prochain démarrage.
+        """
+        a_jour = a_jour and self.source_mtime == self.date_source()
+        yield
+        if a_jour:
+            self.source_mtime = self.date_source()
+            if self.sauvegarde_auto:
+                self.sauvegarder()
+
+    def copie_entrees(self):
+        """Copie des entrées, à écrire par sauvegarder() pendant que le cache continue d'être modifié."""
+        return {username: dict(modes) for username, modes in self.entrees.items()}
+
+    def lire(self, username, mode):
+        """Retourne le résultat en cache, ou None."""
+        return self.entrees.get(username, {}).get(mode)
+
+    def enregistrer(self, username, mode, resultat):
+        """Ajoute un résultat au cache et le sauvegarde."""
+        self.entrees.setdefault(username, {})[mode] = resultat
+        if self.sauvegarde_auto:
+            self.sauvegarder()
+
+    def invalider(self, moteur, username, ensemble_modifie):
+        """Invalide les entrées affectées par une nouvelle note de username (déjà appliquée au moteur)."""
+        touches = set() # Utilisateurs dont toutes les entrées sont invalidées
+        if ensemble_modifie:
+            idx = moteur.index_nom[username]
+            touches.add(username)
+            touches.update(moteur.noms[i] for i in moteur.intersections(idx)) # Similarités modifiées
+
+        for nom in list(self.entrees):
+            if nom in touches:
+                del self.entrees[nom]
+                continue
+            for mode, resultat in list(self.entrees[nom].items()):
+                if resultat.get("mode") == "knn":
+                    dependances = {v["username"] for v in resultat.get("neighbours", [])}
+                    depend = username in dependances # Les notes des voisins entrent dans le score
+                else:
+                    depend = ensemble_modifie and resultat.get("most_similar_user") == username
+                if depend:
+                    del self.entrees[nom][mode]
+        if self.sauvegarde_auto:
+            self.sauvegarder() # Toujours sauvegarder : le fichier des notes vient de changer
+
+    def vider(self):
+        """Supprime toutes les entrées, et détache le cache des fichiers des notes (notes remplacées en mémoire par un import).
+
+        Les résultats calculés ensuite ne correspondent plus aux fichiers : ils ne seront pas relus au prochain démarrage.
+        """
+        self.entrees = {}
+        self.source_mtime = None
+        if self.sauvegarde_auto:
+            self.sauvegarder()
+
+
+## Calcul parallèle ##
+_moteur_processus = None # Copie du moteur dans chaque processus de travail
+
+def _initialiser_processus(moteur):
+    """Initialise un processus de travail avec une copie du moteur."""
+    global _moteur_processus
+    _moteur_processus = moteur
+
+def _calculer_bloc(bloc):
+    """Calcule les lignes de la table pour les positions [debut, fin) dans un processus de travail."""
+    debut, fin, k = bloc
+    return _moteur_processus.calculer_table(k, range(debut, fin))
+
+
+def recommander(utilisateurs, cible):
+    """Calcule les recommandations pour un utilisateur à partir de la liste des utilisateurs."""
+    return MoteurRecommandation(utilisateurs).recommander(cible)
+
+
+def sauvegarder_recommandations(resultat, fichier=None):
+    """Écrit le résultat dans Fichiers_json/recommendations.json (format du programme C)."""
+    if fichier is None:
+        fichier = get_json_path("recommendations.json")
+    stockage.ecrire_json_atomique(fichier, resultat, indent=2) # Écrire le résultat dans le fichier JSON
+
+
+def sources_notes():
+    """Fichiers d'où proviennent les notes : catalogue_films.json, ListeUtilisateurs.json et le journal des modifications."""
+    return [get_json_path("catalogue_films.json"), get_json_path("ListeUtilisateurs.json"), journal.chemin_journal()]
+
+
+def charger_notes_utilisateurs():
+    """Charge les notes des deux fichiers complétés par le journal, rangées comme dans l'application.
+
+    Les notes du catalogue et de ListeUtilisateurs.json sont réunies dans un NotesPartagees (voir
+    enregistrements.charger) : la table précalculée donne les mêmes résultats que le moteur de
+    l'application et du service. Retourne NotesPartagees.utilisateurs().
+    """
+    with open(get_json_path("catalogue_films.json"), 'r', encoding='utf-8') as f: # Charger le catalogue
+        catalogue = json.load(f)
+    with open(get_json_path("ListeUtilisateurs.json"), 'r', encoding='utf-8') as f: # Charger les utilisateurs
+        utilisateurs = json.load(f)
+    journal.rejouer(catalogue=catalogue, utilisateurs=utilisateurs)
+    return enregistrements.charger(catalogue, utilisateurs)[2].utilisateurs()
+
+
+## Table précalculée (mode batch) ##
+def sauvegarder_table(table, fichier=None):
+    """Écrit la table précalculée dans Fichiers_json/table_recommandations.json (format compact)."""
+    if fichier is None:
+        fichier = get_json_path("table_recommandations.json")
+    stockage.ecrire_json_atomique(fichier, table, indent=None, separators=(",", ":")) # Pas d'indentation : fichier compact
+
+
+def charger_table(fichier=None, sources=None):
+    """Charge la table précalculée, ou retourne None si elle est absente, invalide ou plus ancienne que les notes."""
+    if fichier is None:
+        fichier = get_json_path("table_recommandations.json")
+    if sources is None:
+        sources = sources_notes()
+    try:
+        if any(os.path.exists(s) and os.path.getmtime(fichier) < os.path.getmtime(s) for s in sources):
+            return None # Les notes ont changé depuis le calcul de la table
+        with open(fichier, 'r', encoding='utf-8') as f: # Ouvrir le fichier en mode lecture
+            table = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None # Table absente ou invalide
+    table["index_nom"] = {} # username -> position (première occurrence, comme le moteur)
+    for i, nom in enumerate(table["utilisateurs"]):
+        table["index_nom"].setdefault(nom, i)
+    return table
+
+
+def resultat_depuis_table(table, cible):
+    """Retourne le résultat de recommandation de cible lu dans la table (même format que MoteurRecommandation.recommander)."""
+    idx_t = table["index_nom"].get(cible)
+    if idx_t is None:
+        return None # Utilisateur introuvable
+    ligne = table["lignes"][idx_t]
+    if not ligne["voisins"]:
+        return None # Aucun autre utilisateur
+    best_idx, best_sim = ligne["voisins"][0]
+    return {
+        "target": cible,
+        "most_similar_user": table["utilisateurs"][best_idx],
+        "similarity": best_sim,
+        "recommendations": [{"titre": table["titres"][id_film]} for id_film in ligne["recommendations"]]
+    }
+
+
+## MAIN ##
+def main(argv=None):
+    """Équivalent en ligne de commande de recommandation.exe : target_user.json -> recommendations.json
+
+    Avec --tous, calcule la table de tous les utilisateurs (table_recommandations.json).
+    """
+    parser = argparse.ArgumentParser(description="Recommandation de films par similarité de Jaccard.")
+    parser.add_argument("cible", nargs="?", help="utilisateur cible (par défaut : target_user.json)")
+    parser.add_argument("--tous", action="store_true", help="précalculer la table de tous les utilisateurs")
+    parser.add_argument("-k", type=int, default=10, help="nombre de voisins conservés par utilisateur (mode --tous)")
+    parser.add_argument("--knn", type=int, default=0, metavar="K",
+                        help="classer les recommandations avec les notes des K plus proches voisins")
+    parser.add_argument("-n", type=int, default=10, help="nombre de recommandations en mode --knn")
+    parser.add_argument("--workers", type=int, default=1, help="nombre de processus pour le mode --tous (0 = tous les cœurs)")
+    args = parser.parse_args(argv)
+
+    moteur = MoteurRecommandation(charger_notes_utilisateurs())
+
+    if args.tous: # Mode batch
+        table = moteur.table_recommandations(args.k, args.workers)
+        sauvegarder_table(table)
+        print(f"table_recommandations.json créé pour {len(table['utilisateurs'])} utilisateurs (k={args.k}).")
+        return 0
+
+    cible = args.cible
+    if cible is None: # Lire target_user.json comme le programme C
+        with open(get_json_path("target_user.json"), 'r', encoding='utf-8') as f:
+            cible = json.load(f).get("target", "")
+
+    if args.knn > 0: # Recommandations classées avec score
+        resultat = moteur.recommander_knn(cible, args.knn, args.n)
+    else: # Plus proche voisin unique, comme recommandation.exe
+        resultat = moteur.recommander(cible)
+    if resultat is None:
+        print(f"Aucune recommandation possible pour {cible}.", file=sys.stderr)
+        return 1
+
+    print(f"Le plus similaire à {cible} est {resultat['most_similar_user']} (sim={resultat['similarity']:.3f})")
+    for rec in resultat["recommendations"]:
+        print(f" - {rec['titre']}" + (f" (score {rec['score']:.2f})" if "score" in rec else ""))
+    sauvegarder_recommandations(resultat)
+    return 0
+
+if __name__ == "__main__": # Si le script est exécuté en tant que programme principal
+    sys.exit(main())
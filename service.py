@@ -0,0 +1,460 @@
+"""Service sans interface graphique : catalogue, notes, ventes, statistiques et recommandations via une API HTTP/JSON locale.
+
+Lancement : python service.py [--hote 127.0.0.1] [--port 8765]
+L'application Tk peut l'utiliser comme serveur (variable d'environnement SERVICE_URL).
+"""
+import argparse
+import asyncio
+import json
+import signal
+import threading
+import traceback
+from datetime import datetime
+from urllib.parse import parse_qs, urlsplit
+
+import enregistrements
+import instrumentation
+import journal
+import main as application
+import stockage
+import stockage_sqlite
+from agregats_ventes import AgregatsVentes
+from enregistrements import NotesPartagees, Utilisateur
+from index_catalogue import IndexCatalogue, CLES_TRI
+from recommandation import MoteurRecommandation, CacheRecommandations, charger_table, resultat_depuis_table
+
+# Adresse d'écoute par défaut (locale uniquement)
+HOTE = "127.0.0.1"
+PORT = 8765
+# Délai maximal (en secondes) avant l'écriture des événements en attente
+DELAI_ECRITURE = 1.0
+# Nombre d'événements en attente déclenchant une écriture immédiate
+TAILLE_LOT_ECRITURE = 100
+
+RAISONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 500: "Internal Server Error"}
+
+
+class Introuvable(LookupError):
+    """Film ou utilisateur inexistant (réponse 404)."""
+
+
+class EtatCatalogue:
+    """Données de l'application gardées en mémoire par le service.
+
+    Chaque opération modifie immédiatement l'état en mémoire ; les événements correspondants (même
+    format que le journal) sont mis en attente et écrits par lots, puis le journal est compacté
+    au-delà de journal.SEUIL_COMPACTION événements, comme dans l'application. Un lot est préparé
+    dans la boucle asyncio (preparer_ecriture : copies, sans entrée-sortie) puis écrit dans un
+    thread (ecrire_lot), pour que la boucle continue de répondre pendant l'écriture.
+    Films et utilisateurs sont des enregistrements compacts (enregistrements.py) dont les notes sont
+    rangées une seule fois dans self.notes. Les méthodes sont appelées depuis la boucle asyncio,
+    sauf recommander(), mettre_a_jour_moteur() et ecrire_lot() (threads).
+    """
+    def __init__(self): # Constructeur de la classe
+        self.notes = NotesPartagees() # Notes du catalogue et des utilisateurs, sans doublon
+        films, self.utilisateurs, _ = enregistrements.charger(
+            application.charger_catalogue(), application.charger_utilisateurs(), self.notes)
+        self.index = IndexCatalogue(films)
+        self.ventes = application.charger_historique_ventes()
+        self.agregats = AgregatsVentes.charger(self.ventes, self.index.trouver)
+        self.par_nom = {u["username"]: u for u in self.utilisateurs} # username -> utilisateur
+        self.en_attente = [] # Événements pas encore écrits
+        self.utilisateurs_crees = False # Utilisateurs créés sans note, à écrire dans ListeUtilisateurs.json
+        self.agregats_modifies = False
+        self.variations_stock = {} # titre -> variations de stock journalisées (voir application.catalogue_sans_variations)
+        self.nb_evenements = journal.nombre_evenements() if application.STOCKAGE == "json" else 0
+        self.moteur = MoteurRecommandation(self.utilisateurs) # Moteur de recommandation, tenu à jour à chaque note
+        self.verrou_moteur = threading.Lock() # Le moteur est utilisé par les threads de recommandation
+        self.verrou_cache = threading.Lock() # Cache des recommandations, tenu brièvement (pris après verrou_moteur)
+        self.verrou_ecriture = threading.Lock() # Un seul lot écrit à la fois, dans l'ordre de préparation
+        if application.STOCKAGE == "sqlite":
+            self.table = None
+            self.cache_reco = CacheRecommandations(sources=[stockage_sqlite.chemin_base()], sauvegarde_auto=False)
+        else:
+            self.table = charger_table()
+            self.cache_reco = CacheRecommandations(sauvegarde_auto=False)
+        self.cache_modifie = False
+        self.notes_a_repercuter = 0 # Notes enregistrées pas encore répercutées sur le cache (mettre_a_jour_moteur)
+
+    ## Lecture ##
+    @instrumentation.chronometre("service.rechercher")
+    def rechercher(self, texte=None, prefixe=None, genre=None, annee=None, cote_min=None,
+                   tri=None, decroissant=False, debut=0, limite=None):
+        """Films correspondant aux critères (voir IndexCatalogue.rechercher) : {"films": [...], "total": n}."""
+        if tri is not None and tri not in CLES_TRI:
+            raise ValueError(f"tri inconnu : {tri}")
+        films, total = self.index.rechercher(texte, prefixe, genre, annee, cote_min, tri, decroissant, debut, limite)
+        return {"films": films, "total": total}
+
+    def film(self, titre):
+        """Film portant ce titre."""
+        film = self.index.trouver(titre)
+        if film is None:
+            raise Introuvable(f"Film introuvable : {titre}")
+        return film
+
+    def utilisateur(self, username):
+        """Utilisateur et ses notes."""
+        utilisateur = self.par_nom.get(username)
+        if utilisateur is None:
+            raise Introuvable(f"Utilisateur introuvable : {username}")
+        return utilisateur
+
+    def historique(self, debut=None, fin=None):
+        """Ventes datées de debut (inclus) à fin (exclu) et leur revenu total."""
+        return {"ventes": self.ventes.ventes_entre(debut, fin), "revenu_total": self.ventes.revenu_total(debut, fin)}
+
+    def statistiques(self):
+        """Statistiques du catalogue (comme la fenêtre Statistiques) et agrégats des ventes."""
+        meilleurs = {} # genre -> meilleur film
+        for film in self.index.films:
+            genre = film["genre"]
+            cote = CLES_TRI["cote"](film) # 0 pour un film sans cote
+            if genre not in meilleurs or cote > meilleurs[genre]["cote"]:
+                meilleurs[genre] = {"titre": film["titre"], "cote": cote}
+        return {
+            "nombre_films": len(self.index),
+            "films_par_annee": {str(annee): len(films) for annee, films in sorted(self.index.par_annee.items())},
+            "meilleurs_par_genre": meilleurs,
+            "ventes": self.agregats.en_dict(),
+        }
+
+    ## Modifications ##
+    def creer_utilisateur(self, username):
+        """Crée un utilisateur sans note (ValueError s'il existe déjà)."""
+        if not isinstance(username, str):
+            raise ValueError("Le nom d'utilisateur doit être une chaîne de caractères.")
+        username = username.strip()
+        if not username:
+            raise ValueError("Nom d'utilisateur vide.")
+        if username in self.par_nom:
+            raise ValueError(f"L'utilisateur '{username}' existe déjà.")
+        utilisateur = self.ajouter_utilisateur(username)
+        self.utilisateurs_crees = True
+        return utilisateur
+
+    def ajouter_utilisateur(self, username):
+        """Ajoute un utilisateur à la liste en mémoire ; ses notes sont celles de self.notes."""
+        utilisateur = Utilisateur(max((u["user_id"] for u in self.utilisateurs), default=0) + 1,
+                                  username, self.notes.notes_utilisateur(username))
+        self.utilisateurs.append(utilisateur)
+        self.par_nom[username] = utilisateur
+        return utilisateur
+
+    @instrumentation.chronometre("service.noter")
+    def noter(self, username, titre, note):
+        """Enregistre la note (entre 0 et 10) d'un utilisateur ; l'utilisateur est créé s'il n'existe pas."""
+        if not isinstance(username, str):
+            raise ValueError("Le nom d'utilisateur doit être une chaîne de caractères.")
+        if not username:
+            raise ValueError("Nom d'utilisateur vide.")
+        note = float(note)
+        if not 0 <= note <= 10:
+            raise ValueError("La note doit être entre 0 et 10.")
+        film = self.index.noter(titre, username, note) # Note rangée dans self.notes : l'utilisateur la voit aussi
+        if film is None:
+            raise Introuvable(f"Film introuvable : {titre}")
+        if username not in self.par_nom: # Nouvel utilisateur, comme journal.appliquer_note_utilisateur
+            self.ajouter_utilisateur(username)
+        self.en_attente.append({"type": "note", "username": username, "film": titre, "note": note})
+        self.table = None # La table précalculée n'est plus à jour
+        with self.verrou_cache:
+            self.notes_a_repercuter += 1
+        return film
+
+    @instrumentation.chronometre("service.mettre_a_jour_moteur")
+    def mettre_a_jour_moteur(self, username, titre, note):
+        """Répercute une note sur le moteur et le cache de recommandations (dans un thread)."""
+        try:
+            with self.verrou_moteur:
+                ensemble_modifie = self.moteur.mettre_a_jour_note(username, titre, note) # Mise à jour incrémentale des index
+                with self.verrou_cache:
+                    self.cache_reco.invalider(self.moteur, username, ensemble_modifie) # Invalider les seules entrées affectées
+                    self.cache_modifie = True
+        finally:
+            with self.verrou_cache:
+                self.notes_a_repercuter -= 1
+
+    @instrumentation.chronometre("service.vendre")
+    def vendre(self, titre, quantite, vendeur):
+        """Enregistre une vente et met à jour le stock ; retourne la vente."""
+        film = self.film(titre)
+        quantite = int(quantite)
+        if quantite <= 0:
+            raise ValueError("La quantité doit être supérieure à 0.")
+        if quantite > film.get("stock", 0):
+            raise ValueError(f"Stock insuffisant. Stock actuel: {film.get('stock', 0)}")
+        self.index.modifier_stock(titre, film.get("stock", 0) - quantite)
+        prix_uni = film.get("prix_unitaire", 0.0)
+        vente = {
+            "date": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "film": titre,
+            "vendeur": vendeur,
+            "quantite": quantite,
+            "prix_unitaire": prix_uni,
+            "revenu_total": quantite * prix_uni,
+            "id": journal.identifiant_vente(), # Distingue deux ventes identiques (rejeu du journal)
+        }
+        self.ventes.ajouter(vente)
+        self.agregats.ajouter(vente, film.get("genre", "Inconnu"))
+        self.agregats_modifies = True
+        self.en_attente.append({"type": "vente", "vente": vente})
+        self.en_attente.append({"type": "stock", "film": titre, "delta": -quantite}) # Variation : les ventes des postes restent comptées
+        self.variations_stock[titre] = self.variations_stock.get(titre, 0) - quantite
+        return vente
+
+    @instrumentation.chronometre("service.recommander")
+    def recommander(self, username, knn=0):
+        """Recommandations pour username (dans un thread) : plus proche voisin, ou k plus proches voisins si knn > 0."""
+        if username not in self.par_nom:
+            raise Introuvable(f"Utilisateur introuvable : {username}")
+        mode = f"knn{knn}" if knn > 0 else "plus_proche" # Clé du cache
+        with self.verrou_cache:
+            data = self.cache_reco.lire(username, mode)
+        if data is not None:
+            return data
+        with self.verrou_moteur:
+            if self.table is not None and knn <= 0: # Lecture dans la table précalculée
+                data = resultat_depuis_table(self.table, username)
+            else:
+                data = self.moteur.recommander_knn(username, knn) if knn > 0 else self.moteur.recommander(username)
+            if data is not None: # Calculé sous verrou_moteur : aucune note appliquée entre-temps
+                with self.verrou_cache:
+                    self.cache_reco.enregistrer(username, mode, data)
+                    self.cache_modifie = True
+        return data or {}
+
+    ## Persistance ##
+    def preparer_ecriture(self):
+        """Prend les événements en attente et copie les données à écrire avec eux (dans la boucle asyncio).
+
+        Retourne le lot à passer à ecrire_lot() : événements, utilisateurs créés, catalogue et
+        agrégats si le journal doit être compacté, entrées du cache de recommandations.
+        """
+        lot = {"evenements": self.en_attente}
+        self.en_attente = []
+        if application.STOCKAGE == "json":
+            self.nb_evenements += len(lot["evenements"])
+        if self.utilisateurs_crees:
+            lot["utilisateurs"] = enregistrements.json_liste(self.utilisateurs)
+            self.utilisateurs_crees = False
+        if self.nb_evenements >= journal.SEUIL_COMPACTION:
+            lot.update(self.preparer_compaction())
+        self.preparer_cache(lot)
+        return lot
+
+    def preparer_cache(self, lot):
+        """Ajoute au lot les entrées du cache si elles ont changé, ou si le lot réécrit les fichiers des notes.
+
+        lot["cache_a_jour"] indique si toutes les notes du lot ont déjà invalidé les entrées affectées :
+        le cache peut alors rester associé aux fichiers réécrits (CacheRecommandations.ecriture_locale).
+        """
+        ecrit_notes = bool(lot.get("evenements")) or "utilisateurs" in lot or "catalogue" in lot
+        with self.verrou_cache: # Modifié par les threads de recommandation
+            lot["cache_a_jour"] = self.notes_a_repercuter == 0
+            if self.cache_modifie or (ecrit_notes and lot["cache_a_jour"]):
+                lot["cache"] = self.cache_reco.copie_entrees()
+                self.cache_modifie = False
+
+    def preparer_compaction(self):
+        """Copie du catalogue (si le journal n'est pas vide) et des agrégats modifiés, à écrire par ecrire_lot()."""
+        lot = {}
+        if self.nb_evenements > 0:
+            lot["catalogue"] = application.catalogue_sans_variations(self.index.films, self.variations_stock)
+            self.nb_evenements = 0
+        if self.agregats_modifies:
+            lot["agregats"] = self.agregats.en_dict()
+            self.agregats_modifies = False
+        return lot
+
+    @instrumentation.chronometre("service.ecrire_lot")
+    def ecrire_lot(self, lot):
+        """Écrit un lot préparé : événements (journal ou base SQLite), utilisateurs, compaction, agrégats, puis le cache."""
+        with self.verrou_ecriture:
+            with self.cache_reco.ecriture_locale(lot.get("cache_a_jour", False)): # Fichiers des notes réécrits par le service
+                if application.STOCKAGE == "sqlite":
+                    for evenement in lot.get("evenements", ()): # Écriture ponctuelle de chaque ligne modifiée
+                        stockage_sqlite.appliquer_evenement(application.connexion_sqlite(), evenement)
+                elif lot.get("evenements"):
+                    journal.ajouter_evenements(lot["evenements"])
+                if "utilisateurs" in lot:
+                    application.sauvegarder_utilisateurs(lot["utilisateurs"])
+                if "catalogue" in lot: # Après les événements du lot : le journal est intégré en entier
+                    application.compacter_journal(lot["catalogue"])
+            if "agregats" in lot:
+                self.agregats.sauvegarder(lot["agregats"])
+            if "cache" in lot: # En dernier : associé aux fichiers des notes tels qu'écrits
+                self.cache_reco.sauvegarder(lot["cache"])
+
+    def ecrire_en_attente(self):
+        """Écrit les événements en attente sans quitter le thread appelant (arrêt du service)."""
+        self.ecrire_lot(self.preparer_ecriture())
+
+    def compacter(self):
+        """Intègre le journal aux fichiers JSON et enregistre les agrégats, sans quitter le thread appelant."""
+        lot = self.preparer_compaction()
+        self.preparer_cache(lot)
+        self.ecrire_lot(lot)
+
+
+class ServiceHTTP:
+    """Serveur HTTP/1.1 minimal (asyncio) exposant EtatCatalogue en JSON.
+
+    Routes :
+      GET  /films?texte=&prefixe=&genre=&annee=&cote_min=&tri=&decroissant=&debut=&limite=
+      GET  /film?titre=                 GET  /utilisateur?username=
+      POST /utilisateurs {"username"}   POST /notes {"username", "film", "note"}
+      POST /ventes {"film", "quantite", "vendeur"}
+      GET  /ventes?debut=&fin=          GET  /statistiques
+      GET  /recommandations?username=&knn=
+      GET  /metriques                   (mesures de instrumentation.py, avec INSTRUMENTATION=1)
+    """
+    def __init__(self, etat): # Constructeur de la classe
+        self.etat = etat
+        self.routes = {
+            ("GET", "/films"): self.get_films,
+            ("GET", "/film"): lambda p, c: self.etat.film(p["titre"]),
+            ("GET", "/utilisateur"): lambda p, c: self.etat.utilisateur(p["username"]),
+            ("POST", "/utilisateurs"): lambda p, c: self.etat.creer_utilisateur(c.get("username", "")),
+            ("POST", "/notes"): self.post_note,
+            ("POST", "/ventes"): self.post_vente,
+            ("GET", "/ventes"): lambda p, c: self.etat.historique(p.get("debut"), p.get("fin")),
+            ("GET", "/statistiques"): lambda p, c: self.etat.statistiques(),
+            ("GET", "/recommandations"): self.get_recommandations,
+            ("GET", "/metriques"): lambda p, c: instrumentation.instantane(),
+        }
+        self.ecriture = None # Tâche d'écriture des événements en attente (différée, puis dans un thread)
+
+    def get_films(self, parametres, corps):
+        nombre = lambda cle, conversion: conversion(parametres[cle]) if parametres.get(cle) else None
+        return self.etat.rechercher(
+            texte=parametres.get("texte"), prefixe=parametres.get("prefixe"), genre=parametres.get("genre"),
+            annee=nombre("annee", int), cote_min=nombre("cote_min", float), tri=parametres.get("tri") or None,
+            decroissant=parametres.get("decroissant", "") in ("1", "true"),
+            debut=nombre("debut", int) or 0, limite=nombre("limite", int))
+
+    async def post_note(self, parametres, corps):
+        film = self.etat.noter(corps.get("username"), corps.get("film"), corps.get("note"))
+        await asyncio.to_thread(self.etat.mettre_a_jour_moteur, corps["username"], corps["film"], float(corps["note"]))
+        return film
+
+    def post_vente(self, parametres, corps):
+        vente = self.etat.vendre(corps.get("film"), corps.get("quantite"), corps.get("vendeur", "Inconnu"))
+        return {"vente": vente, "stock": self.etat.index.trouver(vente["film"])["stock"]}
+
+    async def get_recommandations(self, parametres, corps):
+        knn = int(parametres.get("knn") or application.RECOMMANDATION_KNN)
+        return await asyncio.to_thread(self.etat.recommander, parametres.get("username"), knn)
+
+    async def repondre(self, methode, cible, corps):
+        """Retourne (statut, contenu JSON) pour une requête."""
+        adresse = urlsplit(cible)
+        route = self.routes.get((methode, adresse.path))
+        if route is None:
+            existe = any(chemin == adresse.path for _, chemin in self.routes)
+            return (405 if existe else 404), {"erreur": f"{methode} {adresse.path} non pris en charge"}
+        instrumentation.compter(f"requetes {methode} {adresse.path}")
+        parametres = {cle: valeurs[-1] for cle, valeurs in parse_qs(adresse.query).items()}
+        try:
+            contenu = json.loads(corps) if corps else {}
+            if not isinstance(contenu, dict):
+                raise ValueError("Le corps de la requête doit être un objet JSON.")
+            resultat = route(parametres, contenu)
+            if asyncio.iscoroutine(resultat):
+                resultat = await resultat
+        except Introuvable as e:
+            return 404, {"erreur": str(e)}
+        except (ValueError, TypeError, KeyError) as e:
+            return 400, {"erreur": str(e) if not isinstance(e, KeyError) else f"Paramètre manquant : {e}"}
+        except stockage.ErreurStockage as e:
+            return 500, {"erreur": str(e)}
+        except Exception as e: # Erreur imprévue : le client reçoit quand même une réponse
+            traceback.print_exc()
+            return 500, {"erreur": f"Erreur interne : {e}"}
+        if methode == "POST":
+            self.programmer_ecriture()
+        return 200, resultat
+
+    def programmer_ecriture(self):
+        """Écrit les événements en attente après DELAI_ECRITURE, ou tout de suite s'ils sont nombreux."""
+        if self.ecriture is None: # Sinon : repris à la fin de l'écriture en cours
+            delai = 0 if len(self.etat.en_attente) >= TAILLE_LOT_ECRITURE else DELAI_ECRITURE
+            self.ecriture = asyncio.create_task(self.ecrire(delai))
+
+    async def ecrire(self, delai):
+        """Prépare le lot dans la boucle puis l'écrit dans un thread : les requêtes continuent d'être servies."""
+        try:
+            await asyncio.sleep(delai)
+            await asyncio.to_thread(self.etat.ecrire_lot, self.etat.preparer_ecriture())
+        finally:
+            self.ecriture = None
+        if self.etat.en_attente: # Événements reçus pendant l'écriture
+            self.programmer_ecriture()
+
+    async def traiter_connexion(self, reader, writer):
+        """Lit les requêtes d'une connexion (maintenue ouverte entre deux requêtes) et y répond."""
+        try:
+            while True:
+                ligne = await reader.readline()
+                if not ligne:
+                    break
+                methode, cible, _ = ligne.decode("latin-1").split(" ", 2)
+                entetes = {}
+                while True:
+                    ligne = await reader.readline()
+                    if ligne in (b"\r\n", b"\n", b""):
+                        break
+                    nom, _, valeur = ligne.decode("latin-1").partition(":")
+                    entetes[nom.strip().lower()] = valeur.strip()
+                corps = await reader.readexactly(int(entetes.get("content-length") or 0))
+                statut, contenu = await self.repondre(methode, cible, corps)
+                donnees = json.dumps(contenu, ensure_ascii=False, default=enregistrements.json_defaut).encode("utf-8")
+                writer.write(f"HTTP/1.1 {statut} {RAISONS[statut]}\r\n"
+                             f"Content-Type: application/json; charset=utf-8\r\n"
+                             f"Content-Length: {len(donnees)}\r\n\r\n".encode("latin-1") + donnees)
+                await writer.drain()
+                if entetes.get("connection", "").lower() == "close":
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass # Connexion fermée ou requête mal formée
+        finally:
+            writer.close()
+
+    async def servir(self, hote=HOTE, port=PORT):
+        """Sert les requêtes jusqu'à l'arrêt du programme (Ctrl+C ou SIGTERM), puis écrit les événements en attente."""
+        serveur = await asyncio.start_server(self.traiter_connexion, hote, port)
+        print(f"Service à l'écoute sur http://{hote}:{port}/")
+        arret = asyncio.Event()
+        boucle = asyncio.get_running_loop()
+        try:
+            boucle.add_signal_handler(signal.SIGTERM, arret.set)
+        except NotImplementedError: # Windows : pas de gestionnaire de signal dans la boucle
+            signal.signal(signal.SIGTERM, lambda *_: boucle.call_soon_threadsafe(arret.set))
+        try:
+            async with serveur:
+                await arret.wait() # Le serveur accepte les connexions jusqu'à l'arrêt
+        finally:
+            if self.ecriture is not None:
+                self.ecriture.cancel()
+            self.etat.ecrire_en_attente() # Attend la fin d'un lot en cours d'écriture (verrou_ecriture)
+            self.etat.compacter() # Intégrer le journal aux fichiers JSON en quittant
+
+
+## MAIN ##
+def main(argv=None):
+    """Ligne de commande : python service.py [--hote HOTE] [--port PORT]"""
+    parser = argparse.ArgumentParser(description="Service HTTP/JSON du catalogue de films.")
+    parser.add_argument("--hote", default=HOTE, help="adresse d'écoute (locale par défaut)")
+    parser.add_argument("--port", type=int, default=PORT, help="port d'écoute")
+    args = parser.parse_args(argv)
+    instrumentation.demarrer() # Profilage et export des métriques (INSTRUMENTATION=1)
+    service = ServiceHTTP(EtatCatalogue())
+    try:
+        asyncio.run(service.servir(args.hote, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        instrumentation.arreter() # Écrire les métriques et le profil
+
+if __name__ == "__main__": # Si le script est exécuté en tant que programme principal
+    main()
@@ -0,0 +1,340 @@
+"""Écritures atomiques, verrous et contrôle de version des fichiers JSON de Fichiers_json/ partagés entre plusieurs postes."""
+import codecs
+import copy
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+import instrumentation
+
+try:
+    import fcntl # Verrous consultatifs POSIX
+except ImportError: # Windows
+    fcntl = None
+    import msvcrt
+
+# Temps d'attente maximal (en secondes) pour obtenir le verrou d'un fichier
+DELAI_VERROU = 10.0
+# Intervalle entre deux tentatives de verrouillage
+INTERVALLE_VERROU = 0.05
+# Taille (en octets) des blocs lus par iterer_json
+TAILLE_BLOC = 1 << 16
+
+
+class ErreurStockage(Exception):
+    """Erreur d'accès aux fichiers de données."""
+
+
+class FichierCorrompu(ErreurStockage):
+    """Le fichier existe mais ne contient pas du JSON valide (par exemple tronqué par un arrêt brutal)."""
+
+
+class VerrouIndisponible(ErreurStockage):
+    """Le verrou d'un fichier n'a pas pu être obtenu dans le délai imparti."""
+
+
+## Verrous ##
+_verrous = {} # (chemin du fichier verrou, thread) -> [descripteur, nombre d'acquisitions] (verrous détenus par ce processus)
+
+
+def _essayer_verrou(fd):
+    """Tente de poser un verrou exclusif sur le descripteur, sans attendre. Retourne True en cas de succès."""
+    try:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+        return True
+    except OSError: # Verrou détenu par un autre processus
+        return False
+
+
+def _liberer_verrou(fd):
+    """Libère le verrou posé sur le descripteur."""
+    if fcntl is not None:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+    else:
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+
+
+@contextmanager
+def verrou(fichier, delai=DELAI_VERROU):
+    """Verrou exclusif sur fichier (via le fichier fichier.lock), partagé par tous les processus.
+
+    Le verrou est réentrant dans un même thread ; les autres threads du processus l'attendent comme
+    les autres processus. Lève VerrouIndisponible s'il est encore détenu après delai secondes.
+    """
+    chemin = os.path.abspath(fichier) + ".lock"
+    cle = (chemin, threading.get_ident())
+    if cle in _verrous: # Déjà détenu par ce thread
+        _verrous[cle][1] += 1
+        try:
+            yield
+        finally:
+            _verrous[cle][1] -= 1
+        return
+
+    fd = os.open(chemin, os.O_RDWR | os.O_CREAT, 0o666)
+    limite = time.monotonic() + delai
+    while not _essayer_verrou(fd): # Nouvelle tentative jusqu'au délai
+        if time.monotonic() >= limite:
+            os.close(fd)
+            raise VerrouIndisponible(f"{fichier} est verrouillé par un autre poste.")
+        time.sleep(INTERVALLE_VERROU)
+    _verrous[cle] = [fd, 1]
+    try:
+        yield
+    finally:
+        _verrous[cle][1] -= 1
+        if _verrous[cle][1] == 0:
+            del _verrous[cle]
+            _liberer_verrou(fd)
+            os.close(fd)
+
+
+## Lecture et écriture ##
+def version(fichier):
+    """Identifie l'état actuel du fichier (None s'il n'existe pas).
+
+    Chaque écriture atomique crée un nouveau fichier : l'inode change même si la date de
+    modification n'a pas changé.
+    """
+    try:
+        infos = os.stat(fichier)
+    except FileNotFoundError:
+        return None
+    return (infos.st_ino, infos.st_mtime_ns, infos.st_size)
+
+
+def lire_json(fichier, defaut=list):
+    """Retourne (contenu, version) du fichier JSON ; (defaut(), None) s'il n'existe pas.
+
+    Lève FichierCorrompu si le fichier ne contient pas du JSON valide, au lieu de le considérer vide.
+    """
+    try:
+        with instrumentation.mesure("lire_json " + os.path.basename(fichier)), \
+             open(fichier, 'r', encoding='utf-8') as f: # Ouvrir le fichier en mode lecture
+            v = version(f.fileno()) # Version du fichier effectivement ouvert
+            return json.load(f), v
+    except FileNotFoundError:
+        return defaut(), None
+    except (json.JSONDecodeError, UnicodeDecodeError) as e:
+        raise FichierCorrompu(f"{fichier} est illisible ({e}).") from e
+
+
+_BLANCS = re.compile(r"[ \t\r\n]*") # Espaces autorisés entre les éléments JSON
+_SUITE_NOMBRE = re.compile(r"[0-9.eE+-]*") # Caractères pouvant prolonger un nombre JSON
+
+
+def iterer_json(fichier, taille_bloc=TAILLE_BLOC):
+    """Parcourt un fichier contenant un tableau JSON élément par élément, sans le charger en entier.
+
+    Produit des couples (element, octets_lus), octets_lus servant à suivre la progression. Un
+    fichier absent ne produit rien ; lève FichierCorrompu si le fichier n'est pas un tableau JSON
+    valide (les éléments déjà produits restent valides).
+    """
+    try:
+        f = open(fichier, 'rb')
+    except FileNotFoundError:
+        return
+    with f:
+        decodeur = json.JSONDecoder()
+        utf8 = codecs.getincrementaldecoder("utf-8-sig")() # Accepte un éventuel BOM
+        tampon, pos = "", 0 # Texte lu mais pas encore analysé : tampon[pos:]
+
+        def lire_bloc():
+            """Ajoute un bloc du fichier au tampon ; retourne False à la fin du fichier."""
+            nonlocal tampon, pos
+            bloc = f.read(taille_bloc)
+            try:
+                tampon = tampon[pos:] + utf8.decode(bloc, final=not bloc)
+            except UnicodeDecodeError as e:
+                raise FichierCorrompu(f"{fichier} est illisible ({e}).") from e
+            pos = 0
+            return bool(bloc)
+
+        def caractere():
+            """Premier caractère non blanc à partir de pos (None à la fin du fichier) ; pos est placé dessus."""
+            nonlocal pos
+            while True:
+                pos = _BLANCS.match(tampon, pos).end()
+                if pos < len(tampon):
+                    return tampon[pos]
+                if not lire_bloc():
+                    return None
+
+        if caractere() != "[":
+            raise FichierCorrompu(f"{fichier} ne contient pas un tableau JSON.")
+        pos += 1
+        if caractere() == "]": # Tableau vide
+            pos += 1
+        else:
+            while True:
+                caractere()
+                while True: # Lire des blocs jusqu'à obtenir l'élément complet
+                    try:
+                        element, suite = decodeur.raw_decode(tampon, pos)
+                    except json.JSONDecodeError as e:
+                        if not lire_bloc():
+                            raise FichierCorrompu(f"{fichier} est illisible ({e}).") from e
+                        continue
+                    if _SUITE_NOMBRE.match(tampon, suite).end() == len(tampon) and lire_bloc(): # Un nombre peut continuer dans le bloc suivant
+                        continue
+                    break
+                pos = suite
+                yield element, f.tell()
+                separateur = caractere()
+                pos += 1
+                if separateur == "]":
+                    break
+                if separateur != ",":
+                    raise FichierCorrompu(f"{fichier} est illisible (',' ou ']' attendu).")
+        if caractere() is not None:
+            raise FichierCorrompu(f"{fichier} est illisible (données après la fin du tableau).")
+
+
+def ecrire_json_atomique(fichier, donnees, **options):
+    """Écrit donnees dans un fichier temporaire puis le renomme en fichier, et retourne la nouvelle version.
+
+    Un arrêt brutal laisse soit l'ancien fichier, soit le nouveau, jamais un fichier tronqué.
+    """
+    options.setdefault("ensure_ascii", False)
+    options.setdefault("indent", 4)
+    dossier = os.path.dirname(os.path.abspath(fichier))
+    fd, temporaire = tempfile.mkstemp(dir=dossier, prefix="." + os.path.basename(fichier) + ".", suffix=".tmp")
+    try:
+        with instrumentation.mesure("ecrire_json " + os.path.basename(fichier)), os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(donnees, f, **options)
+            f.flush()
+            os.fsync(f.fileno()) # Contenu sur disque avant le renommage
+            instrumentation.octets_ecrits(fichier, os.fstat(f.fileno()).st_size) # Le fichier entier est réécrit
+        os.replace(temporaire, fichier) # Renommage atomique
+    except BaseException:
+        if os.path.exists(temporaire):
+            os.remove(temporaire)
+        raise
+    return version(fichier)
+
+
+## Fusion des modifications concurrentes ##
+def _cle_json(valeur):
+    """Représentation canonique d'une valeur JSON, utilisable comme clé de dictionnaire."""
+    return json.dumps(valeur, sort_keys=True, ensure_ascii=False)
+
+
+def fusionner(base, local, distant, cle=None):
+    """Fusion à trois versions : applique à distant les modifications faites entre base et local.
+
+    - dictionnaires : champ par champ (récursivement) ; un champ modifié localement l'emporte ;
+    - listes d'enregistrements identifiés par le champ cle : enregistrement par enregistrement ;
+    - autres listes (ex. ventes) : les éléments ajoutés localement et absents de distant y sont ajoutés ;
+    - autres valeurs : la valeur locale si elle a été modifiée, sinon la valeur distante.
+    """
+    if local == base:
+        return distant
+    if distant == base:
+        return local
+    if isinstance(local, dict) and isinstance(distant, dict):
+        base = base if isinstance(base, dict) else {}
+        resultat = {}
+        for k in list(distant) + [k for k in local if k not in distant]:
+            if k in local and k in distant:
+                resultat[k] = fusionner(base.get(k), local[k], distant[k])
+            elif k in local: # Absent de distant
+                if k not in base or local[k] != base[k]: # Ajouté ou modifié localement
+                    resultat[k] = local[k]
+            elif k not in base or distant[k] != base[k]: # Absent de local : garder s'il a changé à distance
+                resultat[k] = distant[k]
+        return resultat
+    if isinstance(local, list) and isinstance(distant, list):
+        base = base if isinstance(base, list) else []
+        if cle is not None and all(isinstance(e, dict) and cle in e for e in base + local + distant):
+            par_cle = lambda liste: {e[cle]: e for e in liste}
+            b, l, d = par_cle(base), par_cle(local), par_cle(distant)
+            return list(fusionner(b, l, d).values())
+        compte_base = Counter(_cle_json(e) for e in base)
+        ajouts = Counter(_cle_json(e) for e in local) - compte_base
+        ajouts -= Counter(_cle_json(e) for e in distant) - compte_base # Déjà ajoutés à distant (ex. par le journal)
+        resultat = list(distant)
+        for e in local: # Ajouter les éléments nouveaux de local, dans leur ordre
+            k = _cle_json(e)
+            if ajouts[k] > 0:
+                resultat.append(e)
+                ajouts[k] -= 1
+        return resultat
+    return local
+
+
+class FichierPartage:
+    """Fichier JSON modifiable par plusieurs postes à la fois (contrôle de version optimiste).
+
+    charger() mémorise la version et le contenu lus. sauvegarder() vérifie, sous verrou, que le
+    fichier n'a pas été modifié depuis ; sinon, les modifications locales sont fusionnées avec
+    celles des autres postes au lieu de les écraser.
+    """
+    def __init__(self, fichier, cle=None, defaut=list): # Constructeur de la classe
+        self.fichier = fichier
+        self.cle = cle # Champ identifiant les enregistrements (ex. "titre"), None pour une liste sans identifiant
+        self.defaut = defaut # Contenu d'un fichier absent
+        self.base = None # Contenu local au dernier chargement ou à la dernière sauvegarde (None : jamais lu)
+        self.contenu = None # Contenu du fichier à ce moment (différent de base si une fusion a eu lieu)
+        self.version = None # Version du fichier correspondante
+
+    def charger(self, completer=None):
+        """Lit le fichier et retourne son contenu (FichierCorrompu s'il est illisible).
+
+        completer(contenu) peut compléter le contenu lu (par exemple avec le journal) : ces
+        modifications ne sont pas considérées comme locales lors des fusions suivantes.
+        """
+        donnees, self.version = lire_json(self.fichier, self.defaut)
+        self.contenu = copy.deepcopy(donnees)
+        if completer is not None:
+            completer(donnees)
+        self.base = copy.deepcopy(donnees)
+        return donnees
+
+    def sauvegarder(self, donnees, completer=None):
+        """Écrit donnees, fusionnées avec les modifications des autres postes, et retourne le contenu écrit.
+
+        completer(contenu) peut modifier le contenu fusionné juste avant l'écriture, sous le verrou.
+        """
+        with verrou(self.fichier):
+            resultat = donnees
+            if self.base is not None:
+                distant = self.contenu
+                if version(self.fichier) != self.version: # Modifié par un autre poste depuis
+                    distant, _ = lire_json(self.fichier, self.defaut)
+                resultat = fusionner(self.base, donnees, distant, self.cle)
+            if completer is not None:
+                resultat = copy.deepcopy(resultat)
+                completer(resultat)
+            self.version = ecrire_json_atomique(self.fichier, resultat)
+            self.base = copy.deepcopy(donnees) # Les prochaines modifications locales se mesurent par rapport à donnees
+            self.contenu = self.base if resultat is donnees else copy.deepcopy(resultat)
+        return resultat
+
+    def mettre_a_jour(self, modifier):
+        """Lit, modifie (modifier(contenu)) et réécrit le fichier sous verrou ; retourne le contenu écrit."""
+        with verrou(self.fichier):
+            donnees, _ = lire_json(self.fichier, self.defaut)
+            modifier(donnees)
+            self.version = ecrire_json_atomique(self.fichier, donnees)
+            self.base = self.contenu = copy.deepcopy(donnees)
+        return donnees
+
+
+_fichiers = {} # chemin absolu -> FichierPartage
+
+
+def fichier_partage(fichier, cle=None):
+    """Retourne l'objet FichierPartage associé au fichier (le même à chaque appel)."""
+    chemin = os.path.abspath(fichier)
+    if chemin not in _fichiers:
+        _fichiers[chemin] = FichierPartage(chemin, cle)
+    return _fichiers[chemin]
@@ -0,0 +1,301 @@
+"""Stockage SQLite (optionnel) du catalogue, des utilisateurs, des notes et des ventes."""
+import argparse
+import os
+import sqlite3
+import sys
+
+import journal
+import stockage
+
+# ========== CONFIGURATION DES CHEMINS ==========
+PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
+
+def get_json_path(filename):
+    """Retourne le chemin vers les fichiers JSON dans Fichiers_json/"""
+    return os.path.join(PROJECT_ROOT, "Fichiers_json", filename)
+
+# ========== FIN CONFIGURATION DES CHEMINS ==========
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS films (
+    id            INTEGER PRIMARY KEY,
+    titre         TEXT NOT NULL UNIQUE,
+    genre         TEXT COLLATE NOCASE,
+    annee         INTEGER,
+    cote          REAL NOT NULL DEFAULT 0,
+    stock         INTEGER NOT NULL DEFAULT 0,
+    prix_unitaire REAL NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_films_genre ON films(genre);
+CREATE INDEX IF NOT EXISTS idx_films_annee ON films(annee);
+CREATE INDEX IF NOT EXISTS idx_films_cote ON films(cote);
+
+CREATE TABLE IF NOT EXISTS utilisateurs (
+    user_id  INTEGER PRIMARY KEY,
+    username TEXT NOT NULL UNIQUE
+);
+
+-- Une seule table de notes : les champs "notes" du catalogue et des utilisateurs en sont deux vues
+CREATE TABLE IF NOT EXISTS notes (
+    username TEXT NOT NULL,
+    titre    TEXT NOT NULL,
+    note     REAL NOT NULL,
+    PRIMARY KEY (username, titre)
+);
+CREATE INDEX IF NOT EXISTS idx_notes_titre ON notes(titre);
+
+CREATE TABLE IF NOT EXISTS ventes (
+    id            INTEGER PRIMARY KEY,
+    date          TEXT NOT NULL,
+    film          TEXT NOT NULL,
+    vendeur       TEXT,
+    quantite      INTEGER NOT NULL,
+    prix_unitaire REAL NOT NULL,
+    revenu_total  REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_ventes_date ON ventes(date);
+"""
+
+CHAMPS_FILM = ("titre", "genre", "annee", "cote", "stock", "prix_unitaire") # Colonnes de la table films
+CHAMPS_VENTE = ("date", "film", "vendeur", "quantite", "prix_unitaire", "revenu_total") # Colonnes de la table ventes
+
+
+def chemin_base(fichier=None):
+    """Retourne le chemin de la base SQLite (Fichiers_json/catalogue.db par défaut)."""
+    return fichier or get_json_path("catalogue.db")
+
+
+def connecter(fichier=None):
+    """Ouvre la base SQLite et crée les tables et index s'ils n'existent pas."""
+    conn = sqlite3.connect(chemin_base(fichier))
+    conn.row_factory = sqlite3.Row # Accès aux colonnes par leur nom
+    conn.create_function("minuscules", 1, lambda texte: texte.lower() if texte is not None else None,
+                         deterministic=True) # lower() de SQLite ne traite que l'ASCII (titres accentués)
+    conn.executescript(SCHEMA)
+    return conn
+
+
+## Catalogue ##
+def charger_catalogue(conn):
+    """Retourne le catalogue complet (même format que catalogue_films.json) ; les notes sont lues en un parcours de la table."""
+    films = [{"titre": l["titre"], "genre": l["genre"], "annee": l["annee"], "cote": l["cote"], "notes": {},
+              "stock": l["stock"], "prix_unitaire": l["prix_unitaire"]} for l in conn.execute("SELECT * FROM films ORDER BY id")]
+    par_titre = {f["titre"]: f for f in films} # titre -> film
+    for n in conn.execute("SELECT username, titre, note FROM notes ORDER BY rowid"):
+        if n["titre"] in par_titre:
+            par_titre[n["titre"]]["notes"][n["username"]] = n["note"]
+    return films
+
+
+def sauvegarder_catalogue(conn, catalogue, ecraser_notes=True):
+    """Remplace les films par ceux du catalogue et enregistre leurs notes.
+
+    Avec ecraser_notes=False, une note déjà présente dans la base est conservée.
+    """
+    with conn: # Une seule transaction
+        titres = [f["titre"] for f in catalogue]
+        conn.execute("CREATE TEMP TABLE IF NOT EXISTS titres_gardes (titre TEXT PRIMARY KEY)")
+        conn.execute("DELETE FROM titres_gardes")
+        conn.executemany("INSERT OR IGNORE INTO titres_gardes VALUES (?)", ((t,) for t in titres))
+        conn.execute("DELETE FROM films WHERE titre NOT IN (SELECT titre FROM titres_gardes)") # Films retirés
+        for f in catalogue:
+            conn.execute("INSERT INTO films (titre, genre, annee, cote, stock, prix_unitaire) VALUES (?, ?, ?, ?, ?, ?) "
+                         "ON CONFLICT(titre) DO UPDATE SET genre = excluded.genre, annee = excluded.annee, "
+                         "cote = excluded.cote, stock = excluded.stock, prix_unitaire = excluded.prix_unitaire",
+                         (f["titre"], f.get("genre"), f.get("annee"), f.get("cote", 0.0), f.get("stock", 0),
+                          f.get("prix_unitaire", 0.0)))
+            for username, note in f.get("notes", {}).items():
+                _enregistrer_note(conn, username, f["titre"], note, ecraser_notes)
+
+
+def titres_filtres(conn, texte=None, genre=None, annee=None, cote_min=None):
+    """Titres des films correspondant aux filtres, par requête sur les index (texte contenu dans le titre et genre sans tenir compte de la casse, année exacte, cote minimale)."""
+    conditions, parametres = [], []
+    if texte:
+        conditions.append("instr(minuscules(titre), ?) > 0")
+        parametres.append(texte.lower())
+    if genre:
+        conditions.append("genre = ?") # Colonne en COLLATE NOCASE : utilise idx_films_genre
+        parametres.append(genre)
+    if annee is not None:
+        conditions.append("annee = ?")
+        parametres.append(annee)
+    if cote_min is not None:
+        conditions.append("cote >= ?")
+        parametres.append(cote_min)
+    requete = "SELECT titre FROM films" + (" WHERE " + " AND ".join(conditions) if conditions else "") + " ORDER BY id"
+    return [l["titre"] for l in conn.execute(requete, parametres)]
+
+
+## Utilisateurs et notes ##
+def _creer_utilisateur(conn, username, user_id=None):
+    """Crée l'utilisateur s'il n'existe pas et retourne son identifiant.
+
+    L'identifiant demandé est utilisé s'il est libre, sinon SQLite en attribue un nouveau.
+    """
+    ligne = conn.execute("SELECT user_id FROM utilisateurs WHERE username = ?", (username,)).fetchone()
+    if ligne:
+        return ligne["user_id"]
+    if user_id is not None and conn.execute("SELECT 1 FROM utilisateurs WHERE user_id = ?", (user_id,)).fetchone():
+        user_id = None # Identifiant déjà pris
+    return conn.execute("INSERT INTO utilisateurs (user_id, username) VALUES (?, ?)", (user_id, username)).lastrowid
+
+
+def _enregistrer_note(conn, username, titre, note, ecraser=True):
+    """Insère ou met à jour une note (sans recalculer la cote)."""
+    _creer_utilisateur(conn, username)
+    if ecraser:
+        conn.execute("INSERT INTO notes (username, titre, note) VALUES (?, ?, ?) "
+                     "ON CONFLICT(username, titre) DO UPDATE SET note = excluded.note", (username, titre, note))
+    else:
+        conn.execute("INSERT OR IGNORE INTO notes (username, titre, note) VALUES (?, ?, ?)", (username, titre, note))
+
+
+def charger_utilisateurs(conn):
+    """Retourne la liste des utilisateurs (même format que ListeUtilisateurs.json)."""
+    utilisateurs = [{"user_id": u["user_id"], "username": u["username"], "notes": {}}
+                    for u in conn.execute("SELECT user_id, username FROM utilisateurs ORDER BY user_id")]
+    par_nom = {u["username"]: u for u in utilisateurs}
+    for n in conn.execute("SELECT username, titre, note FROM notes ORDER BY rowid"):
+        if n["username"] in par_nom:
+            par_nom[n["username"]]["notes"][n["titre"]] = n["note"]
+    return utilisateurs
+
+
+def trouver_utilisateur(conn, username):
+    """Retourne l'utilisateur (avec ses notes) par une requête sur l'index unique, ou None."""
+    ligne = conn.execute("SELECT user_id, username FROM utilisateurs WHERE username = ?", (username,)).fetchone()
+    if ligne is None:
+        return None
+    notes = {n["titre"]: n["note"] for n in conn.execute(
+        "SELECT titre, note FROM notes WHERE username = ? ORDER BY rowid", (username,))}
+    return {"user_id": ligne["user_id"], "username": ligne["username"], "notes": notes}
+
+
+def creer_utilisateur(conn, username):
+    """Crée l'utilisateur (sans note) et retourne son identifiant."""
+    with conn:
+        return _creer_utilisateur(conn, username)
+
+
+def sauvegarder_utilisateurs(conn, utilisateurs):
+    """Enregistre les utilisateurs et leurs notes."""
+    with conn: # Une seule transaction
+        for u in utilisateurs:
+            _creer_utilisateur(conn, u["username"], u.get("user_id"))
+            for titre, note in u.get("notes", {}).items():
+                _enregistrer_note(conn, u["username"], titre, note)
+
+
+def noter_film(conn, username, titre, note):
+    """Enregistre une note et met à jour la cote du film (une ligne écrite dans notes et dans films)."""
+    with conn:
+        _enregistrer_note(conn, username, titre, note)
+        conn.execute("UPDATE films SET cote = (SELECT AVG(note) FROM notes WHERE titre = ?) WHERE titre = ?",
+                     (titre, titre))
+
+
+## Ventes ##
+def charger_ventes(conn, debut=None, fin=None):
+    """Retourne les ventes (même format que ventes.json), éventuellement limitées à l'intervalle de dates [debut, fin]."""
+    conditions, parametres = [], []
+    if debut is not None:
+        conditions.append("date >= ?")
+        parametres.append(debut)
+    if fin is not None:
+        conditions.append("date <= ?")
+        parametres.append(fin)
+    requete = "SELECT * FROM ventes" + (" WHERE " + " AND ".join(conditions) if conditions else "") + " ORDER BY id"
+    return [{champ: v[champ] for champ in CHAMPS_VENTE} for v in conn.execute(requete, parametres)]
+
+
+def sauvegarder_ventes(conn, ventes):
+    """Remplace l'historique des ventes."""
+    with conn:
+        conn.execute("DELETE FROM ventes")
+        conn.executemany("INSERT INTO ventes (date, film, vendeur, quantite, prix_unitaire, revenu_total) "
+                         "VALUES (?, ?, ?, ?, ?, ?)", ([v.get(c) for c in CHAMPS_VENTE] for v in ventes))
+
+
+def enregistrer_vente(conn, vente):
+    """Ajoute une vente (une seule ligne insérée)."""
+    with conn:
+        conn.execute("INSERT INTO ventes (date, film, vendeur, quantite, prix_unitaire, revenu_total) "
+                     "VALUES (?, ?, ?, ?, ?, ?)", [vente.get(c) for c in CHAMPS_VENTE])
+
+
+def modifier_stock(conn, titre, delta):
+    """Ajoute delta (négatif pour une vente) au stock d'un film, dans la base : les ventes des autres postes sont gardées."""
+    with conn:
+        conn.execute("UPDATE films SET stock = stock + ? WHERE titre = ?", (delta, titre))
+
+
+def appliquer_evenement(conn, evenement):
+    """Applique un événement au format du journal (note, vente ou stock) par une écriture ponctuelle."""
+    if evenement["type"] == "note":
+        noter_film(conn, evenement["username"], evenement["film"], evenement["note"])
+    elif evenement["type"] == "vente":
+        enregistrer_vente(conn, evenement["vente"])
+    elif evenement["type"] == "stock":
+        modifier_stock(conn, evenement["film"], evenement["delta"])
+
+
+## Migration ##
+def _lire_json(fichier):
+    """Lit un fichier JSON contenant une liste.
+
+    Lève stockage.ErreurStockage s'il est absent, illisible ou ne contient pas une liste : la
+    migration remplace les films et les ventes de la base, une liste vide les effacerait.
+    """
+    contenu, version = stockage.lire_json(fichier) # FichierCorrompu si le JSON est invalide
+    if version is None:
+        raise stockage.ErreurStockage(f"{fichier} est introuvable.")
+    if not isinstance(contenu, list):
+        raise stockage.FichierCorrompu(f"{fichier} ne contient pas une liste JSON.")
+    return contenu
+
+
+def migrer_depuis_json(conn, dossier=None):
+    """Importe en une fois les fichiers de Fichiers_json/ (complétés par le journal) dans la base SQLite.
+
+    En cas de désaccord entre les notes du catalogue et celles de ListeUtilisateurs.json, la note
+    de l'utilisateur l'emporte ; la cote des films est ensuite recalculée à partir des notes.
+    Les trois fichiers sont lus avant toute écriture : s'il manque un fichier ou s'il est illisible,
+    stockage.ErreurStockage est levée et la base n'est pas modifiée.
+    """
+    dossier = dossier or os.path.join(PROJECT_ROOT, "Fichiers_json")
+    catalogue = _lire_json(os.path.join(dossier, "catalogue_films.json"))
+    utilisateurs = _lire_json(os.path.join(dossier, "ListeUtilisateurs.json"))
+    ventes = _lire_json(os.path.join(dossier, "ventes.json"))
+    journal.rejouer(catalogue, ventes, utilisateurs, fichier=os.path.join(dossier, "journal.jsonl"))
+
+    sauvegarder_utilisateurs(conn, utilisateurs) # Utilisateurs (avec leurs identifiants) et leurs notes
+    sauvegarder_catalogue(conn, catalogue, ecraser_notes=False) # Films, et notes absentes de ListeUtilisateurs.json
+    sauvegarder_ventes(conn, ventes)
+    with conn: # Recalculer les cotes des films notés
+        conn.execute("UPDATE films SET cote = (SELECT AVG(note) FROM notes WHERE notes.titre = films.titre) "
+                     "WHERE EXISTS (SELECT 1 FROM notes WHERE notes.titre = films.titre)")
+    return len(catalogue), len(utilisateurs), len(ventes)
+
+
+## MAIN ##
+def main(argv=None):
+    """Ligne de commande : python stockage_sqlite.py migrer [--base FICHIER]"""
+    parser = argparse.ArgumentParser(description="Stockage SQLite du catalogue de films.")
+    parser.add_argument("commande", choices=["migrer"], help="migrer : importer les fichiers JSON dans la base")
+    parser.add_argument("--base", help="fichier SQLite (par défaut Fichiers_json/catalogue.db)")
+    args = parser.parse_args(argv)
+
+    conn = connecter(args.base)
+    try:
+        nb_films, nb_utilisateurs, nb_ventes = migrer_depuis_json(conn)
+    except stockage.ErreurStockage as e:
+        print(f"Migration annulée : {e}", file=sys.stderr)
+        return 1
+    finally:
+        conn.close()
+    print(f"{chemin_base(args.base)} : {nb_films} films, {nb_utilisateurs} utilisateurs, {nb_ventes} ventes importés.")
+    return 0
+
+if __name__ == "__main__": # Si le script est exécuté en tant que programme principal
+    sys.exit(main())
@@ -0,0 +1,166 @@
+"""Exécution des opérations longues dans des threads ; progression et résultats sont rendus au fil de l'interface Tk par root.after."""
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import tkinter as tk
+from tkinter import ttk
+
+# Nombre de threads exécutant les tâches
+NOMBRE_THREADS = 2
+# Intervalle (en ms) entre deux lectures des messages des tâches par le fil Tk
+INTERVALLE_SONDAGE = 50
+
+
+class TacheAnnulee(Exception):
+    """Levée par Tache.verifier() dans une tâche dont l'annulation a été demandée."""
+
+
+class Tache:
+    """Tâche soumise à ExecuteurTaches.
+
+    La fonction de la tâche reçoit l'objet Tache : elle appelle signaler() pour indiquer sa
+    progression et verifier() aux endroits où elle peut s'arrêter si l'utilisateur a annulé.
+    """
+    def __init__(self, file, succes, echec, progression): # Constructeur de la classe
+        self._file = file # Messages vers le fil Tk
+        self._annulation = threading.Event()
+        self.succes = succes # succes(resultat), appelée dans le fil Tk
+        self.echec = echec # echec(exception), appelée dans le fil Tk
+        self.progression = progression # progression(fraction, message), appelée dans le fil Tk
+        self.future = None
+
+    @property
+    def annulee(self):
+        return self._annulation.is_set()
+
+    def annuler(self):
+        """Demande l'arrêt de la tâche (depuis le fil Tk) ; ni succes ni echec ne seront appelées."""
+        self._annulation.set()
+        if self.future is not None:
+            self.future.cancel() # Tâche pas encore commencée : elle ne le sera pas
+
+    def verifier(self):
+        """Lève TacheAnnulee si l'annulation a été demandée (appelée depuis la tâche)."""
+        if self._annulation.is_set():
+            raise TacheAnnulee()
+
+    def signaler(self, fraction=None, message=None):
+        """Transmet la progression (fraction entre 0 et 1, ou None si inconnue) au fil Tk."""
+        if self.progression is not None:
+            self._file.put((self, "progression", (fraction, message)))
+
+
+class ExecuteurTaches:
+    """Pool de threads pour les opérations longues de l'application.
+
+    Les tâches ne doivent pas toucher aux widgets : leurs rappels (succes, echec, progression) sont
+    exécutés dans le fil Tk, qui lit les messages des tâches toutes les INTERVALLE_SONDAGE ms
+    tant qu'une tâche est en cours.
+    """
+    def __init__(self, root, nombre_threads=NOMBRE_THREADS): # Constructeur de la classe
+        self.root = root
+        self.pool = ThreadPoolExecutor(max_workers=nombre_threads, thread_name_prefix="tache")
+        self.file = queue.SimpleQueue() # (tache, type de message, contenu)
+        self.en_cours = 0 # Tâches dont le message de fin n'a pas encore été traité
+        self.sondage = None # Identifiant du prochain appel à _sonder
+
+    def soumettre(self, fonction, *args, succes=None, echec=None, progression=None):
+        """Exécute fonction(tache, *args) dans un thread et retourne la Tache.
+
+        Les rappels sont appelés dans le fil Tk : succes(resultat) à la fin de la tâche,
+        echec(exception) si elle lève une exception, progression(fraction, message) à chaque appel
+        de tache.signaler().
+        """
+        tache = Tache(self.file, succes, echec, progression)
+        self.en_cours += 1
+        tache.future = self.pool.submit(self._executer, tache, fonction, args)
+        tache.future.add_done_callback(lambda future: self._terminee(tache, future))
+        if self.sondage is None:
+            self.sondage = self.root.after(INTERVALLE_SONDAGE, self._sonder)
+        return tache
+
+    def _executer(self, tache, fonction, args):
+        """Exécute la tâche (dans un thread du pool) et transmet son résultat au fil Tk."""
+        try:
+            resultat = fonction(tache, *args)
+        except TacheAnnulee:
+            self.file.put((tache, "annulee", None))
+        except Exception as e:
+            self.file.put((tache, "echec", e))
+        else:
+            self.file.put((tache, "succes", resultat))
+
+    def _terminee(self, tache, future):
+        """Signale au fil Tk une tâche annulée avant d'avoir commencé (les autres le sont par _executer)."""
+        if future.cancelled():
+            self.file.put((tache, "annulee", None))
+
+    def _sonder(self):
+        """Appelle, dans le fil Tk, les rappels correspondant aux messages des tâches."""
+        self.sondage = None
+        while True:
+            try:
+                tache, type_message, contenu = self.file.get_nowait()
+            except queue.Empty:
+                break
+            if type_message != "progression":
+                self.en_cours -= 1
+            if tache.annulee: # Plus aucun rappel après une annulation
+                continue
+            if type_message == "progression":
+                tache.progression(*contenu)
+            elif type_message == "succes" and tache.succes is not None:
+                tache.succes(contenu)
+            elif type_message == "echec" and tache.echec is not None:
+                tache.echec(contenu)
+        if self.en_cours > 0:
+            self.sondage = self.root.after(INTERVALLE_SONDAGE, self._sonder)
+
+    def arreter(self):
+        """Annule les tâches en attente et libère le pool (à la fermeture de l'application)."""
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+
+class FenetreProgression:
+    """Petite fenêtre affichant la progression d'une tâche, avec un bouton "Annuler".
+
+    Sans fraction connue, la barre défile en continu.
+    """
+    def __init__(self, root, titre, message): # Constructeur de la classe
+        self.tache = None # Tâche annulée par le bouton
+        self.fenetre = tk.Toplevel(root)
+        self.fenetre.title(titre)
+        self.fenetre.configure(bg="#E8F4FF")
+        self.label = tk.Label(self.fenetre, text=message, bg="#E8F4FF", font=("Arial", 12))
+        self.label.pack(padx=20, pady=10)
+        self.barre = ttk.Progressbar(self.fenetre, length=300, maximum=1.0, mode="indeterminate")
+        self.barre.pack(padx=20, pady=5)
+        self.barre.start()
+        tk.Button(self.fenetre, text="Annuler", command=self.annuler, font=("Arial", 12)).pack(pady=10)
+        self.fenetre.protocol("WM_DELETE_WINDOW", self.annuler) # Fermer la fenêtre annule la tâche
+
+    def suivre(self, tache):
+        """Associe la tâche à la fenêtre (bouton "Annuler")."""
+        self.tache = tache
+        return tache
+
+    def progression(self, fraction, message=None):
+        """Rappel de progression de la tâche."""
+        if fraction is not None:
+            if str(self.barre["mode"]) != "determinate":
+                self.barre.stop()
+                self.barre.configure(mode="determinate")
+            self.barre["value"] = fraction
+        if message:
+            self.label.config(text=message)
+
+    def annuler(self):
+        """Annule la tâche et ferme la fenêtre."""
+        if self.tache is not None:
+            self.tache.annuler()
+        self.fermer()
+
+    def fermer(self):
+        """Ferme la fenêtre."""
+        if self.fenetre.winfo_exists():
+            self.fenetre.destroy()
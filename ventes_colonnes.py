@@ -0,0 +1,208 @@
+"""Historique des ventes en colonnes (module array) : dates en secondes, films et vendeurs codés par un identifiant."""
+import calendar
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timezone
+
+FORMAT_DATE = "%Y-%m-%d %H:%M:%S" # Format des dates de ventes.json
+SECONDES_PAR_JOUR = 86400
+
+_np = False # Module numpy, importé au premier calcul d'agrégat (None s'il n'est pas installé)
+
+
+def _numpy():
+    """Retourne numpy, importé au premier appel pour ne pas ralentir le démarrage de l'application."""
+    global _np
+    if _np is False:
+        try:
+            import numpy
+        except ImportError: # NumPy est optionnel : les agrégats sont alors calculés en Python
+            numpy = None
+        _np = numpy
+    return _np
+
+
+def date_vers_secondes(date):
+    """Convertit une date de ventes.json ("YYYY-MM-DD HH:MM:SS" ou "YYYY-MM-DD") en secondes depuis 1970."""
+    return calendar.timegm(datetime.fromisoformat(date).timetuple()) # Date sans fuseau, comptée comme UTC
+
+
+def secondes_vers_date(secondes):
+    """Convertit des secondes depuis 1970 en date au format de ventes.json."""
+    return datetime.fromtimestamp(secondes, timezone.utc).strftime(FORMAT_DATE)
+
+
+def secondes_vers_jour(secondes):
+    """Jour ("YYYY-MM-DD") correspondant à des secondes depuis 1970."""
+    return datetime.fromtimestamp(secondes, timezone.utc).strftime("%Y-%m-%d")
+
+
+class Dictionnaire:
+    """Codage des chaînes répétées (titres, vendeurs) par un identifiant entier."""
+    def __init__(self): # Constructeur de la classe
+        self.valeurs = [] # identifiant -> chaîne
+        self.identifiants = {} # chaîne -> identifiant
+
+    def coder(self, valeur):
+        """Retourne l'identifiant de valeur (attribué au premier appel)."""
+        ident = self.identifiants.get(valeur)
+        if ident is None:
+            ident = self.identifiants[valeur] = len(self.valeurs)
+            self.valeurs.append(valeur)
+        return ident
+
+    def __getitem__(self, ident):
+        return self.valeurs[ident]
+
+    def __len__(self):
+        return len(self.valeurs)
+
+
+class VentesColonnes:
+    """Ventes rangées par date croissante dans des colonnes de types fixes.
+
+    Une vente occupe 36 octets (date, film, vendeur, quantité, prix unitaire, revenu) au lieu d'un
+    dictionnaire par vente. Les ventes d'un intervalle de dates sont trouvées par recherche
+    dichotomique sur la colonne des dates.
+    """
+    def __init__(self): # Constructeur de la classe
+        self.dates = array('q') # Secondes depuis 1970 (triées)
+        self.films = array('L') # Identifiant du film dans self.titres
+        self.vendeurs = array('L') # Identifiant du vendeur dans self.noms_vendeurs
+        self.quantites = array('q') # Quantité vendue
+        self.prix = array('d') # Prix unitaire
+        self.revenus = array('d') # Revenu total de la vente
+        self.titres = Dictionnaire() # Titres des films
+        self.noms_vendeurs = Dictionnaire() # Noms des vendeurs
+
+    @classmethod
+    def depuis_json(cls, ventes):
+        """Construit l'historique à partir de ventes au format de ventes.json (liste ou itérateur, parcouru une fois)."""
+        historique = cls()
+        for vente in ventes: # ajouter() garde l'ordre de lecture à date égale
+            historique.ajouter(vente)
+        return historique
+
+    def vers_json(self, debut=0, fin=None):
+        """Liste des ventes (positions debut à fin) au format de ventes.json."""
+        return [self.vente(i) for i in range(*slice(debut, fin).indices(len(self)))]
+
+    def __len__(self):
+        return len(self.dates)
+
+    def __getitem__(self, i):
+        """Vente à la position i au format de ventes.json (liste de ventes si i est une tranche)."""
+        if isinstance(i, slice):
+            return [self.vente(j) for j in range(*i.indices(len(self)))]
+        return self.vente(i if i >= 0 else len(self) + i)
+
+    def __iter__(self):
+        return (self.vente(i) for i in range(len(self)))
+
+    def vente(self, i):
+        """Vente à la position i au format de ventes.json."""
+        return {
+            "date": secondes_vers_date(self.dates[i]),
+            "film": self.titres[self.films[i]],
+            "vendeur": self.noms_vendeurs[self.vendeurs[i]],
+            "quantite": self.quantites[i],
+            "prix_unitaire": self.prix[i],
+            "revenu_total": self.revenus[i],
+        }
+
+    def ajouter(self, vente):
+        """Ajoute une vente au format de ventes.json, à sa place dans l'ordre des dates."""
+        date = date_vers_secondes(vente["date"])
+        ligne = (date, self.titres.coder(vente["film"]), self.noms_vendeurs.coder(vente.get("vendeur", "Inconnu")),
+                 vente["quantite"], vente["prix_unitaire"], vente["revenu_total"])
+        colonnes = (self.dates, self.films, self.vendeurs, self.quantites, self.prix, self.revenus)
+        if not self.dates or date >= self.dates[-1]: # Cas courant : vente la plus récente
+            for colonne, valeur in zip(colonnes, ligne):
+                colonne.append(valeur)
+        else: # Vente antérieure : insérer après les ventes de même date
+            i = bisect_right(self.dates, date)
+            for colonne, valeur in zip(colonnes, ligne):
+                colonne.insert(i, valeur)
+
+    def intervalle(self, debut=None, fin=None):
+        """Positions (i, j) des ventes datées de debut (inclus) à fin (exclu), dates au format de ventes.json.
+
+        Une borne None n'est pas appliquée.
+        """
+        i = 0 if debut is None else bisect_left(self.dates, date_vers_secondes(debut))
+        j = len(self) if fin is None else bisect_left(self.dates, date_vers_secondes(fin))
+        return i, max(i, j)
+
+    def ventes_entre(self, debut=None, fin=None):
+        """Ventes datées de debut (inclus) à fin (exclu), au format de ventes.json."""
+        return self.vers_json(*self.intervalle(debut, fin))
+
+    ## Agrégats ##
+    def totaux(self, i=0, j=None):
+        """(revenu, quantité vendue) des ventes aux positions i (inclus) à j (exclu)."""
+        j = len(self) if j is None else j
+        np = _numpy()
+        if np is not None:
+            return (float(np.frombuffer(self.revenus, dtype=np.float64)[i:j].sum()),
+                    int(np.frombuffer(self.quantites, dtype=np.int64)[i:j].sum()))
+        return sum(self.revenus[i:j]), sum(self.quantites[i:j])
+
+    def revenu_total(self, debut=None, fin=None):
+        """Revenu total des ventes de l'intervalle."""
+        i, j = self.intervalle(debut, fin)
+        np = _numpy()
+        if np is not None:
+            return float(np.frombuffer(self.revenus, dtype=np.float64)[i:j].sum())
+        return sum(self.revenus[i:j])
+
+    def _sommes_par_code(self, codes, valeurs, i, j, nombre):
+        """Somme de valeurs[i:j] par code (codes[i:j] compris entre 0 et nombre - 1)."""
+        np = _numpy()
+        if np is not None and j > i:
+            c = np.frombuffer(codes, dtype=np.dtype(codes.typecode))[i:j]
+            v = np.frombuffer(valeurs, dtype=np.dtype(valeurs.typecode))[i:j]
+            return np.bincount(c, weights=v, minlength=nombre).tolist()
+        sommes = [0] * nombre
+        for code, valeur in zip(codes[i:j], valeurs[i:j]):
+            sommes[code] += valeur
+        return sommes
+
+    def quantite_par_film(self, debut=None, fin=None):
+        """Dictionnaire titre -> quantité vendue dans l'intervalle."""
+        i, j = self.intervalle(debut, fin)
+        sommes = self._sommes_par_code(self.films, self.quantites, i, j, len(self.titres))
+        return {self.titres[k]: int(s) for k, s in enumerate(sommes) if s}
+
+    def quantite_par_vendeur(self, debut=None, fin=None):
+        """Dictionnaire vendeur -> quantité vendue dans l'intervalle."""
+        i, j = self.intervalle(debut, fin)
+        sommes = self._sommes_par_code(self.vendeurs, self.quantites, i, j, len(self.noms_vendeurs))
+        return {self.noms_vendeurs[k]: int(s) for k, s in enumerate(sommes) if s}
+
+    def quantite_par_genre(self, trouver_film, debut=None, fin=None):
+        """Dictionnaire genre -> quantité vendue ; trouver_film(titre) retourne le film du catalogue, ou None."""
+        genres = {}
+        for titre, quantite in self.quantite_par_film(debut, fin).items():
+            film = trouver_film(titre)
+            if film is not None: # Film absent du catalogue : non compté
+                genre = film.get("genre", "Inconnu")
+                genres[genre] = genres.get(genre, 0) + quantite
+        return genres
+
+    def revenu_par_jour(self, debut=None, fin=None):
+        """Dictionnaire "YYYY-MM-DD" -> revenu des ventes du jour, par ordre chronologique."""
+        i, j = self.intervalle(debut, fin)
+        jours = {}
+        np = _numpy()
+        if np is not None and j > i:
+            numeros = np.frombuffer(self.dates, dtype=np.int64)[i:j] // SECONDES_PAR_JOUR
+            revenus = np.frombuffer(self.revenus, dtype=np.float64)[i:j]
+            uniques, positions = np.unique(numeros, return_inverse=True)
+            sommes = np.bincount(positions, weights=revenus)
+            for numero, somme in zip(uniques.tolist(), sommes.tolist()):
+                jours[secondes_vers_jour(numero * SECONDES_PAR_JOUR)] = somme
+            return jours
+        for date, revenu in zip(self.dates[i:j], self.revenus[i:j]):
+            jour = secondes_vers_jour(date - date % SECONDES_PAR_JOUR)
+            jours[jour] = jours.get(jour, 0.0) + revenu
+        return jours